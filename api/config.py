@@ -1,5 +1,35 @@
 from pathlib import Path
+import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 # print(BASE_DIR)
-DATABASE_URL = f"sqlite:///{BASE_DIR}/course_catalog.db"
\ No newline at end of file
+DATABASE_PATH = BASE_DIR / "course_catalog.db"
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+
+# CATALOG_SNAPSHOT=1 serves course reads from an in-memory copy of the database (see snapshot.py)
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", "0") == "1"
+
+# size of the HTTP response cache (see response_cache.py); 0 turns it off
+RESPONSE_CACHE_MB = int(os.getenv("RESPONSE_CACHE_MB", "64"))
+# Cache-Control max-age of cached responses, in seconds
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "60"))
+
+# API_METRICS=0 turns off the per-route latency, size and query metrics served at /metrics
+API_METRICS = os.getenv("API_METRICS", "1") == "1"
+
+# DATABASE_ASYNC=1 serves the course reads from async endpoints on an async engine
+# (aiosqlite by default; a postgresql+asyncpg:// ASYNC_DATABASE_URL for the Postgres deployment)
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "0") == "1"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{DATABASE_PATH}")
+
+# sync engine: one connection per threadpool thread (FastAPI runs sync endpoints on 40),
+# plus overflow for the sessions that keep theirs until the response has been sent
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "40"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "216"))
+# async engine: connections are only held while a query runs
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "8"))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "8"))
+# prepared statements kept per connection (sqlite3 cached_statements / asyncpg statement cache)
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+# SQLITE_WAL=1 switches course_catalog.db to WAL so reads are not blocked while a loader writes
+SQLITE_WAL = os.getenv("SQLITE_WAL", "0") == "1"
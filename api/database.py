@@ -1,11 +1,50 @@
-from config import DATABASE_URL
-from sqlalchemy import create_engine
+from config import (DATABASE_PATH, DATABASE_URL, DATABASE_ASYNC, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+                    ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW, DB_STATEMENT_CACHE, SQLITE_WAL)
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# the whole database file fits in the mapping; pages are shared by every connection
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """The API only reads: connections are query_only, memory-mapped and keep temp b-trees in memory."""
+    cursor = dbapi_connection.cursor()
+    if SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+
+def engine_options(url: str, pool_class, pool_size: int, max_overflow: int) -> dict:
+    options = {"poolclass": pool_class, "pool_size": pool_size, "max_overflow": max_overflow}
+    if url.startswith("sqlite"):
+        # sqlite3 keeps up to cached_statements prepared statements per connection
+        options["connect_args"] = {"check_same_thread": False, "cached_statements": DB_STATEMENT_CACHE}
+    elif "+asyncpg" in url:
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE}
+        options["pool_pre_ping"] = True
+    return options
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL):
+    # imported here so the sync API runs without the async drivers installed
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_engine = create_async_engine(
+        url, **engine_options(url, AsyncAdaptedQueuePool, ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW)
+    )
+    if url.startswith("sqlite"):
+        event.listen(async_engine.sync_engine, "connect", configure_sqlite_connection)
+    return async_engine
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, QueuePool, DB_POOL_SIZE, DB_MAX_OVERFLOW))
+event.listen(engine, "connect", configure_sqlite_connection)
 SessionLocal = sessionmaker(autoflush=False, autocommit=False, bind=engine)
 
 def get_db():
@@ -16,3 +55,32 @@ def get_db():
         db.close()
 
 
+async_engine = make_async_engine() if DATABASE_ASYNC else None
+
+async def fetch(*statements):
+    """
+    Rows of each select, run on one connection of the async engine. The connection
+    goes back to the pool before the response is built, not after it is sent.
+    """
+    async with async_engine.connect() as connection:
+        return [(await connection.execute(statement)).all() for statement in statements]
+
+
+
+
+def wal_version(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def database_version():
+    """
+    Changes whenever the database is written; used to invalidate in-process caches.
+    In WAL mode a commit goes to the -wal file and only reaches the database file
+    at a checkpoint, which open connections can hold off indefinitely.
+    """
+    stat = os.stat(DATABASE_PATH)
+    return (stat.st_mtime_ns, stat.st_size, wal_version(f"{DATABASE_PATH}-wal"))
@@ -1,27 +1,80 @@
-from fastapi import FastAPI, status, HTTPException, Depends
-from schemas import Course, CourseFilter
-from typing import List, Optional
-from database import get_db
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models import CourseModel
+from fastapi import FastAPI, status, HTTPException, Depends, Query, Response
+from schemas import (CatalogDiff, Course, CourseBatchRequest, CourseBatchResponse, CourseFilter, CourseKey, PrereqGraphSummary,
+                     SearchResults)
+from typing import List, Literal, Optional
+from config import API_METRICS, CATALOG_SNAPSHOT, RESPONSE_CACHE_MB, RESPONSE_MAX_AGE
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from database import SessionLocal, async_engine, database_version, engine, fetch, get_db
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, or_, select, text, tuple_
+from models import COURSE_COLUMNS, CourseModel, DiffModel, RequirementModel
+from prereq_graph import GraphCache, PrereqGraph
+from serialization import FastJSONResponse, course_dicts, loads
+from snapshot import CatalogSnapshot, SnapshotCache
+from response_cache import ResponseCache, ResponseCacheMiddleware
+from request_metrics import METRICS_PATH, MetricsMiddleware, MetricsRegistry, instrument_engine
 
 
-app = FastAPI()
+graphs = GraphCache(database_version)
+snapshots = SnapshotCache(database_version, SessionLocal) if CATALOG_SNAPSHOT else None
 
-# returns all courses with optional filters
-@app.get("/courses", response_model=List[Course], status_code=status.HTTP_200_OK)
-def get_courses(
-    filters: CourseFilter = Depends(),
-    db: Session = Depends(get_db)
-):
-    query = db.query(CourseModel)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if snapshots is not None:
+        snapshots.get()
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+responses = ResponseCache(database_version, max_bytes=RESPONSE_CACHE_MB * 1024 * 1024) if RESPONSE_CACHE_MB else None
+if responses is not None:
+    app.add_middleware(ResponseCacheMiddleware, cache=responses, max_age=RESPONSE_MAX_AGE)
+
+# added last so it is the outermost middleware and also times response cache hits
+request_metrics = MetricsRegistry() if API_METRICS else None
+if request_metrics is not None:
+    app.add_middleware(MetricsMiddleware, registry=request_metrics)
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+
+CURSOR_SEPARATOR = "|"
+
+def make_cursor(catalog_year: str, course_code: str) -> str:
+    return f"{catalog_year}{CURSOR_SEPARATOR}{course_code}"
+
+def parse_cursor(cursor: str) -> tuple[str, str]:
+    catalog_year, separator, course_code = cursor.partition(CURSOR_SEPARATOR)
+    if not separator or not catalog_year or not course_code:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor '{cursor}', expected '<catalog_year>{CURSOR_SEPARATOR}<course_code>'"
+        )
+    return catalog_year, course_code
 
+def parse_fields(fields: str) -> List[str]:
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in COURSE_COLUMNS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields {unknown}, expected a comma separated list of {list(COURSE_COLUMNS)}"
+        )
+    return list(dict.fromkeys(requested))
+
+def filter_courses(query, filters: CourseFilter):
     if filters.course_code:
         query = query.filter(CourseModel.course_code == filters.course_code)
 
     if filters.course_prefix:
-        query = query.filter(CourseModel.course_code.like(f"{filters.course_prefix}%"))
+        query = query.filter(CourseModel.subject_prefix == filters.course_prefix.strip().upper())
+
+    if filters.min_course_number is not None:
+        query = query.filter(CourseModel.course_number >= filters.min_course_number)
+
+    if filters.max_course_number is not None:
+        query = query.filter(CourseModel.course_number <= filters.max_course_number)
 
     if filters.catalog_year:
         query = query.filter(CourseModel.catalog_year == filters.catalog_year)
@@ -58,18 +111,192 @@ def get_courses(
     if filters.min_repeat is not None:
         query = query.filter(CourseModel.repeats_allowed_for_credit >= filters.min_repeat)
 
-    if filters.sort_by:
-        sort_column = getattr(CourseModel, filters.sort_by, None)
+    return query
+
+def snapshot_courses(snapshot: CatalogSnapshot, filters: CourseFilter, fields: List[str]) -> FastJSONResponse:
+    """get_courses answered from the in-memory snapshot instead of the database."""
+    rows = snapshot.filter(filters)
+
+    headers = {}
+    if filters.limit is not None or filters.after is not None:
+        headers["X-Total-Count"] = str(len(rows))
+        after = parse_cursor(filters.after) if filters.after else None
+        rows, has_more = snapshot.page(rows, after, filters.limit)
+        if has_more:
+            last = rows[-1]
+            headers["X-Next-Cursor"] = make_cursor(snapshot.columns["catalog_year"][last],
+                                                   snapshot.columns["course_code"][last])
+    else:
+        rows = snapshot.sort(rows, filters.sort_by)
+
+    return FastJSONResponse(content=snapshot.records(rows, fields), headers=headers)
+
+def courses_statement(filters: CourseFilter, fields: List[str]):
+    """
+    The select behind get_courses and, when paging, the count of every matching course.
+    Both are plain Core selects, so the sync and async endpoints run the same SQL.
+    """
+    # the keyset columns are selected after the requested fields for the cursor
+    keys = [key for key in ("catalog_year", "course_code") if key not in fields]
+    query = filter_courses(select(*[COURSE_COLUMNS[field][0] for field in fields + keys]), filters)
+
+    count = None
+    if filters.limit is not None or filters.after is not None:
+        count = select(func.count()).select_from(query.subquery())
+        if filters.after:
+            catalog_year, course_code = parse_cursor(filters.after)
+            query = query.filter(
+                tuple_(CourseModel.catalog_year, CourseModel.course_code) > tuple_(catalog_year, course_code)
+            )
+        query = query.order_by(CourseModel.catalog_year, CourseModel.course_code)
+        if filters.limit is not None:
+            query = query.limit(filters.limit + 1)
+
+    elif filters.sort_by:
+        # JSON fields sort by their stored column; their hybrid properties have no SQL expression
+        if filters.sort_by in COURSE_COLUMNS:
+            sort_column = COURSE_COLUMNS[filters.sort_by][0]
+        else:
+            sort_column = getattr(CourseModel, filters.sort_by, None)
         if sort_column is not None:
-            query = query.order_by(sort_column)
+            # ties in a stable (catalog_year, course_code) order, the same as the snapshot's
+            query = query.order_by(sort_column, CourseModel.catalog_year, CourseModel.course_code)
+
+    return query, count
+
+def courses_response(rows, filters: CourseFilter, fields: List[str], total: Optional[int]) -> FastJSONResponse:
+    headers = {}
+    if total is not None:
+        headers["X-Total-Count"] = str(total)
+        if filters.limit is not None and len(rows) > filters.limit:
+            rows = rows[:filters.limit]
+            headers["X-Next-Cursor"] = make_cursor(rows[-1].catalog_year, rows[-1].course_code)
 
-    return query.all()
+    decoders = [COURSE_COLUMNS[field][1] for field in fields]
+    return FastJSONResponse(content=course_dicts(rows, fields, decoders), headers=headers)
+
+def course_code_statement(course_code: str, catalog_year: Optional[str] = None):
+    """Every field of a course across catalog years (newest first), or in one catalog year."""
+    query = select(*[column for column, _ in COURSE_COLUMNS.values()]).filter(CourseModel.course_code == course_code)
+    if catalog_year is not None:
+        query = query.filter(CourseModel.catalog_year == catalog_year)
+    return query.order_by(CourseModel.catalog_year.desc())
+
+def all_fields(rows):
+    return course_dicts(rows, list(COURSE_COLUMNS), [decode for _, decode in COURSE_COLUMNS.values()])
+
+def batch_statement(keys: List[CourseKey]):
+    """
+    Every course a batch asks for in one select: course_code IN (...) seeks the primary
+    key, then the row is kept if its (course_code, catalog_year) or its code alone was asked for.
+    """
+    pairs = sorted({(key.course_code, key.catalog_year) for key in keys if key.catalog_year is not None})
+    all_years = sorted({key.course_code for key in keys if key.catalog_year is None})
+    wanted = []
+    if pairs:
+        wanted.append(tuple_(CourseModel.course_code, CourseModel.catalog_year).in_(pairs))
+    if all_years:
+        wanted.append(CourseModel.course_code.in_(all_years))
+    return select(*[column for column, _ in COURSE_COLUMNS.values()]).filter(
+        CourseModel.course_code.in_(sorted({key.course_code for key in keys})),
+        or_(*wanted),
+    ).order_by(CourseModel.catalog_year.desc())
+
+def batch_results(keys: List[CourseKey], courses: List[dict]) -> dict:
+    """Course dicts (newest catalog year first) -> one result per key, in request order."""
+    by_code = defaultdict(list)
+    for course in courses:
+        by_code[course["course_code"]].append(course)
+
+    results, not_found = [], []
+    for key in keys:
+        matches = by_code.get(key.course_code, [])
+        if key.catalog_year is not None:
+            matches = [course for course in matches if course["catalog_year"] == key.catalog_year]
+        results.append({"course_code": key.course_code, "catalog_year": key.catalog_year,
+                        "found": bool(matches), "courses": matches})
+        if not matches:
+            not_found.append({"course_code": key.course_code, "catalog_year": key.catalog_year})
+    return {"results": results, "not_found": not_found}
+
+# DATABASE_ASYNC=1: the course reads as async endpoints on the async engine, so concurrent
+# requests wait on the database without holding a threadpool thread. Routes match in
+# registration order, so these take over from the sync routes below, which stay in the
+# OpenAPI schema (same parameters). Snapshot mode answers these reads from memory instead.
+if async_engine is not None and snapshots is None:
+    @app.get("/courses", include_in_schema=False)
+    async def get_courses_async(
+        filters: CourseFilter = Depends()
+    ):
+        fields = parse_fields(filters.fields) if filters.fields else list(COURSE_COLUMNS)
+        query, count = courses_statement(filters, fields)
+        if count is None:
+            [rows] = await fetch(query)
+            return courses_response(rows, filters, fields, None)
+        [[(total,)], rows] = await fetch(count, query)
+        return courses_response(rows, filters, fields, total)
+
+    @app.get("/catalog_years", include_in_schema=False)
+    async def get_catalog_years_async():
+        [rows] = await fetch(select(CourseModel.catalog_year).distinct().order_by(CourseModel.catalog_year.desc()))
+        return FastJSONResponse(content=[year for year, in rows])
+
+    @app.get("/courses/code/{course_code}", include_in_schema=False)
+    async def get_course_all_years_async(course_code: str):
+        [rows] = await fetch(course_code_statement(course_code))
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Course with code '{course_code}' not found"
+            )
+        return FastJSONResponse(content=all_fields(rows))
+
+    @app.get("/courses/{course_code}/{catalog_year}", include_in_schema=False)
+    async def get_single_course_async(course_code: str, catalog_year: str):
+        [rows] = await fetch(course_code_statement(course_code, catalog_year))
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Course '{course_code}' not found for catalog year '{catalog_year}'"
+            )
+        return FastJSONResponse(content=all_fields(rows)[0])
+
+    @app.post("/courses/batch", include_in_schema=False)
+    async def get_courses_batch_async(batch: CourseBatchRequest):
+        [rows] = await fetch(batch_statement(batch.courses))
+        return FastJSONResponse(content=batch_results(batch.courses, all_fields(rows)))
+
+    @app.get("/prefixes", include_in_schema=False)
+    async def get_prefixes_async():
+        [rows] = await fetch(select(CourseModel.subject_prefix).distinct().order_by(CourseModel.subject_prefix))
+        return FastJSONResponse(content=[prefix for prefix, in rows if prefix])
+
+# returns all courses with optional filters
+# with limit/after the response is one keyset page: X-Total-Count has the number of
+# matching courses and X-Next-Cursor, if there are more, the after value of the next page
+@app.get("/courses", response_model=List[Course], status_code=status.HTTP_200_OK)
+def get_courses(
+    filters: CourseFilter = Depends(),
+    db: Session = Depends(get_db)
+):
+    # Core rows instead of ORM objects: no per-row object construction, each JSON
+    # column decoded once, and the dicts are encoded without response_model validation
+    fields = parse_fields(filters.fields) if filters.fields else list(COURSE_COLUMNS)
+    if snapshots is not None:
+        return snapshot_courses(snapshots.get(), filters, fields)
+
+    query, count = courses_statement(filters, fields)
+    total = db.execute(count).scalar() if count is not None else None
+    return courses_response(db.execute(query).all(), filters, fields, total)
 
 # returns all possible catalog years in the db
 @app.get("/catalog_years", response_model=List[str], status_code=status.HTTP_200_OK)
 def get_catalog_years(
     db: Session = Depends(get_db)
 ):
+    if snapshots is not None:
+        return snapshots.get().catalog_years
+
     catalog_years = db.query(CourseModel.catalog_year).distinct().order_by(CourseModel.catalog_year.desc()).all()
     return [year[0] for year in catalog_years]
 
@@ -79,7 +306,12 @@ def get_course_all_years(
     course_code: str,
     db: Session = Depends(get_db)
 ):
-    courses = db.query(CourseModel).filter(CourseModel.course_code == course_code).order_by(CourseModel.catalog_year.desc()).all()
+    if snapshots is not None:
+        snapshot = snapshots.get()
+        rows = sorted(snapshot.by_code.get(course_code, []), key=lambda i: snapshot.columns["catalog_year"][i], reverse=True)
+        courses = snapshot.records(rows, list(COURSE_COLUMNS))
+    else:
+        courses = db.query(CourseModel).filter(CourseModel.course_code == course_code).order_by(CourseModel.catalog_year.desc()).all()
 
     if not courses:
         raise HTTPException(
@@ -97,7 +329,12 @@ def get_single_course(
     db: Session = Depends(get_db)
 ):
     """Get a specific course from a specific catalog year."""
-    course = db.query(CourseModel).filter(CourseModel.course_code == course_code).filter(CourseModel.catalog_year == catalog_year).first()
+    if snapshots is not None:
+        snapshot = snapshots.get()
+        rows = [i for i in snapshot.by_code.get(course_code, []) if snapshot.columns["catalog_year"][i] == catalog_year]
+        course = snapshot.records(rows, list(COURSE_COLUMNS))[0] if rows else None
+    else:
+        course = db.query(CourseModel).filter(CourseModel.course_code == course_code).filter(CourseModel.catalog_year == catalog_year).first()
 
     if not course:
         raise HTTPException(
@@ -107,26 +344,237 @@ def get_single_course(
 
     return course
 
+# many courses in one request: (course_code, catalog_year) pairs, or a code alone for every
+# catalog year, resolved by a single query; keys that match nothing are listed in not_found
+@app.post("/courses/batch", response_model=CourseBatchResponse, status_code=status.HTTP_200_OK)
+def get_courses_batch(
+    batch: CourseBatchRequest,
+    db: Session = Depends(get_db)
+):
+    if snapshots is not None:
+        snapshot = snapshots.get()
+        rows = {i for key in batch.courses for i in snapshot.by_code.get(key.course_code, [])}
+        rows = sorted(rows, key=lambda i: snapshot.columns["catalog_year"][i], reverse=True)
+        courses = snapshot.records(rows, list(COURSE_COLUMNS))
+    else:
+        courses = all_fields(db.execute(batch_statement(batch.courses)).all())
+
+    return FastJSONResponse(content=batch_results(batch.courses, courses))
+
+# courses that list course_code as a prerequisite/corequisite in catalog_year
+@app.get("/courses/{course_code}/{catalog_year}/required_by", response_model=List[Course], status_code=status.HTTP_200_OK)
+def get_courses_requiring(
+    course_code: str,
+    catalog_year: str,
+    kind: Optional[Literal["prereq", "coreq"]] = None,
+    db: Session = Depends(get_db)
+):
+    requiring = db.query(RequirementModel.course_code).filter(
+        RequirementModel.required_code == course_code,
+        RequirementModel.catalog_year == catalog_year,
+    )
+    if kind:
+        requiring = requiring.filter(RequirementModel.kind == kind)
+
+    return db.query(CourseModel).filter(
+        CourseModel.catalog_year == catalog_year,
+        CourseModel.course_code.in_(requiring),
+    ).order_by(CourseModel.course_code).all()
+
+def get_graph(catalog_year: str, db: Session, course_code: Optional[str] = None) -> PrereqGraph:
+    graph = graphs.get(db, catalog_year)
+    if graph is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Catalog year '{catalog_year}' not found"
+        )
+    if course_code is not None and course_code not in graph:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Course '{course_code}' not found for catalog year '{catalog_year}'"
+        )
+    return graph
+
+# every direct and indirect prerequisite of a course (all alternatives of "A or B")
+@app.get("/courses/{course_code}/{catalog_year}/ancestors", response_model=List[str], status_code=status.HTTP_200_OK)
+def get_course_ancestors(
+    course_code: str,
+    catalog_year: str,
+    db: Session = Depends(get_db)
+):
+    return get_graph(catalog_year, db, course_code).ancestors(course_code)
+
+# every course that directly or indirectly requires a course
+@app.get("/courses/{course_code}/{catalog_year}/descendants", response_model=List[str], status_code=status.HTTP_200_OK)
+def get_course_descendants(
+    course_code: str,
+    catalog_year: str,
+    db: Session = Depends(get_db)
+):
+    return get_graph(catalog_year, db, course_code).descendants(course_code)
+
+# shortest prerequisite chain from a course down to one of its prerequisites
+@app.get("/courses/{course_code}/{catalog_year}/chain/{prereq_code}", response_model=List[str], status_code=status.HTTP_200_OK)
+def get_prereq_chain(
+    course_code: str,
+    catalog_year: str,
+    prereq_code: str,
+    db: Session = Depends(get_db)
+):
+    chain = get_graph(catalog_year, db, course_code).shortest_chain(course_code, prereq_code)
+    if chain is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"'{prereq_code}' is not a prerequisite of '{course_code}' in catalog year '{catalog_year}'"
+        )
+    return chain
+
+# topological layers and cycles of a catalog year's prerequisite graph
+@app.get("/prereq_graph/{catalog_year}", response_model=PrereqGraphSummary, status_code=status.HTTP_200_OK)
+def get_prereq_graph(
+    catalog_year: str,
+    db: Session = Depends(get_db)
+):
+    graph = get_graph(catalog_year, db)
+    return PrereqGraphSummary(
+        catalog_year=catalog_year,
+        courses=len(graph.codes),
+        edges=sum(len(prereqs) for prereqs in graph.prereqs),
+        layers=graph.layers,
+        cycles=graph.cycles,
+    )
+
+# course_name matches weigh 5x description matches
+SEARCH_RANK = "bm25(course_search, 0, 0, 0, 5.0, 1.0)"
+
+def fts_query(q: str) -> str:
+    """Every word of q as a quoted FTS5 term, so punctuation in user input is never parsed as query syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in q.split())
+
+# full-text search over course names and descriptions, best matches first
+@app.get("/search", response_model=SearchResults, status_code=status.HTTP_200_OK)
+def search_courses(
+    q: str = Query(..., min_length=1),
+    catalog_year: Optional[str] = None,
+    course_prefix: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    match = fts_query(q)
+    if not match:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Empty search query")
+
+    where = "course_search MATCH :match"
+    params = {"match": match, "limit": limit, "offset": offset}
+    if catalog_year:
+        where += " AND catalog_year = :catalog_year"
+        params["catalog_year"] = catalog_year
+    if course_prefix:
+        where += " AND subject_prefix = :course_prefix"
+        params["course_prefix"] = course_prefix.strip().upper()
+
+    total = db.execute(text(f"SELECT COUNT(*) FROM course_search WHERE {where}"), params).scalar()
+    rows = db.execute(text(f"""
+        SELECT course_code, catalog_year,
+               highlight(course_search, 3, '<b>', '</b>') AS course_name,
+               snippet(course_search, 4, '<b>', '</b>', '…', 24) AS snippet,
+               {SEARCH_RANK} AS score
+        FROM course_search
+        WHERE {where}
+        ORDER BY score, catalog_year DESC, course_code
+        LIMIT :limit OFFSET :offset
+    """), params).mappings().all()
+
+    return SearchResults(query=q, total=total, limit=limit, offset=offset, results=[dict(row) for row in rows])
+
+# the fields compared by catalog_diff.py
+DIFF_FIELDS = [field for field in COURSE_COLUMNS if field not in ("course_code", "catalog_year")]
+# a diff read the other way round
+REVERSED_CHANGE = {"added": "dropped", "dropped": "added", "changed": "changed"}
+
+# courses added, dropped or changed between two catalog years (either may come first), read
+# from the diffs materialized when the database is loaded; field keeps the courses whose field changed
+@app.get("/diff", response_model=CatalogDiff, status_code=status.HTTP_200_OK)
+def get_catalog_diff(
+    from_year: str,
+    to_year: str,
+    course_code: Optional[str] = None,
+    course_prefix: Optional[str] = None,
+    field: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    if field is not None and field not in DIFF_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown field '{field}', expected one of {DIFF_FIELDS}"
+        )
+    catalog_years = set(get_catalog_years(db))
+    for catalog_year in (from_year, to_year):
+        if catalog_year not in catalog_years:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Catalog year '{catalog_year}' not found"
+            )
+
+    # each pair of years is stored once, earlier year first
+    reverse = from_year > to_year
+    first, second = sorted((from_year, to_year))
+    before, after = aliased(CourseModel), aliased(CourseModel)
+    keys = [column.key for column, _ in COURSE_COLUMNS.values()]
+    query = db.query(
+        DiffModel.course_code, DiffModel.change, DiffModel.fields,
+        *[getattr(before, key) for key in keys], *[getattr(after, key) for key in keys],
+    ).outerjoin(
+        before, (before.course_code == DiffModel.course_code) & (before.catalog_year == DiffModel.from_year)
+    ).outerjoin(
+        after, (after.course_code == DiffModel.course_code) & (after.catalog_year == DiffModel.to_year)
+    ).filter(DiffModel.from_year == first, DiffModel.to_year == second)
+
+    if course_code:
+        query = query.filter(DiffModel.course_code == course_code)
+    if course_prefix:
+        query = query.filter(func.coalesce(after.subject_prefix, before.subject_prefix) == course_prefix.strip().upper())
+    if field:
+        query = query.filter(DiffModel.fields.like(f'%"{field}"%'))
+    rows = query.order_by(DiffModel.course_code).all()
+
+    fields, decoders = list(COURSE_COLUMNS), [decode for _, decode in COURSE_COLUMNS.values()]
+    olds = course_dicts([row[3:3 + len(fields)] for row in rows], fields, decoders)
+    news = course_dicts([row[3 + len(fields):] for row in rows], fields, decoders)
+
+    counts = {"added": 0, "dropped": 0, "changed": 0}
+    courses = []
+    for row, old, new in zip(rows, olds, news):
+        change = row.change
+        if reverse:
+            old, new, change = new, old, REVERSED_CHANGE[change]
+        counts[change] += 1
+        diff = {"course_code": row.course_code, "change": change, "fields": {}, "course": None}
+        if change == "changed":
+            diff["fields"] = {name: {"old": old[name], "new": new[name]} for name in loads(row.fields)}
+        else:
+            diff["course"] = new if change == "added" else old
+        courses.append(diff)
+
+    return FastJSONResponse(content={"from_year": from_year, "to_year": to_year, **counts, "courses": courses})
+
 # return all possible prefixes 
 @app.get("/prefixes", response_model=List[str], status_code=status.HTTP_200_OK)
 def get_prefixes(
     db: Session = Depends(get_db)
 ):
-    all_codes = db.query(CourseModel.course_code).distinct().all()
-
-    prefixes = set()
-    for code_tuple in all_codes:
-        code = code_tuple[0]
-        # Find where digits start
-        prefix = ""
-        for char in code:
-            if char.isdigit():
-                break
-            prefix += char
-        if prefix:
-            prefixes.add(prefix.strip())
-
-    return sorted(list(prefixes))
+    if snapshots is not None:
+        return snapshots.get().prefixes
+
+    prefixes = db.query(CourseModel.subject_prefix).distinct().order_by(CourseModel.subject_prefix).all()
+    return [prefix[0] for prefix in prefixes if prefix[0]]
+
+@app.get(METRICS_PATH, include_in_schema=False)
+def get_metrics():
+    if request_metrics is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are turned off (API_METRICS=0)")
+    return Response(content=request_metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health", status_code=status.HTTP_200_OK)
 def health_check():
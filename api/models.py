@@ -1,7 +1,7 @@
 from sqlalchemy import Column, String, Integer, Text
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.ext.hybrid import hybrid_property
-import json
+from serialization import loads
 from typing import Optional, Union, List
 
 
@@ -21,45 +21,85 @@ class CourseModel(Base):
     _class_levels = Column("class_levels", Text)
     repeats_allowed_for_credit = Column(Integer)
 
+    # generated by SQLite from course_code ("BIO 127LA" -> "BIO", 127, "LA") and indexed
+    subject_prefix = Column(String)
+    course_number = Column(Integer)
+    course_suffix = Column(String)
+
     @hybrid_property
     def credits(self) -> Optional[Union[int, List[int]]]:
         """Examples: '[1, 4]' or '3' """
-        if self._credits is None:
-            return None
-        try:
-            return json.loads(self._credits)
-        except(json.JSONDecodeError, TypeError):
-            try:
-                return int(self._credits)
-            except ValueError:
-                return None
+        return decode_credits(self._credits)
 
     @hybrid_property
     def prereqs(self) -> Optional[List[str]]:
         """Parse prereqs from JSON string to list"""
-        if not self._prereqs or self._prereqs == '':
-            return None
-        try:
-            return json.loads(self._prereqs)
-        except:
-            return None
+        return decode_list(self._prereqs)
 
     @hybrid_property
     def coreqs(self) -> Optional[List[str]]:
         """Parse coreqs from JSON string to list"""
-        if not self._coreqs or self._coreqs == '':
-            return None
-        try:
-            return json.loads(self._coreqs)
-        except:
-            return None
+        return decode_list(self._coreqs)
 
     @hybrid_property
     def class_levels(self) -> Optional[List[str]]:
         """Parse class_levels from JSON string to list"""
-        if not self._class_levels or self._class_levels == '':
-            return None
+        return decode_list(self._class_levels)
+
+
+def decode_credits(value) -> Optional[Union[int, List[int]]]:
+    if value is None:
+        return None
+    try:
+        return loads(value)
+    except (ValueError, TypeError):
         try:
-            return json.loads(self._class_levels)
-        except:
-            return None
\ No newline at end of file
+            return int(value)
+        except ValueError:
+            return None
+
+
+def decode_list(value) -> Optional[List[str]]:
+    if not value:
+        return None
+    try:
+        return loads(value)
+    except (ValueError, TypeError):
+        return None
+
+
+# Course field -> (stored column, decoder) for reads that bypass the ORM objects
+COURSE_COLUMNS = {
+    "course_code": (CourseModel.course_code, None),
+    "course_name": (CourseModel.course_name, None),
+    "credits": (CourseModel._credits, decode_credits),
+    "course_description": (CourseModel.course_description, None),
+    "prereqs": (CourseModel._prereqs, decode_list),
+    "coreqs": (CourseModel._coreqs, decode_list),
+    "class_levels": (CourseModel._class_levels, decode_list),
+    "repeats_allowed_for_credit": (CourseModel.repeats_allowed_for_credit, None),
+    "catalog_year": (CourseModel.catalog_year, None),
+}
+
+
+class RequirementModel(Base):
+    """One course code named in a prerequisite/corequisite group, see catalog_db.requirement_rows."""
+    __tablename__ = "course_requirements"
+
+    course_code = Column(String, primary_key=True)
+    catalog_year = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True)
+    group_id = Column(Integer, primary_key=True)
+    required_code = Column(String, primary_key=True)
+
+
+class DiffModel(Base):
+    """One added, dropped or changed course between two catalog years, see catalog_diff.refresh_diffs."""
+    __tablename__ = "course_diffs"
+
+    from_year = Column(String, primary_key=True)
+    to_year = Column(String, primary_key=True)
+    course_code = Column(String, primary_key=True)
+    change = Column(String)
+    # JSON list of the changed fields
+    fields = Column(Text)
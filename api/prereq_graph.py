@@ -0,0 +1,206 @@
+"""
+In-process prerequisite graph, one per catalog year.
+
+Courses (and codes that are only ever required, e.g. retired courses) get
+compact integer node IDs; edges point from a course to every code named in
+its prerequisite groups, so "A or B" contributes an edge to both. Transitive
+closures are kept as Python int bitsets and computed once per graph over the
+strongly connected components in topological order, which also yields the
+cycles and the topological layers.
+
+Graphs are cached per year and rebuilt when the database file changes.
+"""
+from collections import deque
+from threading import Lock
+from sqlalchemy.orm import Session
+from models import CourseModel, RequirementModel
+
+
+def bits(mask):
+    """Node IDs set in a bitset."""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
+class PrereqGraph:
+    def __init__(self, catalog_year, codes, edges):
+        self.catalog_year = catalog_year
+        self.codes = list(codes) # node ID -> course code
+        self.ids = {code: i for i, code in enumerate(self.codes)}
+        self.prereqs = [[] for _ in self.codes] # node -> nodes it requires
+        self.dependents = [[] for _ in self.codes] # node -> nodes that require it
+        for course, required in edges:
+            for code in (course, required):
+                if code not in self.ids:
+                    self.ids[code] = len(self.codes)
+                    self.codes.append(code)
+                    self.prereqs.append([])
+                    self.dependents.append([])
+            self.prereqs[self.ids[course]].append(self.ids[required])
+            self.dependents[self.ids[required]].append(self.ids[course])
+
+        self.components = self.strongly_connected_components()
+        self.cycles = [sorted(self.codes[i] for i in c) for c in self.components if self.is_cycle(c)]
+        self.ancestor_bits = self.closure(self.prereqs, reversed(self.components))
+        self.descendant_bits = self.closure(self.dependents, self.components)
+        self.layers = self.topological_layers()
+
+    def strongly_connected_components(self):
+        """
+        Tarjan's algorithm (iterative). Components come out with every component
+        before the ones whose courses require it, i.e. dependents first.
+        """
+        index = [None] * len(self.codes)
+        low = [0] * len(self.codes)
+        on_stack = [False] * len(self.codes)
+        stack, components, counter = [], [], 0
+
+        for root in range(len(self.codes)):
+            if index[root] is not None:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, edge = work.pop()
+                if edge == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                if edge < len(self.prereqs[node]):
+                    work.append((node, edge + 1))
+                    child = self.prereqs[node][edge]
+                    if index[child] is None:
+                        work.append((child, 0))
+                    elif on_stack[child]:
+                        low[node] = min(low[node], index[child])
+                    continue
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+        # Tarjan emits a component only after everything it requires
+        components.reverse()
+        return components
+
+    def is_cycle(self, component):
+        return len(component) > 1 or component[0] in self.prereqs[component[0]]
+
+    def closure(self, adjacency, components):
+        """
+        Bitset of every node reachable from each node along adjacency. components
+        must list a component after every component it reaches.
+        """
+        reach = [0] * len(self.codes)
+        for component in components:
+            members = 0
+            for node in component:
+                members |= 1 << node
+            mask = 0
+            for node in component:
+                for child in adjacency[node]:
+                    mask |= reach[child] | (1 << child)
+            # inside a cycle every member reaches every other member (and itself)
+            if not self.is_cycle(component):
+                mask &= ~members
+            for node in component:
+                reach[node] = mask
+        return reach
+
+    def topological_layers(self):
+        """Layer 0 has no prerequisites; every other course sits one layer above its deepest prerequisite."""
+        depth = [0] * len(self.codes)
+        for component in reversed(self.components):
+            level = 0
+            for node in component:
+                for child in self.prereqs[node]:
+                    if child not in component:
+                        level = max(level, depth[child] + 1)
+            for node in component:
+                depth[node] = level
+
+        layers = [[] for _ in range(max(depth, default=-1) + 1)]
+        for node, level in enumerate(depth):
+            layers[level].append(self.codes[node])
+        return [sorted(layer) for layer in layers]
+
+    def __contains__(self, course_code):
+        return course_code in self.ids
+
+    def ancestors(self, course_code):
+        """Every course that is a direct or indirect prerequisite of course_code."""
+        return sorted(self.codes[i] for i in bits(self.ancestor_bits[self.ids[course_code]]))
+
+    def descendants(self, course_code):
+        """Every course that requires course_code, directly or indirectly."""
+        return sorted(self.codes[i] for i in bits(self.descendant_bits[self.ids[course_code]]))
+
+    def shortest_chain(self, course_code, prereq_code):
+        """
+        Shortest list of courses [course_code, ..., prereq_code] where each one
+        requires the next, or None if prereq_code is not a prerequisite.
+        """
+        start, goal = self.ids[course_code], self.ids.get(prereq_code)
+        if goal is None or not self.ancestor_bits[start] >> goal & 1:
+            return None
+
+        parent = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for child in self.prereqs[node]:
+                if child in parent:
+                    continue
+                parent[child] = node
+                if child == goal:
+                    chain = [child]
+                    while parent[chain[-1]] is not None:
+                        chain.append(parent[chain[-1]])
+                    return [self.codes[i] for i in reversed(chain)]
+                queue.append(child)
+        return None
+
+
+def build_graph(db: Session, catalog_year):
+    codes = db.query(CourseModel.course_code).filter(CourseModel.catalog_year == catalog_year) \
+        .order_by(CourseModel.course_code).all()
+    if not codes:
+        return None
+
+    edges = db.query(RequirementModel.course_code, RequirementModel.required_code).filter(
+        RequirementModel.catalog_year == catalog_year,
+        RequirementModel.kind == "prereq",
+    ).all()
+    return PrereqGraph(catalog_year, [code[0] for code in codes], edges)
+
+
+class GraphCache:
+    """PrereqGraphs by catalog year, dropped as soon as the database version changes."""
+    def __init__(self, version):
+        self.version = version # callable returning the current database version
+        self.graphs = {}
+        self.graphs_version = None
+        self.lock = Lock()
+
+    def get(self, db: Session, catalog_year):
+        """The year's graph, or None if the year has no courses."""
+        version = self.version()
+        with self.lock:
+            if version != self.graphs_version:
+                self.graphs = {}
+                self.graphs_version = version
+            if catalog_year not in self.graphs:
+                self.graphs[catalog_year] = build_graph(db, catalog_year)
+            return self.graphs[catalog_year]
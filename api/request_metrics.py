@@ -0,0 +1,180 @@
+"""
+Per-route request metrics, served at /metrics in the Prometheus text format.
+
+MetricsMiddleware wraps the whole app (response cache included, so cache hits
+are measured too) and records, per method, route template and status:
+latency and response size histograms, and the number and time of the SQL
+statements the request ran. Statements are attributed to the request through
+a context variable set by the middleware: the threadpool and the async engine
+run with a copy of the request's context, so instrument_engine()'s listeners
+see the same RequestStats whichever way the endpoint reaches the database.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock
+import time
+from sqlalchemy import event
+from starlette.routing import Match
+
+# upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS_PATH = "/metrics"
+
+
+@dataclass
+class RequestStats:
+    status: int = 500 # until the response starts
+    response_bytes: int = 0
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(le, count of observations <= le) per bucket, Prometheus style."""
+        total = 0
+        for bound, count in zip([*map(str, self.bounds), "+Inf"], self.counts):
+            total += count
+            yield bound, total
+
+
+@dataclass
+class RouteStats:
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    size: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = {} # (method, route, status) -> RouteStats
+        self.lock = Lock()
+
+    def observe(self, method, route, seconds, request: RequestStats):
+        key = (method, route, str(request.status))
+        with self.lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = RouteStats()
+            stats.latency.observe(seconds)
+            stats.size.observe(request.response_bytes)
+            stats.queries += request.queries
+            stats.query_seconds += request.query_seconds
+
+    def prometheus_text(self):
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                "# HELP api_request_duration_seconds Time from receiving a request to sending the last byte.",
+                "# TYPE api_request_duration_seconds histogram",
+            ]
+            for key, stats in routes:
+                lines += histogram_lines("api_request_duration_seconds", key, stats.latency, "{:.6f}")
+
+            lines += [
+                "# HELP api_response_size_bytes Size of the response body as sent (after compression).",
+                "# TYPE api_response_size_bytes histogram",
+            ]
+            for key, stats in routes:
+                lines += histogram_lines("api_response_size_bytes", key, stats.size, "{:.0f}")
+
+            lines += [
+                "# HELP api_db_queries_total SQL statements run by the requests.",
+                "# TYPE api_db_queries_total counter",
+            ]
+            lines += [f"api_db_queries_total{labels(*key)} {stats.queries}" for key, stats in routes]
+            lines += [
+                "# HELP api_db_query_seconds_total Time spent in SQL statements by the requests.",
+                "# TYPE api_db_query_seconds_total counter",
+            ]
+            lines += [f"api_db_query_seconds_total{labels(*key)} {stats.query_seconds:.6f}" for key, stats in routes]
+        return "\n".join(lines) + "\n"
+
+
+def labels(method, route, status, le=None):
+    text = f'method="{method}",route="{route}",status="{status}"'
+    if le is not None:
+        text += f',le="{le}"'
+    return "{" + text + "}"
+
+
+def histogram_lines(name, key, histogram, sum_format):
+    lines = [f"{name}_bucket{labels(*key, le=le)} {count}" for le, count in histogram.cumulative()]
+    lines.append(f"{name}_sum{labels(*key)} {sum_format.format(histogram.sum)}")
+    lines.append(f"{name}_count{labels(*key)} {sum(histogram.counts)}")
+    return lines
+
+
+def route_path(scope):
+    """The route template a request matched, e.g. /courses/code/{course_code}."""
+    route = scope.get("route")
+    if route is None:
+        # answered before routing (a response cache hit): match it the way the router would
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so the response body is counted as it is sent without buffering it."""
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestStats()
+        token = current_request.set(request)
+
+        async def send_counted(message):
+            if message["type"] == "http.response.start":
+                request.status = message["status"]
+            elif message["type"] == "http.response.body":
+                request.response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_counted)
+        finally:
+            current_request.reset(token)
+            self.registry.observe(scope["method"], route_path(scope), time.perf_counter() - start, request)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_start
+    request = current_request.get()
+    if request is not None:
+        request.queries += 1
+        request.query_seconds += elapsed
+
+
+def instrument_engine(engine):
+    """Counts and times the statements of a (sync) engine; pass async_engine.sync_engine for the async one."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,185 @@
+"""
+HTTP response cache for the read endpoints.
+
+Responses only change when course_catalog.db is reloaded, so a successful GET
+of a cacheable path is stored under its normalized path and query (parameters
+sorted, empty ones dropped) together with gzip and, if the brotli package is
+installed, brotli encoded copies. Entries carry a strong ETag per encoding;
+If-None-Match is answered with 304. The whole cache is dropped when the
+database version changes, and the least recently used entries are evicted
+once the stored bytes exceed max_bytes.
+
+A request with Cache-Control: no-cache skips the lookup (the fresh response
+still replaces the cached one).
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from urllib.parse import parse_qsl
+import gzip
+import hashlib
+import re
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHEABLE_PATHS = [
+    re.compile(r"^/courses$"),
+    re.compile(r"^/courses/code/[^/]+$"),
+    re.compile(r"^/catalog_years$"),
+    re.compile(r"^/prefixes$"),
+    re.compile(r"^/diff$"),
+]
+
+# responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# headers that describe the stored body rather than the resource
+PER_ENCODING_HEADERS = {"content-length", "content-encoding", "etag"}
+
+
+def cache_key(request: Request):
+    path = request.url.path.rstrip("/") or "/"
+    params = sorted((key, value) for key, value in parse_qsl(request.url.query) if value != "")
+    return path, tuple(params)
+
+
+def accepted_encodings(header):
+    """Content codings from an Accept-Encoding header, without the ones refused with q=0."""
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        if name and not (params and q.replace(".", "").strip("0") == ""):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+@dataclass
+class CachedResponse:
+    headers: dict
+    # content coding ("identity", "gzip", "br") -> (body, etag)
+    bodies: dict = field(default_factory=dict)
+
+    @property
+    def size(self):
+        return sum(len(body) for body, _ in self.bodies.values())
+
+    def etags(self):
+        return {etag for _, etag in self.bodies.values()}
+
+    def variant(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return "identity"
+
+
+def build_entry(headers, body):
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    entry = CachedResponse({k: v for k, v in headers.items() if k.lower() not in PER_ENCODING_HEADERS})
+    entry.bodies["identity"] = (body, f'"{digest}"')
+    if len(body) >= MIN_COMPRESS_BYTES:
+        entry.bodies["gzip"] = (gzip.compress(body, compresslevel=6), f'"{digest}-gzip"')
+        if brotli is not None:
+            entry.bodies["br"] = (brotli.compress(body, quality=5), f'"{digest}-br"')
+    return entry
+
+
+class ResponseCache:
+    def __init__(self, version, max_bytes=64 * 1024 * 1024):
+        self.version = version # callable returning the current database version
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.entries_version = None
+        self.total_bytes = 0
+        self.lock = Lock()
+
+    def check_version(self):
+        version = self.version()
+        if version != self.entries_version:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.entries_version = version
+
+    def get(self, key):
+        with self.lock:
+            self.check_version()
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry, version):
+        """Stores an entry built from the database at version; dropped if the database has changed since."""
+        with self.lock:
+            self.check_version()
+            if version != self.entries_version:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.size
+            if entry.size > self.max_bytes:
+                return
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, cache: ResponseCache, max_age=60):
+        super().__init__(app)
+        self.cache = cache
+        self.cache_control = f"public, max-age={max_age}"
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method != "GET" or not any(p.match(request.url.path.rstrip("/")) for p in CACHEABLE_PATHS):
+            return await call_next(request)
+
+        key = cache_key(request)
+        entry = None
+        if "no-cache" not in request.headers.get("cache-control", ""):
+            entry = self.cache.get(key)
+        cache_status = "HIT"
+
+        if entry is None:
+            # taken first, so a response computed before a reload is not stored under the new version
+            version = self.cache.version()
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            # compressing a multi-MB body would hold up every other request on the event loop
+            entry = await run_in_threadpool(build_entry, response.headers, body)
+            self.cache.put(key, entry, version)
+            cache_status = "MISS"
+
+        return self.respond(request, entry, cache_status)
+
+    def respond(self, request: Request, entry: CachedResponse, cache_status):
+        encoding = entry.variant(request.headers.get("accept-encoding", ""))
+        body, etag = entry.bodies[encoding]
+        headers = dict(entry.headers)
+        headers.update({"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding",
+                        "X-Cache": cache_status})
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip() for tag in if_none_match.split(",")}
+            if "*" in tags or tags & entry.etags():
+                headers.pop("Content-Encoding", None)
+                headers.pop("content-type", None)
+                return Response(status_code=304, headers=headers)
+
+        return Response(content=body, headers=headers)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, Union, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, Literal, Optional, Union, List
 
 # catalog_year seperated by _ not -
 class Course(BaseModel):
@@ -20,6 +20,10 @@ class CourseFilter(BaseModel):
     course_prefix: Optional[str] = None
     catalog_year: Optional[str] = None
 
+    # Course number range, e.g. 100-199 for upper division
+    min_course_number: Optional[int] = None
+    max_course_number: Optional[int] = None
+
     # Prereq & Coreq based
     has_prereqs: Optional[bool] = None
     has_coreqs: Optional[bool] = None
@@ -34,4 +38,79 @@ class CourseFilter(BaseModel):
     min_repeat: Optional[int] = None
 
     # Sorting
-    sort_by: Optional[str] = "course_code" 
\ No newline at end of file
+    sort_by: Optional[str] = "course_code"
+
+    # Paging: pages are ordered by (catalog_year, course_code) and sort_by is ignored.
+    # after is the X-Next-Cursor header of the previous page.
+    limit: Optional[int] = Field(None, ge=1, le=1000)
+    after: Optional[str] = None
+
+    # Comma separated Course fields to return, e.g. course_code,course_name
+    fields: Optional[str] = None
+
+class CourseKey(BaseModel):
+    course_code: str
+    # None looks the course up in every catalog year
+    catalog_year: Optional[str] = None
+
+class CourseBatchRequest(BaseModel):
+    courses: List[CourseKey] = Field(..., min_length=1, max_length=1000)
+
+class CourseBatchResult(BaseModel):
+    course_code: str
+    catalog_year: Optional[str] = None
+    found: bool
+    # the course of a (course_code, catalog_year) key, or every catalog year of a code, newest first
+    courses: List[Course]
+
+class CourseBatchResponse(BaseModel):
+    # one result per requested key, in request order
+    results: List[CourseBatchResult]
+    not_found: List[CourseKey]
+
+class PrereqGraphSummary(BaseModel):
+    catalog_year: str
+    courses: int
+    edges: int
+    # layer 0 has no prerequisites; each course sits one layer above its deepest prerequisite
+    layers: List[List[str]]
+    # groups of courses that (indirectly) require each other
+    cycles: List[List[str]]
+
+
+class SearchResult(BaseModel):
+    course_code: str
+    catalog_year: str
+    # matched terms wrapped in <b></b>
+    course_name: str
+    snippet: Optional[str] = None
+    # BM25, lower is a better match
+    score: float
+
+class SearchResults(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    results: List[SearchResult]
+
+
+class FieldChange(BaseModel):
+    old: Any = None
+    new: Any = None
+
+class CourseDiff(BaseModel):
+    course_code: str
+    change: Literal["added", "dropped", "changed"]
+    # changed courses: the old and new value of every field that differs
+    fields: Dict[str, FieldChange] = {}
+    # added courses: the course in to_year; dropped courses: the course in from_year
+    course: Optional[Course] = None
+
+class CatalogDiff(BaseModel):
+    from_year: str
+    to_year: str
+    added: int
+    dropped: int
+    changed: int
+    courses: List[CourseDiff]
@@ -0,0 +1,45 @@
+"""
+JSON helpers for the read path. orjson is used when it is installed (it is in
+requirements.txt); otherwise everything falls back to the standard library.
+"""
+import json
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(value):
+    return orjson.loads(value) if orjson is not None else json.loads(value)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    A response for content that is already plain dicts/lists. Returning it from
+    an endpoint skips FastAPI's response_model validation and jsonable_encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def course_dicts(rows, fields, decoders):
+    """
+    Rows selected as tuples (fields first, in order) -> Course dicts. Each JSON
+    column is decoded exactly once, by its decoder from models.COURSE_COLUMNS.
+    """
+    columns = list(zip(fields, decoders))
+    return [
+        {field: decode(value) if decode is not None and value is not None else value
+         for (field, decode), value in zip(columns, row)}
+        for row in rows
+    ]
@@ -0,0 +1,203 @@
+"""
+Read-only in-memory copy of the courses table for the CATALOG_SNAPSHOT serving mode.
+
+The table is held column by column (one list per field, JSON columns decoded
+once at load) with hash indexes from course_code, catalog_year, subject_prefix
+and the stored class_levels value to row numbers. A CourseFilter is answered
+by intersecting the index hits and checking the remaining conditions on those
+rows only, with the same semantics as the SQL in main.filter_courses (LIKE is
+case-insensitive and treats % and _ as wildcards, NULL sorts first).
+
+The snapshot is replaced as a whole when the database file changes.
+"""
+from collections import defaultdict
+from threading import Lock
+import re
+from sqlalchemy.orm import Session
+from models import COURSE_COLUMNS, CourseModel
+from schemas import CourseFilter
+
+# stored JSON text kept next to the decoded values for the LIKE filters and sorting
+RAW_COLUMNS = {
+    "credits": CourseModel._credits,
+    "prereqs": CourseModel._prereqs,
+    "coreqs": CourseModel._coreqs,
+    "class_levels": CourseModel._class_levels,
+}
+
+
+def like_matcher(pattern):
+    """SQLite's LIKE '%pattern%': case-insensitive, % any run of characters, _ any one character."""
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    compiled = re.compile(regex, re.IGNORECASE | re.DOTALL)
+    return lambda value: value is not None and compiled.search(value) is not None
+
+
+def sql_sort_key(value):
+    """SQLite's ORDER BY: NULLs, then numbers, then text."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, value)
+
+
+class CatalogSnapshot:
+    __slots__ = ("version", "size", "columns", "raw", "subject_prefix", "course_number",
+                 "by_code", "by_year", "by_prefix", "by_class_levels", "catalog_years", "prefixes")
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.size = len(rows)
+        fields = list(COURSE_COLUMNS)
+        raw_fields = list(RAW_COLUMNS)
+
+        self.columns = {field: [] for field in fields}
+        self.raw = {field: [] for field in raw_fields}
+        self.subject_prefix = []
+        self.course_number = []
+        for row in rows:
+            values = row[:len(fields)]
+            for field, value in zip(fields, values):
+                decode = COURSE_COLUMNS[field][1]
+                self.columns[field].append(decode(value) if decode is not None and value is not None else value)
+            for field, value in zip(raw_fields, row[len(fields):len(fields) + len(raw_fields)]):
+                self.raw[field].append(value)
+            self.subject_prefix.append(row[-2])
+            self.course_number.append(row[-1])
+
+        self.by_code = self.index(self.columns["course_code"])
+        self.by_year = self.index(self.columns["catalog_year"])
+        self.by_prefix = self.index(self.subject_prefix)
+        # few distinct values ('["Junior", "Senior"]', ...), so LIKE is checked once per value
+        self.by_class_levels = self.index(self.raw["class_levels"])
+
+        self.catalog_years = sorted(self.by_year, reverse=True)
+        self.prefixes = sorted(prefix for prefix in self.by_prefix if prefix)
+
+    @staticmethod
+    def index(values):
+        positions = defaultdict(list)
+        for i, value in enumerate(values):
+            positions[value].append(i)
+        return dict(positions)
+
+    def candidates(self, filters: CourseFilter):
+        """Row numbers allowed by the indexed filters, smallest set first; None if no indexed filter applies."""
+        hits = []
+        if filters.course_code:
+            hits.append(self.by_code.get(filters.course_code, []))
+        if filters.catalog_year:
+            hits.append(self.by_year.get(filters.catalog_year, []))
+        if filters.course_prefix:
+            hits.append(self.by_prefix.get(filters.course_prefix.strip().upper(), []))
+        if filters.class_level:
+            matches = like_matcher(filters.class_level)
+            hits.append([i for value, rows in self.by_class_levels.items() if matches(value) for i in rows])
+        if not hits:
+            return None
+
+        hits.sort(key=len)
+        result = set(hits[0])
+        for other in hits[1:]:
+            result.intersection_update(other)
+        return sorted(result)
+
+    def predicates(self, filters: CourseFilter):
+        """Checks for the filters without an index."""
+        checks = []
+        number = self.course_number
+        if filters.min_course_number is not None:
+            low = filters.min_course_number
+            checks.append(lambda i: number[i] is not None and number[i] >= low)
+        if filters.max_course_number is not None:
+            high = filters.max_course_number
+            checks.append(lambda i: number[i] is not None and number[i] <= high)
+
+        for flag, field in ((filters.has_prereqs, "prereqs"), (filters.has_coreqs, "coreqs")):
+            if flag is not None:
+                raw = self.raw[field]
+                checks.append(lambda i, raw=raw, flag=flag: bool(raw[i]) == flag)
+
+        for pattern, field in ((filters.prereq_contains, "prereqs"), (filters.coreq_contains, "coreqs")):
+            if pattern:
+                raw, matches = self.raw[field], like_matcher(pattern)
+                checks.append(lambda i, raw=raw, matches=matches: matches(raw[i]))
+
+        repeats = self.columns["repeats_allowed_for_credit"]
+        if filters.repeats_allowed is not None:
+            allowed = filters.repeats_allowed
+            checks.append(lambda i: (repeats[i] is not None and repeats[i] > 0) == allowed)
+        if filters.min_repeat is not None:
+            minimum = filters.min_repeat
+            checks.append(lambda i: repeats[i] is not None and repeats[i] >= minimum)
+        return checks
+
+    def filter(self, filters: CourseFilter):
+        rows = self.candidates(filters)
+        if rows is None:
+            rows = range(self.size)
+        checks = self.predicates(filters)
+        if checks:
+            rows = [i for i in rows if all(check(i) for check in checks)]
+        return list(rows)
+
+    def sort_values(self, field):
+        if field in self.raw:
+            return self.raw[field]
+        if field in self.columns:
+            return self.columns[field]
+        return None
+
+    def page(self, rows, after=None, limit=None):
+        """Keyset page over (catalog_year, course_code); returns (rows, has_more)."""
+        years, codes = self.columns["catalog_year"], self.columns["course_code"]
+        rows = sorted(rows, key=lambda i: (years[i], codes[i]))
+        if after is not None:
+            rows = [i for i in rows if (years[i], codes[i]) > after]
+        if limit is not None and len(rows) > limit:
+            return rows[:limit], True
+        return rows, False
+
+    def sort(self, rows, sort_by):
+        """Rows are in (catalog_year, course_code) order already, so the stable sort keeps ties in that order."""
+        values = self.sort_values(sort_by) if sort_by else None
+        if values is None:
+            return rows
+        return sorted(rows, key=lambda i: sql_sort_key(values[i]))
+
+    def records(self, rows, fields):
+        columns = [self.columns[field] for field in fields]
+        return [dict(zip(fields, (column[i] for column in columns))) for i in rows]
+
+
+def load_snapshot(db: Session, version):
+    columns = [column for column, _ in COURSE_COLUMNS.values()] + list(RAW_COLUMNS.values())
+    rows = db.query(*columns, CourseModel.subject_prefix, CourseModel.course_number) \
+        .order_by(CourseModel.catalog_year, CourseModel.course_code).all()
+    return CatalogSnapshot(version, rows)
+
+
+class SnapshotCache:
+    """Holds the current CatalogSnapshot and swaps in a new one when the database version changes."""
+    def __init__(self, version, session_factory):
+        self.version = version # callable returning the current database version
+        self.session_factory = session_factory
+        self.snapshot = None
+        self.lock = Lock()
+
+    def get(self) -> CatalogSnapshot:
+        version = self.version()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self.lock:
+            if self.snapshot is None or self.snapshot.version != version:
+                db = self.session_factory()
+                try:
+                    # readers keep using the old snapshot until this assignment
+                    self.snapshot = load_snapshot(db, version)
+                finally:
+                    db.close()
+            return self.snapshot
@@ -19,11 +19,11 @@ def test_all_courses():
     assert len(data) == 8388
 
 def test_prefix_query():
-    response = client.get("/courses?course_prefix=CS")
+    response = client.get("/courses?course_prefix=CSE")
     assert response.status_code == 200
     data = response.json()
     assert len(data) > 0
-    assert all(course["course_code"].startswith("CS") for course in data), "Not all courses have CS prefix"
+    assert all(course["course_code"].startswith("CSE") for course in data), "Not all courses have CSE prefix"
 
 def test_credit_parsing():
     # test course with single credit value
@@ -45,4 +45,359 @@ def test_prereq_contains():
     response = client.get("/courses/code/CSE 030")
     assert response.status_code == 200
     data = response.json()[0]
-    assert data["prereqs"][0] == "CSE 024"
\ No newline at end of file
+    assert data["prereqs"][0] == "CSE 024"
+
+def test_prefix_is_exact():
+    # CS is not a subject; it must not match CSE
+    response = client.get("/courses?course_prefix=CS")
+    assert response.status_code == 200
+    assert response.json() == []
+
+    cse = client.get("/courses?course_prefix=cse").json()
+    assert len(cse) > 0
+    assert all(course["course_code"].startswith("CSE ") for course in cse)
+
+def test_prefixes():
+    response = client.get("/prefixes")
+    assert response.status_code == 200
+    prefixes = response.json()
+    assert prefixes == sorted(prefixes)
+    assert "CSE" in prefixes and "MATH" in prefixes
+
+def test_course_number_range():
+    response = client.get("/courses?course_prefix=CSE&min_course_number=100&max_course_number=199&catalog_year=2025_2026")
+    data = response.json()
+    assert len(data) > 0
+    assert all(100 <= int(course["course_code"].split()[1][:3]) <= 199 for course in data)
+
+def test_required_by():
+    response = client.get("/courses/CSE 100/2025_2026/required_by")
+    assert response.status_code == 200
+    codes = [course["course_code"] for course in response.json()]
+    assert "CSE 150" in codes
+    assert codes == sorted(set(codes))
+    assert all(any("CSE 100" in group for group in course["prereqs"] or []) for course in response.json())
+
+    # exact codes only: CSE 03 is not a course
+    assert client.get("/courses/CSE 03/2025_2026/required_by").json() == []
+    assert client.get("/courses/CSE 100/2025_2026/required_by?kind=coreq").json() == []
+
+def test_prereq_ancestors_and_chain():
+    response = client.get("/courses/CSE 150/2025_2026/ancestors")
+    assert response.status_code == 200
+    ancestors = response.json()
+    assert {"CSE 100", "CSE 031", "EE 060", "MATH 024", "CSE 030"} <= set(ancestors)
+    assert "CSE 150" not in ancestors
+
+    descendants = client.get("/courses/CSE 100/2025_2026/descendants").json()
+    assert "CSE 150" in descendants
+
+    chain = client.get("/courses/CSE 150/2025_2026/chain/CSE 030").json()
+    assert chain[0] == "CSE 150" and chain[-1] == "CSE 030"
+    assert len(chain) == len(set(chain))
+
+    assert client.get("/courses/CSE 030/2025_2026/chain/CSE 150").status_code == 404
+    assert client.get("/courses/CSE 300/2025_2026/ancestors").status_code == 404
+    assert client.get("/courses/CSE 150/1999_2000/ancestors").status_code == 404
+
+def test_prereq_graph_cycles():
+    from prereq_graph import PrereqGraph
+
+    edges = [("C", "B"), ("B", "A"), ("D", "E"), ("E", "D"), ("F", "D"), ("F", "C")]
+    graph = PrereqGraph("test", ["A", "B", "C", "D", "E", "F"], edges)
+    assert graph.ancestors("F") == ["A", "B", "C", "D", "E"]
+    assert graph.ancestors("D") == ["D", "E"]
+    assert graph.descendants("A") == ["B", "C", "F"]
+    assert graph.cycles == [["D", "E"]]
+    assert graph.layers == [["A", "D", "E"], ["B"], ["C"], ["F"]]
+    assert graph.shortest_chain("F", "A") == ["F", "C", "B", "A"]
+    assert graph.shortest_chain("A", "F") is None
+
+def test_prereq_graph_summary():
+    response = client.get("/prereq_graph/2025_2026")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["courses"] >= 2235
+    assert sum(len(layer) for layer in data["layers"]) == data["courses"]
+
+def test_search():
+    response = client.get("/search?q=machine learning&catalog_year=2025_2026&limit=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] > 5
+    assert len(data["results"]) == 5
+    assert "CSE 176" in [result["course_code"] for result in data["results"]]
+    assert all(result["catalog_year"] == "2025_2026" for result in data["results"])
+    assert "<b>Machine</b>" in data["results"][0]["course_name"]
+    scores = [result["score"] for result in data["results"]]
+    assert scores == sorted(scores)
+
+    page_2 = client.get("/search?q=machine learning&catalog_year=2025_2026&limit=5&offset=5").json()
+    assert page_2["total"] == data["total"]
+    assert not {r["course_code"] for r in page_2["results"]} & {r["course_code"] for r in data["results"]}
+
+def test_search_prefix_and_syntax():
+    data = client.get('/search?q=data "structures&course_prefix=cse').json()
+    assert data["total"] > 0
+    assert all(result["course_code"].startswith("CSE ") for result in data["results"])
+    assert client.get("/search?q=").status_code == 422
+
+def test_courses_keyset_pages():
+    response = client.get("/courses?catalog_year=2025_2026&limit=1000")
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "2235"
+
+    codes = [course["course_code"] for course in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+    while cursor:
+        response = client.get("/courses", params={"catalog_year": "2025_2026", "limit": 1000, "after": cursor})
+        codes += [course["course_code"] for course in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert len(codes) == 2235
+    assert codes == sorted(codes)
+
+    last = client.get("/courses?limit=1&after=2025_2026|ZZZ 999")
+    assert last.json() == [] and "X-Next-Cursor" not in last.headers
+    assert client.get("/courses?limit=10&after=nocursor").status_code == 400
+    assert client.get("/courses?limit=0").status_code == 422
+
+def test_courses_fields_projection():
+    response = client.get("/courses?course_code=CSE 095&fields=course_code,credits")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 4
+    assert all(set(course) == {"course_code", "credits"} for course in data)
+    assert all(course["credits"] == [1, 5] or isinstance(course["credits"], list) for course in data)
+
+    page = client.get("/courses?fields=course_name&limit=2")
+    assert [set(course) for course in page.json()] == [{"course_name"}, {"course_name"}]
+    assert page.headers["X-Next-Cursor"].startswith("2022_2023|")
+    assert client.get("/courses?fields=course_code,bogus").status_code == 400
+
+SNAPSHOT_QUERIES = [
+    "",
+    "?catalog_year=2024_2025",
+    "?course_prefix=cse&has_prereqs=true",
+    "?course_prefix=MATH&min_course_number=20&max_course_number=99",
+    "?class_level=Junior&repeats_allowed=false",
+    "?prereq_contains=CSE 03&catalog_year=2025_2026",
+    "?prereq_contains=cse_0&has_coreqs=false",
+    "?min_repeat=2&sort_by=course_name",
+    "?has_prereqs=false&sort_by=credits",
+    "?course_code=CSE 095&fields=catalog_year,credits",
+    "?catalog_year=2023_2024&limit=50&after=2023_2024|CSE 100",
+    "?limit=100&after=2022_2023|ZOO 000&fields=course_code",
+]
+
+def test_snapshot_matches_database(monkeypatch):
+    import main as api_main
+    from database import SessionLocal, database_version
+    from snapshot import SnapshotCache
+
+    expected = [client.get("/courses" + query) for query in SNAPSHOT_QUERIES]
+    monkeypatch.setattr(api_main, "snapshots", SnapshotCache(database_version, SessionLocal))
+    for query, db_response in zip(SNAPSHOT_QUERIES, expected):
+        response = client.get("/courses" + query, headers={"Cache-Control": "no-cache"})
+        assert response.status_code == db_response.status_code == 200
+        assert response.json() == db_response.json(), query
+        for header in ("X-Total-Count", "X-Next-Cursor"):
+            assert response.headers.get(header) == db_response.headers.get(header), query
+
+    no_cache = {"Cache-Control": "no-cache"}
+    assert client.get("/courses/code/CSE 030", headers=no_cache).json()[0]["prereqs"][0] == "CSE 024"
+    assert client.get("/courses/CSE 095/2025_2026").json()["credits"] == [1, 5]
+    assert client.get("/courses/CSE 300/2025_2026").status_code == 404
+    assert "CSE" in client.get("/prefixes", headers=no_cache).json()
+    assert client.get("/catalog_years", headers=no_cache).json()[0] == "2025_2026"
+
+def test_snapshot_hot_swap():
+    from database import SessionLocal
+    from snapshot import SnapshotCache
+
+    version = [1]
+    snapshots = SnapshotCache(lambda: version[0], SessionLocal)
+    first = snapshots.get()
+    assert snapshots.get() is first
+    version[0] = 2
+    assert snapshots.get() is not first
+    assert snapshots.get().size == first.size == 8388
+
+
+def test_response_cache_etag():
+    url = "/courses?catalog_year=2022_2023&course_prefix=BIO"
+    first = client.get(url, headers={"Cache-Control": "no-cache"})
+    assert first.headers["X-Cache"] == "MISS"
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+
+    # same parameters in another order hit the same entry
+    second = client.get("/courses?course_prefix=BIO&catalog_year=2022_2023&course_code=")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.json() == first.json()
+
+    not_modified = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    identity = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] != first.headers["ETag"]
+    assert identity.json() == first.json()
+
+def test_response_cache_eviction_and_version():
+    from response_cache import CachedResponse, ResponseCache
+
+    version = [1]
+    cache = ResponseCache(lambda: version[0], max_bytes=10)
+    for key in "abc":
+        cache.put(key, CachedResponse({}, {"identity": (b"1234", '"x"')}), 1)
+    assert cache.get("a") is None and cache.get("c") is not None
+    assert cache.total_bytes == 8
+
+    version[0] = 2
+    assert cache.get("c") is None and cache.total_bytes == 0
+    # built before the reload: not kept under the new version
+    cache.put("d", CachedResponse({}, {"identity": (b"1234", '"x"')}), 1)
+    assert cache.get("d") is None and cache.total_bytes == 0
+
+def test_database_version_sees_wal_commits(tmp_path, monkeypatch):
+    import sqlite3
+    import database
+
+    db_path = tmp_path / "catalog.db"
+    monkeypatch.setattr(database, "DATABASE_PATH", str(db_path))
+    writer = sqlite3.connect(db_path)
+    writer.execute("PRAGMA journal_mode = WAL")
+    writer.execute("CREATE TABLE courses (course_code TEXT)")
+    writer.commit()
+    reader = sqlite3.connect(db_path) # an open connection holds off the checkpoint
+    reader.execute("SELECT COUNT(*) FROM courses").fetchone()
+
+    before = database.database_version()
+    main_file = db_path.stat()
+    writer.execute("INSERT INTO courses VALUES ('CSE 030')")
+    writer.commit()
+    assert db_path.stat().st_size == main_file.st_size
+    assert reader.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 1
+    assert database.database_version() != before
+    reader.close()
+    writer.close()
+
+def test_async_engine_matches_sync():
+    import asyncio
+    import pytest
+    pytest.importorskip("aiosqlite")
+    from config import ASYNC_DATABASE_URL
+    from database import SessionLocal, make_async_engine
+    from main import course_code_statement, courses_statement
+    from schemas import CourseFilter
+
+    filters = CourseFilter(course_prefix="CSE", has_prereqs=True, limit=25, after="2024_2025|CSE 100")
+    fields = ["course_code", "prereqs"]
+    query, count = courses_statement(filters, fields)
+
+    async def run():
+        async_engine = make_async_engine(ASYNC_DATABASE_URL)
+        try:
+            async with async_engine.connect() as connection:
+                return ((await connection.execute(count)).scalar(),
+                        (await connection.execute(query)).all(),
+                        (await connection.execute(course_code_statement("CSE 095"))).all())
+        finally:
+            await async_engine.dispose()
+
+    with SessionLocal() as db:
+        expected = (db.execute(count).scalar(), db.execute(query).all(), db.execute(course_code_statement("CSE 095")).all())
+    assert asyncio.run(run()) == expected
+    assert len(expected[1]) == 26 and len(expected[2]) == 4
+
+def test_connections_are_read_only():
+    import pytest
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from database import SessionLocal
+
+    with SessionLocal() as db, pytest.raises(OperationalError):
+        db.execute(text("DELETE FROM courses"))
+
+def test_courses_batch():
+    keys = [
+        {"course_code": "CSE 030", "catalog_year": "2025_2026"},
+        {"course_code": "CSE 095"},
+        {"course_code": "CSE 300", "catalog_year": "2025_2026"},
+        {"course_code": "CSE 030", "catalog_year": "1999_2000"},
+        {"course_code": "CSE 030", "catalog_year": "2025_2026"},
+    ]
+    response = client.post("/courses/batch", json={"courses": keys})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [(r["course_code"], r["catalog_year"]) for r in data["results"]] == [(k["course_code"], k.get("catalog_year")) for k in keys]
+    assert [r["found"] for r in data["results"]] == [True, True, False, False, True]
+    single = data["results"][0]["courses"]
+    assert single == [client.get("/courses/CSE 030/2025_2026").json()]
+    assert data["results"][1]["courses"] == client.get("/courses/code/CSE 095").json()
+    assert data["not_found"] == [keys[2], keys[3]]
+
+    assert client.post("/courses/batch", json={"courses": []}).status_code == 422
+
+def test_catalog_diff():
+    response = client.get("/diff?from_year=2024_2025&to_year=2025_2026")
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["added"], data["dropped"], data["changed"]) == (164, 78, 206)
+    assert len(data["courses"]) == 164 + 78 + 206
+
+    diff = client.get("/diff?from_year=2024_2025&to_year=2025_2026&course_code=AE 172").json()["courses"]
+    assert [course["change"] for course in diff] == ["changed"]
+    prereqs = diff[0]["fields"]["prereqs"]
+    assert prereqs["old"] == client.get("/courses/AE 172/2024_2025").json()["prereqs"]
+    assert prereqs["new"] == client.get("/courses/AE 172/2025_2026").json()["prereqs"]
+
+    # read the other way round, added and dropped swap and old/new trade places
+    back = client.get("/diff?from_year=2025_2026&to_year=2024_2025&course_prefix=cse").json()
+    forward = client.get("/diff?from_year=2024_2025&to_year=2025_2026&course_prefix=CSE").json()
+    assert (back["added"], back["dropped"]) == (forward["dropped"], forward["added"])
+    assert all(course["course_code"].startswith("CSE ") for course in back["courses"])
+
+    credits = client.get("/diff?from_year=2022_2023&to_year=2025_2026&field=credits").json()
+    assert credits["added"] == credits["dropped"] == 0
+    assert all("credits" in course["fields"] for course in credits["courses"])
+
+    assert client.get("/diff?from_year=1999_2000&to_year=2025_2026").status_code == 404
+    assert client.get("/diff?from_year=2024_2025&to_year=2025_2026&field=bogus").status_code == 400
+
+def metric(text, name, **labels):
+    """Value of one sample of /metrics, or None."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{{wanted}}} "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+def test_metrics():
+    before = client.get("/metrics").text
+    route = {"method": "GET", "route": "/courses/code/{course_code}", "status": "200"}
+    count_before = metric(before, "api_request_duration_seconds_count", **route) or 0
+
+    for code in ("CSE 030", "CSE 031", "CSE 030"):
+        assert client.get(f"/courses/code/{code}", headers={"Accept-Encoding": "identity"}).status_code == 200
+    assert client.get("/courses/code/CSE 300").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE api_request_duration_seconds histogram" in text
+
+    # labelled with the route template, not the path; cache hits included
+    assert metric(text, "api_request_duration_seconds_count", **route) == count_before + 3
+    assert metric(text, "api_request_duration_seconds_bucket", **route, le="+Inf") == count_before + 3
+    assert metric(text, "api_response_size_bytes_sum", **route) > 0
+    # the 404 ran its lookup query; /metrics itself is not recorded
+    not_found = {**route, "status": "404"}
+    assert metric(text, "api_request_duration_seconds_count", **not_found) >= 1
+    assert metric(text, "api_db_queries_total", **not_found) >= 1
+    assert metric(text, "api_db_query_seconds_total", **not_found) > 0
+    assert 'route="/metrics"' not in text
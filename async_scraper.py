@@ -0,0 +1,221 @@
+from bs4 import BeautifulSoup
+from collections import deque
+from urllib.parse import urlparse
+import asyncio
+import random
+import threading
+import time
+import httpx
+from http_cache import AsyncCachingTransport
+from http_scraper import HttpScraper, USER_AGENT
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second, holding at most `capacity`.
+    Reservations are made under a thread lock so one bucket can be shared by
+    scrapers running their own event loops in different threads.
+    """
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token and returns how many seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HostRateLimiter:
+    """One token bucket per host."""
+    def __init__(self, rate=10.0, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    async def acquire(self, url):
+        await self.bucket(url).acquire()
+
+
+class AsyncHttpScraper(HttpScraper):
+    """
+    HttpScraper that fetches every course detail of a catalog concurrently.
+    Requests are capped by `concurrency`, throttled per host by `rate_limiter`
+    and retried with jittered exponential backoff. Results are consumed in
+    listing order, so the duplicate handling in add_course behaves exactly as
+    in the sequential scrapers. Fetches run at most fetch_window() courses
+    ahead of the one being consumed, so responses do not pile up in memory.
+    """
+    def __init__(self, website_url, logger=None, concurrency=32, rate_limiter=None,
+                 retries=3, backoff=0.5, transport=None, cache=None, cache_ttl=None, parser="bs4",
+                 parse_workers=0, parse_executor=None, parse_ordered=True):
+        super().__init__(website_url, logger=logger, cache=cache, cache_ttl=cache_ttl, parser=parser,
+                         parse_workers=parse_workers, parse_executor=parse_executor, parse_ordered=parse_ordered)
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter()
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+
+    def create_client(self):
+        # a fresh AsyncClient is opened per scrape, see create_async_client
+        return None
+
+    def close(self):
+        pass
+
+    def create_async_client(self):
+        transport = self.transport
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                ),
+            )
+        if self.cache is not None:
+            transport = AsyncCachingTransport(self.cache, ttl=self.cache_ttl, transport=transport)
+
+        return httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=30.0,
+            follow_redirects=True,
+            transport=transport,
+        )
+
+    def backoff_delay(self, attempt):
+        # "full jitter": uniform over [0, backoff * 2^attempt]
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def fetch_async(self, client, semaphore, url, step="course_fetch"):
+        for attempt in range(self.retries + 1):
+            await self.rate_limiter.acquire(url)
+            try:
+                async with semaphore:
+                    # timed once a slot is free, so queueing behind the semaphore is not counted
+                    with self.timer.step(step):
+                        response = await client.get(url)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.text
+                self.timer.count("retries")
+                self.log(f"  -> HTTP {response.status_code} for {url}, retrying")
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                self.timer.count("retries")
+                self.log(f"  -> {type(e).__name__} for {url}, retrying")
+
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+    async def fetch_page(self, client, semaphore, page):
+        """Course links of a listing page; None if it is already completed or failed to load."""
+        if self.page_done(page):
+            self.log(f"\n=== Skipping completed page {page} ===")
+            return None
+
+        try:
+            html = await self.fetch_async(client, semaphore, self.page_url(page), step="page_fetch")
+            with self.timer.step("listing_parse"):
+                page_soup = BeautifulSoup(html, "html.parser")
+            with self.timer.step("row_links"):
+                return self.course_links(page_soup)
+        except httpx.HTTPError as e:
+            self.failed_pages.append(page)
+            self.timer.count("page_errors")
+            self.log(f"HTTP error for page {page}: {type(e).__name__} - {e}")
+            return None
+
+    def fetch_window(self):
+        """How many course fetches may be started ahead of the course being consumed."""
+        if self.pipeline is not None:
+            # what the parse stage holds before submit blocks; more responses would only wait in memory
+            return self.pipeline.capacity
+        return 2 * self.concurrency
+
+    async def collect(self, course_name, page, task):
+        try:
+            html = task.result()
+            if self.pipeline is not None:
+                # submit blocks while the parse workers are saturated; wait in a thread so fetches go on
+                await asyncio.to_thread(self.handle_course_html, course_name, html, page)
+            else:
+                self.handle_course_html(course_name, html, page)
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.TimeoutException):
+                self.timer.count("timeouts")
+            self.course_failed(page, course_name, f"HTTP error for {course_name}: {type(e).__name__} - {e}")
+        except Exception as e:
+            self.course_failed(page, course_name, f"Unexpected error for {course_name}: {type(e).__name__} - {e}")
+
+    async def scrape_async(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with self.create_async_client() as client:
+            first_page = await self.fetch_async(client, semaphore, self.website_url, step="page_fetch")
+            with self.timer.step("listing_parse"):
+                self.soup = BeautifulSoup(first_page, "html.parser")
+            total_pages = self.num_pages()
+
+            pages = [None if self.page_done(1) else self.course_links(self.soup)]
+            pages += await asyncio.gather(
+                *(self.fetch_page(client, semaphore, page) for page in range(2, total_pages + 1))
+            )
+
+            courses = []
+            for page, links in enumerate(pages, start=1):
+                if links is None:
+                    continue
+
+                self.log(f"\n=== Queued page {page}/{total_pages}: {len(links)} courses ===")
+                for course_name, url in links:
+                    if self.row_done(page, course_name):
+                        self.log(f"Already completed: {course_name}")
+                    elif url is None:
+                        self.external_link(page, course_name)
+                    else:
+                        courses.append((course_name, page, url))
+                self.pages_scraped.append(page)
+
+            window = self.fetch_window()
+            queued = iter(courses)
+            pending = deque()
+            while True:
+                while len(pending) < window and (course := next(queued, None)) is not None:
+                    course_name, page, url = course
+                    task = asyncio.create_task(self.fetch_async(client, semaphore, url))
+                    pending.append((course_name, page, task))
+                if not pending:
+                    break
+
+                course_name, page, task = pending.popleft()
+                await asyncio.wait([task])
+                self.log(f"Fetched: {course_name}")
+                await self.collect(course_name, page, task)
+
+    def scrape_pages(self):
+        asyncio.run(self.scrape_async())
@@ -0,0 +1,198 @@
+"""
+Load test of every read endpoint of the API against the bundled course_catalog.db.
+
+    python benchmarks/bench_api_endpoints.py [--concurrency 16] [--requests 300] [--mode sync]
+                                             [--scenario courses/prefix ...] [--cache] [--output results.json]
+
+The API is started with uvicorn (response cache off unless --cache) and every
+scenario is driven at a fixed concurrency: /courses with each CourseFilter
+field on its own and in the combinations clients use, paging and field
+projection, /prefixes, /catalog_years, and the two course code lookups.
+Parameters are drawn from the database with a fixed seed, so runs are
+comparable. Reported per scenario: requests/second, p50/p95/p99 latency and
+mean response size, plus the SQL statements per request the server recorded
+at /metrics. --output writes the same numbers as JSON.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sqlite3
+import time
+from urllib.parse import urlencode
+import httpx
+from benchmarks.bench_api_load import free_port, percentile, start_server
+from benchmarks.corpus import DB_PATH
+
+MODES = {
+    "sync": {"DATABASE_ASYNC": "0"},
+    "async": {"DATABASE_ASYNC": "1"},
+    "snapshot": {"CATALOG_SNAPSHOT": "1"},
+}
+
+
+def catalog_values(seed=0, count=50):
+    """Parameter values found in the data, sampled with a fixed seed."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        def column(sql):
+            return [value for value, in conn.execute(sql).fetchall()]
+
+        rng = random.Random(seed)
+        rows = conn.execute("SELECT course_code, catalog_year, subject_prefix FROM courses").fetchall()
+        return {
+            "rows": rng.sample(rows, count),
+            "years": column("SELECT DISTINCT catalog_year FROM courses ORDER BY catalog_year"),
+            "prefixes": column("SELECT DISTINCT subject_prefix FROM courses ORDER BY subject_prefix"),
+            "prereqs": rng.sample(column("SELECT DISTINCT value FROM courses, json_each(courses.prereqs)"), count),
+            "class_levels": column("SELECT DISTINCT value FROM courses, json_each(courses.class_levels)"),
+        }
+    finally:
+        conn.close()
+
+
+def courses_url(**params):
+    return "/courses?" + urlencode(params)
+
+
+def scenarios(values):
+    """Scenario name -> the URLs it cycles through."""
+    rows, years, prefixes = values["rows"], values["years"], values["prefixes"]
+    return {
+        "courses/all": ["/courses"],
+        "courses/course_code": [courses_url(course_code=code) for code, _, _ in rows],
+        "courses/course_prefix": [courses_url(course_prefix=prefix) for prefix in prefixes],
+        "courses/catalog_year": [courses_url(catalog_year=year) for year in years],
+        "courses/prefix+year": [courses_url(course_prefix=prefix, catalog_year=year) for _, year, prefix in rows],
+        "courses/number_range": [courses_url(min_course_number=low, max_course_number=low + 99, catalog_year=year)
+                                 for low in (1, 100, 200) for year in years],
+        "courses/has_prereqs": [courses_url(has_prereqs=flag, catalog_year=year)
+                                for flag in ("true", "false") for year in years],
+        "courses/has_coreqs": [courses_url(has_coreqs=flag, catalog_year=year)
+                               for flag in ("true", "false") for year in years],
+        "courses/prereq_contains": [courses_url(prereq_contains=code) for code in values["prereqs"]],
+        "courses/coreq_contains": [courses_url(coreq_contains=code) for code in values["prereqs"]],
+        "courses/class_level": [courses_url(class_level=level, catalog_year=year)
+                                for level in values["class_levels"] for year in years],
+        "courses/repeats_allowed": [courses_url(repeats_allowed=flag, catalog_year=year)
+                                    for flag in ("true", "false") for year in years],
+        "courses/min_repeat": [courses_url(min_repeat=n, catalog_year=year) for n in (1, 2, 3) for year in years],
+        "courses/prefix+range+prereqs": [courses_url(course_prefix=prefix, min_course_number=100, has_prereqs="true",
+                                                     catalog_year=year) for _, year, prefix in rows],
+        "courses/sort_by": [courses_url(course_prefix=prefix, sort_by="course_name") for prefix in prefixes],
+        "courses/page": [courses_url(limit=100, after=f"{year}|{code}") for code, year, _ in rows],
+        "courses/fields": [courses_url(catalog_year=year, fields="course_code,course_name") for year in years],
+        "prefixes": ["/prefixes"],
+        "catalog_years": ["/catalog_years"],
+        "courses/code": [f"/courses/code/{code}" for code, _, _ in rows],
+        "courses/code/year": [f"/courses/{code}/{year}" for code, year, _ in rows],
+    }
+
+
+async def drive(base_url, urls, concurrency, total):
+    """Keeps concurrency clients busy until total requests are done; returns (req/s, latencies, bytes)."""
+    latencies, sizes = [], []
+    queue = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            for i in queue:
+                start = time.perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                sizes.append(len(response.content))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return total / elapsed, latencies, sizes
+
+
+def queries_per_request(metrics_text):
+    """Route template -> SQL statements per successful request, from /metrics."""
+    counts, queries = {}, {}
+    pattern = re.compile(r'^(api_request_duration_seconds_count|api_db_queries_total)'
+                         r'\{method="GET",route="([^"]+)",status="200"\} (\S+)$')
+    for line in metrics_text.splitlines():
+        match = pattern.match(line)
+        if match:
+            name, route, value = match.groups()
+            (counts if name.startswith("api_request") else queries)[route] = float(value)
+    return {route: queries.get(route, 0) / count for route, count in counts.items() if count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--mode", choices=list(MODES), default="sync", help="how the API serves reads")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios")
+    parser.add_argument("--cache", action="store_true", help="keep the HTTP response cache on")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    all_scenarios = scenarios(catalog_values())
+    selected = args.scenario or list(all_scenarios)
+    unknown = [name for name in selected if name not in all_scenarios]
+    if unknown:
+        parser.error(f"unknown scenarios {unknown}, expected some of {list(all_scenarios)}")
+
+    env = dict(MODES[args.mode])
+    if args.cache:
+        env["RESPONSE_CACHE_MB"] = "64"
+    port = free_port()
+    server = start_server(port, env)
+    results = {}
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"{args.mode} mode, {args.concurrency} clients, {args.requests} requests per scenario"
+              f"{', response cache on' if args.cache else ''}\n")
+        print(f"{'scenario':<30} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean KB':>9}")
+        for name in selected:
+            urls = all_scenarios[name]
+            asyncio.run(drive(base_url, urls, min(args.concurrency, len(urls)), len(urls)))  # warm up
+            throughput, latencies, sizes = asyncio.run(drive(base_url, urls, args.concurrency, args.requests))
+            results[name] = {
+                "requests_per_sec": throughput,
+                "p50_ms": percentile(latencies, 0.5) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "mean_bytes": sum(sizes) / len(sizes),
+            }
+            r = results[name]
+            print(f"{name:<30} {r['requests_per_sec']:>8,.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                  f"{r['p99_ms']:>8.1f} {r['mean_bytes'] / 1024:>9.1f}")
+
+        per_route = queries_per_request(httpx.get(f"{base_url}/metrics").text)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("\nSQL statements per request (server side, /metrics):")
+    for route, queries in sorted(per_route.items()):
+        print(f"  {route:<45} {queries:.2f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "mode": args.mode,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "response_cache": args.cache,
+            "scenarios": results,
+            "queries_per_request": per_route,
+        }, indent=2))
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+API throughput under concurrent load: sync endpoints on the threadpool vs DATABASE_ASYNC.
+
+    python benchmarks/bench_api_load.py [--requests N] [--clients 1 16 256]
+
+The API is started with uvicorn once per mode (sync, and async on aiosqlite)
+with the response cache turned off, so every request reaches the database.
+Each run keeps the given number of clients busy with a fixed mix of course
+lookups (code + year, code across years, prefix + year) drawn from the data,
+and reports requests/second and latency percentiles.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import time
+import httpx
+from benchmarks.corpus import DB_PATH
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+MODES = {
+    "sync": {"DATABASE_ASYNC": "0"},
+    "async": {"DATABASE_ASYNC": "1"},
+}
+
+
+def request_mix(count):
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute("SELECT course_code, catalog_year, subject_prefix FROM courses").fetchall()
+    finally:
+        conn.close()
+    rng = random.Random(0)
+    urls = []
+    for course_code, catalog_year, prefix in rng.sample(rows, count):
+        urls.append(f"/courses/{course_code}/{catalog_year}")
+        urls.append(f"/courses/code/{course_code}")
+        urls.append(f"/courses?course_prefix={prefix}&catalog_year={catalog_year}")
+    return urls
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, env):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+         "--timeout-keep-alive", "60"],
+        cwd=API_DIR, env={**os.environ, "RESPONSE_CACHE_MB": "0", **env},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("API did not start")
+
+
+async def load(base_url, urls, clients, total):
+    latencies = []
+    queue = iter(range(total))
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            for i in queue:
+                start = time.perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return total / elapsed, latencies
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000, help="requests per run")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 16, 256], help="concurrent clients")
+    parser.add_argument("--mode", choices=list(MODES), action="append", help="run only these modes")
+    args = parser.parse_args()
+
+    urls = request_mix(200)
+    for mode in args.mode or list(MODES):
+        port = free_port()
+        server = start_server(port, MODES[mode])
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(load(base_url, urls, 16, len(urls)))  # warm up connections and caches
+            print(f"{mode}:")
+            for clients in args.clients:
+                throughput, latencies = asyncio.run(load(base_url, urls, clients, args.requests))
+                print(f"  {clients:>4} clients {throughput:>9,.0f} req/s   p50 {percentile(latencies, 0.5) * 1000:7.1f} ms"
+                      f"   p99 {percentile(latencies, 0.99) * 1000:7.1f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Full-table GET /courses: ORM + pydantic response path vs the Core/orjson path.
+
+    python benchmarks/bench_courses.py [--repeat N]
+
+The ORM path is the endpoint as it was: CourseModel objects, the JSON columns
+decoded through the hybrid properties during Course validation, then
+jsonable_encoder and json.dumps, as FastAPI does for a response_model. The
+fast path is what get_courses does now. Both are timed in-process from query
+to response bytes, checked for identical output, and the real endpoint is
+also timed end to end through the TestClient.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+import argparse
+import json
+import statistics
+import time
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from database import SessionLocal
+from main import app
+from models import COURSE_COLUMNS, CourseModel
+from schemas import Course
+from serialization import course_dicts, dumps
+
+courses_adapter = TypeAdapter(List[Course])
+
+
+def orm_response(db):
+    courses = db.query(CourseModel).order_by(CourseModel.course_code).all()
+    validated = courses_adapter.validate_python(courses, from_attributes=True)
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_response(db):
+    fields = list(COURSE_COLUMNS)
+    rows = db.query(*[column for column, _ in COURSE_COLUMNS.values()]).order_by(CourseModel.course_code).all()
+    return dumps(course_dicts(rows, fields, [decode for _, decode in COURSE_COLUMNS.values()]))
+
+
+def endpoint_response(client):
+    return client.get("/courses").content
+
+
+def measure(run, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = run()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return body, latencies
+
+
+def report(name, latencies, rows):
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {name:<14} {rows / p50:>10,.0f} rows/s   p50 {p50 * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30, help="full-table responses per path")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    client = TestClient(app)
+    try:
+        orm_body, orm_latencies = measure(lambda: orm_response(db), args.repeat)
+        fast_body, fast_latencies = measure(lambda: fast_response(db), args.repeat)
+        _, endpoint_latencies = measure(lambda: endpoint_response(client), args.repeat)
+    finally:
+        db.close()
+
+    rows = len(json.loads(orm_body))
+    identical = json.loads(orm_body) == json.loads(fast_body)
+    print(f"{rows} courses, {len(fast_body) / 1e6:.1f} MB, output {'identical' if identical else 'DIFFERS'}")
+    report("orm+pydantic", orm_latencies, rows)
+    report("core+orjson", fast_latencies, rows)
+    report("GET /courses", endpoint_latencies, rows)
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Parity and throughput benchmark for the parse_html backends.
+
+    python benchmarks/bench_parse.py [--limit N] [--repeat N]
+
+Every fragment of the corpus is parsed by each backend; the run fails if any
+backend's output differs from the BeautifulSoup path.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import time
+from scraper import Scraper, PARSERS
+from benchmarks.corpus import load_corpus
+
+
+def parse_all(parser, fragments):
+    scraper = Scraper(None, "", parser=parser)
+    results = []
+    for fragment in fragments:
+        try:
+            results.append(scraper.parse_html(fragment))
+        except Exception as e:
+            results.append(type(e).__name__)
+    return results
+
+
+def check_parity(fragments):
+    expected = parse_all("bs4", fragments)
+    mismatches = {}
+    for parser in PARSERS:
+        actual = parse_all(parser, fragments)
+        mismatches[parser] = [i for i, (a, b) in enumerate(zip(expected, actual)) if a != b]
+    return mismatches
+
+
+def throughput(parser, fragments, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse_all(parser, fragments)
+        best = min(best, time.perf_counter() - start)
+    return len(fragments) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N database rows")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per backend, best one is reported")
+    args = parser.parse_args()
+
+    fragments = load_corpus(args.limit)
+    print(f"Corpus: {len(fragments)} course fragments")
+
+    mismatches = check_parity(fragments)
+    for name, indexes in mismatches.items():
+        status = "OK" if not indexes else f"{len(indexes)} mismatches (first: fragment {indexes[0]})"
+        print(f"  parity {name:>5}: {status}")
+
+    rates = {name: throughput(name, fragments, args.repeat) for name in PARSERS}
+    for name, rate in rates.items():
+        print(f"  {name:>5}: {rate:10.0f} fragments/sec ({rate / rates['bs4']:.1f}x)")
+
+    if any(mismatches.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+End-to-end scraper benchmark against a recorded catalog served locally, no network needed.
+
+    python benchmarks/bench_scraper.py [--engine http async] [--parser bs4 lxml] [--limit N]
+                                       [--repeat N] [--output results.json] [--compare old.json]
+
+A catalog year of course_catalog.db is written out as Acalog listing pages and
+course fragments (benchmarks/corpus.py) and served by the test stub server.
+Every engine/parser combination scrapes it in a fresh process, so peak RSS is
+that run's own. Reported per combination: courses/sec (median of --repeat
+runs), peak RSS and per-phase latency (page fetch, listing parse, course
+fetch, row links, parse, dedup, save) with histograms.
+
+Results are written as JSON, by default to benchmarks/results/scraper-{commit}.json.
+--compare reads an earlier results file and exits 1 if any combination got
+more than --threshold slower. The Selenium engine needs Chrome and a live
+browser, so it is not benchmarked here; its parse, dedup and save phases are
+the ones measured for the HTTP engines.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from benchmarks.corpus import write_catalog
+from test.stub_server import CatalogStubServer
+from http_scraper import HttpScraper
+from async_scraper import AsyncHttpScraper, HostRateLimiter
+from scraper import PARSERS
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ENGINES = ("http", "async")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def create_scraper(engine, parser, url, concurrency):
+    logger = logging.getLogger("bench_scraper")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    if engine == "async":
+        # no rate limit: the stub server is local
+        return AsyncHttpScraper(url, logger=logger, parser=parser, concurrency=concurrency,
+                                rate_limiter=HostRateLimiter(rate=1e9, burst=1_000_000))
+    return HttpScraper(url, logger=logger, parser=parser)
+
+
+def scrape_once(engine, parser, url, concurrency):
+    """Runs in a child process; returns the measurements of one scrape."""
+    scraper = create_scraper(engine, parser, url, concurrency)
+    try:
+        start = time.perf_counter()
+        scraper.scrape()
+        seconds = time.perf_counter() - start
+    finally:
+        scraper.close()
+
+    return {
+        "courses": scraper.course_count,
+        "external_links": len(scraper.external_link_classes),
+        "failed": len(scraper.failed_courses) + len(scraper.failed_pages),
+        "seconds": seconds,
+        "courses_per_sec": scraper.course_count / seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "phases": scraper.timer.summary(),
+        "histograms": scraper.timer.histograms(),
+        "events": dict(scraper.timer.counts),
+    }
+
+
+def benchmark(engine, parser, url, concurrency, repeat):
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with context.Pool(1) as pool:
+            runs.append(pool.apply(scrape_once, (engine, parser, url, concurrency)))
+
+    median = sorted(runs, key=lambda run: run["seconds"])[len(runs) // 2]
+    return {
+        "engine": engine,
+        "parser": parser,
+        **median,
+        "courses_per_sec": statistics.median(run["courses_per_sec"] for run in runs),
+        "peak_rss_mb": max((run["peak_rss_mb"] for run in runs), default=None),
+        "runs_seconds": [run["seconds"] for run in runs],
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def print_result(result):
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+    print(f"\n{result['engine']}/{result['parser']}: {result['courses']} courses in {result['seconds']:.2f} s, "
+          f"{result['courses_per_sec']:,.0f} courses/sec, peak RSS {rss}")
+    print(f"  {'phase':<14} {'count':>6} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for phase, stats in result["phases"].items():
+        print(f"  {phase:<14} {stats['count']:>6} {stats['total']:>8.2f} {stats['p50'] * 1000:>8.2f} "
+              f"{stats['p95'] * 1000:>8.2f} {stats['max'] * 1000:>8.2f}")
+
+
+def compare(results, baseline_path, threshold):
+    """Prints the change in courses/sec against an earlier results file; returns False on a regression."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    before = {(run["engine"], run["parser"]): run for run in baseline["results"]}
+
+    print(f"\nCompared with {baseline_path} ({baseline.get('commit')}):")
+    ok = True
+    for result in results:
+        old = before.get((result["engine"], result["parser"]))
+        if old is None:
+            continue
+        change = result["courses_per_sec"] / old["courses_per_sec"] - 1
+        regressed = change < -threshold
+        ok = ok and not regressed
+        print(f"  {result['engine']}/{result['parser']}: {old['courses_per_sec']:,.0f} -> "
+              f"{result['courses_per_sec']:,.0f} courses/sec ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engine", choices=ENGINES, nargs="+", default=list(ENGINES))
+    parser.add_argument("--parser", choices=PARSERS, nargs="+", default=list(PARSERS))
+    parser.add_argument("--catalog-year", default="2025_2026", help="catalog year of course_catalog.db to serve")
+    parser.add_argument("--limit", type=int, default=None, help="only serve the first N courses")
+    parser.add_argument("--page-size", type=int, default=100, help="courses per listing page")
+    parser.add_argument("--concurrency", type=int, default=32, help="async engine in-flight requests")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per combination, the median is reported")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/scraper-{commit}.json)")
+    parser.add_argument("--compare", help="earlier results file to compare courses/sec against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown against --compare that counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    with tempfile.TemporaryDirectory() as fixtures_dir:
+        total_pages, total_courses = write_catalog(fixtures_dir, args.catalog_year, page_size=args.page_size,
+                                                   limit=args.limit)
+        print(f"Corpus: {args.catalog_year}, {total_courses} courses on {total_pages} listing pages")
+
+        results = []
+        with CatalogStubServer(fixtures_dir) as server:
+            for engine in args.engine:
+                for parser_name in args.parser:
+                    result = benchmark(engine, parser_name, server.catalog_url, args.concurrency, args.repeat)
+                    print_result(result)
+                    results.append(result)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"scraper-{commit or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {"catalog_year": args.catalog_year, "courses": total_courses, "pages": total_pages},
+        "repeat": args.repeat,
+        "results": results,
+    }, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Load time and query latency of the SQLite catalog, before and after the bulk loader.
+
+    python benchmarks/bench_sqlite.py [--repeat N]
+
+The rows of course_catalog.db are loaded into temporary databases three ways:
+pandas to_sql (what utils/export_to_sqlite.py did: no key, no indexes), and
+catalog_loader.load_courses with and without WITHOUT ROWID. The API's queries
+are then timed against each database.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import pandas as pd
+from catalog_db import COLUMNS, connect
+from catalog_loader import load_courses, rows_from_db
+from benchmarks.corpus import DB_PATH
+
+
+def load_to_sql(db_path, rows):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    conn = connect(db_path)
+    try:
+        df.to_sql("courses", conn, if_exists="replace", index=False)
+    finally:
+        conn.close()
+
+
+LOADERS = {
+    "to_sql": load_to_sql,
+    "loader": lambda db_path, rows: load_courses(db_path, rows),
+    "loader_without_rowid": lambda db_path, rows: load_courses(db_path, rows, without_rowid=True),
+}
+
+
+def api_queries(rows, subject_index):
+    """
+    (name, sql, params) for the lookups the API runs, with parameters drawn from
+    the data. On a to_sql table a prefix is matched with LIKE and required
+    courses with LIKE over the prereqs JSON; a loaded one uses the
+    subject_prefix column and the course_requirements table.
+    """
+    rng = random.Random(0)
+    sample = rng.sample(rows, 50)
+    years = sorted({row[-1] for row in rows})
+    return [
+        ("code, all years", "SELECT * FROM courses WHERE course_code = ? ORDER BY catalog_year DESC",
+         [(row[0],) for row in sample]),
+        ("code + year", "SELECT * FROM courses WHERE course_code = ? AND catalog_year = ?",
+         [(row[0], row[-1]) for row in sample]),
+        ("prefix", "SELECT * FROM courses WHERE subject_prefix = ? ORDER BY course_code" if subject_index else
+         "SELECT * FROM courses WHERE course_code LIKE ? ORDER BY course_code",
+         [(row[0].split()[0] if subject_index else f"{row[0].split()[0]}%",) for row in sample]),
+        ("prefixes", "SELECT DISTINCT subject_prefix FROM courses ORDER BY subject_prefix" if subject_index else
+         "SELECT DISTINCT course_code FROM courses", [()]),
+        ("year filter", "SELECT * FROM courses WHERE catalog_year = ? ORDER BY course_code",
+         [(year,) for year in years]),
+        ("required by", "SELECT * FROM courses WHERE catalog_year = ? AND course_code IN "
+         "(SELECT course_code FROM course_requirements WHERE required_code = ? AND catalog_year = ?)"
+         if subject_index else "SELECT * FROM courses WHERE catalog_year = ? AND prereqs LIKE ?",
+         [(row[-1], row[0], row[-1]) if subject_index else (row[-1], f"%{row[0]}%") for row in sample]),
+        ("distinct years", "SELECT DISTINCT catalog_year FROM courses ORDER BY catalog_year DESC", [()]),
+    ]
+
+
+def time_queries(db_path, queries, repeat):
+    conn = connect(db_path)
+    results = {}
+    try:
+        for name, sql, param_sets in queries:
+            latencies = []
+            for _ in range(repeat):
+                for params in param_sets:
+                    start = time.perf_counter()
+                    conn.execute(sql, params).fetchall()
+                    latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            results[name] = (statistics.median(latencies), latencies[int(len(latencies) * 0.95)])
+    finally:
+        conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="passes over each query's parameter set")
+    args = parser.parse_args()
+
+    rows = rows_from_db(DB_PATH)
+    print(f"{len(rows)} rows from {DB_PATH}\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for name, load in LOADERS.items():
+            db_path = f"{tmp}/{name}.db"
+            start = time.perf_counter()
+            load(db_path, rows)
+            load_time = time.perf_counter() - start
+            print(f"load {name:>21}: {load_time * 1000:8.1f} ms")
+            timings[name] = time_queries(db_path, api_queries(rows, name != "to_sql"), args.repeat)
+
+    print(f"\n{'query':<16}" + "".join(f"{name:>24}" for name in LOADERS))
+    print(f"{'':<16}" + "".join(f"{'median / p95 (us)':>24}" for _ in LOADERS))
+    for query_name in timings["to_sql"]:
+        cells = []
+        for name in LOADERS:
+            median, p95 = timings[name][query_name]
+            cells.append(f"{median * 1e6:>11.1f} / {p95 * 1e6:<10.1f}")
+        print(f"{query_name:<16}" + "".join(f"{cell:>24}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
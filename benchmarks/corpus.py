@@ -0,0 +1,142 @@
+"""
+Course fragment corpus for the parser benchmarks: the recorded fragments in
+test/fixtures/courses plus one fragment per row of course_catalog.db, rendered
+in the markup Acalog serves for the course dropdown. Every few rows use a
+markup variant (whitespace after breaks, bold labels, comments) so the
+parsers are also compared on less regular input.
+
+write_catalog() lays a whole catalog year out as the stub server's fixtures
+directory: listing pages in the recorded Acalog markup of test/fixtures,
+linking to one course fragment per row, with an external link every so often.
+"""
+from html import escape
+from pathlib import Path
+import json
+import sqlite3
+
+COURSE_COLUMNS = (
+    "course_code, course_name, credits, course_description, prereqs, class_levels, repeats_allowed_for_credit"
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = BASE_DIR / "test" / "fixtures" / "courses"
+DB_PATH = BASE_DIR / "course_catalog.db"
+
+
+def render_fragment(row, variant=0):
+    code, name, credits, description, prereqs, class_levels, repeats = row
+    br = "<br>\n" if variant == 1 else "<br>"
+
+    parts = [f'<td class="coursepadding"><div><h3>{escape(code)}: {escape(name or "")}</h3>']
+
+    credits = json.loads(credits) if credits else None
+    if isinstance(credits, list):
+        parts.append(f"Lower Unit Limit: {credits[0]}{br}Upper Unit Limit: {credits[-1]}{br}")
+    elif credits is not None:
+        label = "<strong>Units:</strong>" if variant == 2 else "Units:"
+        parts.append(f"{label} {credits}{br}")
+
+    if description:
+        comment = "<!-- description -->" if variant == 3 else ""
+        parts.append(f"{escape(description)}{comment}{br}{br}")
+
+    if prereqs:
+        parts.append(f"Prerequisite Courses: {escape(', '.join(json.loads(prereqs)))}{br}{br}")
+
+    if class_levels:
+        items = "".join(f"<li>{escape(level)}</li>" for level in json.loads(class_levels))
+        parts.append(f"Open only to the following class level(s):<ul>{items}</ul>{br}")
+
+    if repeats is not None:
+        parts.append(f"Repeats Allowed for Credit: {repeats}{br}{br}")
+
+    parts.append("</div></td>")
+    return "".join(parts)
+
+
+def load_corpus(limit=None):
+    fragments = [path.read_text() for path in sorted(FIXTURES_DIR.glob("*.html"))]
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        query = f"SELECT {COURSE_COLUMNS} FROM courses ORDER BY catalog_year, course_code"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        rows = conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+    fragments += [render_fragment(row, variant=i % 4) for i, row in enumerate(rows)]
+    return fragments
+
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Course Descriptions - UC Merced - Acalog ACMS&trade;</title></head>
+<body>
+<table class="table_default" role="presentation">
+<tr><td><form name="course_search" action="content.php" method="get"><input type="hidden" name="catoid" value="{catoid}"></form></td></tr>
+</table>
+<table class="table_default" role="presentation">
+<tr><td colspan="2"><p>Courses are listed alphabetically by prefix.</p></td></tr>
+{rows}
+<tr><td colspan="2" style="text-align: center;">Page: {pagination}</td></tr>
+</table>
+</body>
+</html>
+"""
+
+COURSE_ROW = """<tr>
+<td style="padding-left: 20px;"><img src="/img/bullet.gif" alt=""></td>
+<td class="width"><a href="preview_course_nopop.php?catoid={catoid}&amp;coid={coid}" aria-expanded="false" onclick="showCourse('{catoid}', '{coid}', this, ''); return false;">{name}</a></td>
+</tr>"""
+
+EXTERNAL_ROW = """<tr>
+<td style="padding-left: 20px;"><img src="/img/bullet.gif" alt=""></td>
+<td class="width"><a href="https://engineering.ucmerced.edu/courses/{slug}" target="_blank" rel="noopener">{name}</a></td>
+</tr>"""
+
+
+def pagination(page, total_pages, catoid):
+    links = [
+        f"<strong>{i}</strong>" if i == page
+        else f'<a href="content.php?catoid={catoid}&amp;filter%5Bcpage%5D={i}">{i}</a>'
+        for i in range(1, total_pages + 1)
+    ]
+    return " ".join(links)
+
+
+def write_catalog(directory, catalog_year="2025_2026", page_size=100, external_every=50, limit=None, catoid=24):
+    """
+    Writes listing_{page}.html and courses/{coid}.html for the courses of one
+    catalog year of course_catalog.db; returns (listing pages, course fragments).
+    """
+    directory = Path(directory)
+    (directory / "courses").mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        query = f"SELECT {COURSE_COLUMNS} FROM courses WHERE catalog_year = ? ORDER BY course_code"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        rows = conn.execute(query, (catalog_year,)).fetchall()
+    finally:
+        conn.close()
+
+    listing_rows = []
+    for i, row in enumerate(rows):
+        coid = 100000 + i
+        code, name = row[0], row[1] or ""
+        (directory / "courses" / f"{coid}.html").write_text(render_fragment(row, variant=i % 4))
+        listing_rows.append(COURSE_ROW.format(catoid=catoid, coid=coid, name=escape(f"{code} - {name}")))
+        if external_every and i % external_every == external_every - 1:
+            listing_rows.append(EXTERNAL_ROW.format(slug=code.lower().replace(" ", "-"),
+                                                    name=escape(f"{code}X - External section")))
+
+    total_pages = max(1, -(-len(listing_rows) // page_size))
+    for page in range(1, total_pages + 1):
+        page_rows = listing_rows[(page - 1) * page_size:page * page_size]
+        (directory / f"listing_{page}.html").write_text(LISTING_TEMPLATE.format(
+            catoid=catoid, rows="\n".join(page_rows), pagination=pagination(page, total_pages, catoid),
+        ))
+    return total_pages, len(rows)
@@ -0,0 +1,201 @@
+"""
+Warm Chrome sessions shared by every catalog of a Selenium run.
+
+DriverPool keeps one headless browser per worker for the whole run instead of
+launching a fresh one per catalog. The work of all catalogs is split into
+tasks: one listing task per catalog, which reads its page count and queues one
+task per listing page. Each worker takes tasks from the front of its own deque
+and, once that is empty, steals from the back of the fullest one, so every
+browser stays busy until the last page of the last catalog instead of idling
+when its own catalog is done.
+
+A task that raises, or a page whose rows failed on a driver that no longer
+answers, is retried (up to MAX_ATTEMPTS) after the driver is quit and replaced.
+A worker whose browser cannot be restarted gives up that task and stops; the
+other workers steal what was left in its deque.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import threading
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+MAX_ATTEMPTS = 3
+
+
+class BrowserUnavailable(Exception):
+    """The browser of a worker was quit and a new one could not be started."""
+
+
+def headless_chrome():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    return webdriver.Chrome(options=chrome_options)
+
+
+def healthy(driver):
+    """Whether the browser still answers and has no stray windows left open."""
+    try:
+        return len(driver.window_handles) == 1
+    except WebDriverException:
+        return False
+
+
+class DriverPool:
+    def __init__(self, size, factory=headless_chrome):
+        self.factory = factory
+        # browsers take a second or two to start; start them all at once
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            self.drivers = list(executor.map(lambda _: factory(), range(size)))
+        self.recycled = 0
+
+    def __len__(self):
+        return len(self.drivers)
+
+    def recycle(self, worker):
+        """Quits the driver of a worker and returns a fresh one in its place."""
+        try:
+            self.drivers[worker].quit()
+        except WebDriverException:
+            pass
+        self.drivers[worker] = None
+        try:
+            self.drivers[worker] = self.factory()
+        except Exception as e:
+            raise BrowserUnavailable(f"browser {worker} could not be restarted: {type(e).__name__} - {e}") from e
+        self.recycled += 1
+        return self.drivers[worker]
+
+    def close(self):
+        for driver in self.drivers:
+            if driver is None:
+                continue
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass
+class PageTask:
+    year: str
+    page: int | None = None # None lists the catalog and queues its pages
+    attempt: int = 1
+
+
+class WorkStealingQueue:
+    def __init__(self, workers):
+        self.deques = [deque() for _ in range(workers)]
+        self.condition = threading.Condition()
+        self.pending = 0 # tasks queued or running
+        self.steals = 0
+
+    def put(self, worker, task):
+        with self.condition:
+            self.deques[worker].append(task)
+            self.pending += 1
+            self.condition.notify_all()
+
+    def get(self, worker):
+        """The next task for worker, or None once every task is done."""
+        with self.condition:
+            while True:
+                if self.deques[worker]:
+                    return self.deques[worker].popleft()
+                victim = max(self.deques, key=len)
+                if victim:
+                    self.steals += 1
+                    return victim.pop()
+                if not self.pending:
+                    return None
+                # a running task may still queue pages
+                self.condition.wait()
+
+    def task_done(self):
+        with self.condition:
+            self.pending -= 1
+            if not self.pending:
+                self.condition.notify_all()
+
+
+class PooledRun:
+    """Scrapes several catalogs (catalog year -> Scraper) with the browsers of a DriverPool."""
+    def __init__(self, pool, scrapers, max_attempts=MAX_ATTEMPTS):
+        self.pool = pool
+        self.scrapers = scrapers
+        self.max_attempts = max_attempts
+        self.queue = WorkStealingQueue(len(pool))
+        self.total_pages = {}
+        self.failed_tasks = []
+
+    def run(self):
+        for i, year in enumerate(self.scrapers):
+            self.queue.put(i % len(self.pool), PageTask(year))
+
+        threads = [threading.Thread(target=self.work, args=(worker,), name=f"browser-{worker}")
+                   for worker in range(len(self.pool))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # only left over if every worker lost its browser
+        for tasks in self.queue.deques:
+            self.failed_tasks.extend(tasks)
+            tasks.clear()
+
+    def work(self, worker):
+        while (task := self.queue.get(worker)) is not None:
+            try:
+                self.run_task(worker, task)
+            except BrowserUnavailable:
+                return
+            finally:
+                self.queue.task_done()
+
+    def run_task(self, worker, task):
+        scraper = self.scrapers[task.year]
+        driver = self.pool.drivers[worker]
+        try:
+            if task.page is None:
+                self.list_catalog(worker, task.year, driver)
+                return
+            scraper.scrape_page(task.page, self.total_pages[task.year], driver)
+            if not scraper.page_failures[task.page] or healthy(driver):
+                return
+            # the rows failed because the browser went away, not because of the page
+            scraper.log(f"Browser {worker} stopped responding on page {task.page}")
+        except Exception as e:
+            scraper.log(f"Browser {worker} failed on {task}: {type(e).__name__} - {e}")
+
+        if not healthy(driver):
+            try:
+                self.pool.recycle(worker)
+            except BrowserUnavailable as e:
+                scraper.log(f"Stopping browser {worker}: {e}")
+                self.failed_tasks.append(task)
+                raise
+        if task.attempt >= self.max_attempts:
+            self.failed_tasks.append(task)
+            return
+        if task.page is not None:
+            scraper.page_failures[task.page] = 0
+        self.queue.put(worker, PageTask(task.year, task.page, task.attempt + 1))
+
+    def list_catalog(self, worker, year, driver):
+        scraper = self.scrapers[year]
+        total_pages = scraper.load_listing(driver)
+        self.total_pages[year] = total_pages
+
+        for page in range(1, total_pages + 1):
+            if scraper.page_done(page):
+                scraper.log(f"\n=== Skipping completed page {page}/{total_pages} ===")
+                continue
+            self.queue.put(worker, PageTask(year, page))
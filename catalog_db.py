@@ -0,0 +1,236 @@
+import json
+import re
+import sqlite3
+
+DB_PATH = "course_catalog.db"
+
+# column order of the courses table
+COLUMNS = [
+    "course_code",
+    "course_name",
+    "credits",
+    "course_description",
+    "prereqs",
+    "coreqs",
+    "class_levels",
+    "repeats_allowed_for_credit",
+    "catalog_year",
+]
+
+JSON_COLUMNS = ["credits", "prereqs", "coreqs", "class_levels"]
+
+
+def connect(db_path=DB_PATH):
+    return sqlite3.connect(db_path, timeout=30)
+
+
+def course_record(course_data, catalog_year):
+    """
+    Converts a scraped course dict ("course code", ..., "N/A" for missing values)
+    into a dict keyed by courses column, with None for missing values and
+    lists/credits kept as native Python values.
+    """
+    record = {}
+    for column in COLUMNS[:-1]:
+        value = course_data.get(column.replace("_", " "))
+        record[column] = None if value == "N/A" else value
+
+    record["catalog_year"] = catalog_year
+    return record
+
+
+def course_row(course_data, catalog_year):
+    """
+    A courses row for a scraped course dict. List and credit fields are stored
+    as JSON strings, the same way utils/export_to_sqlite.py writes them.
+    """
+    return record_row(course_record(course_data, catalog_year))
+
+
+def courses_table_sql(without_rowid=False, if_not_exists=False):
+    """
+    The courses table: one row per course and catalog year. List and credit
+    columns hold JSON strings, see course_row(). subject_prefix, course_number
+    and course_suffix ("BIO 127LA" -> "BIO", 127, "LA") are generated by SQLite
+    from course_code, so every writer keeps them in sync without listing them.
+    """
+    return f"""
+        CREATE TABLE {"IF NOT EXISTS " if if_not_exists else ""}courses (
+            course_code TEXT NOT NULL,
+            course_name TEXT,
+            credits TEXT,
+            course_description TEXT,
+            prereqs TEXT,
+            coreqs TEXT,
+            class_levels TEXT,
+            repeats_allowed_for_credit INTEGER,
+            catalog_year TEXT NOT NULL,
+            subject_prefix TEXT GENERATED ALWAYS AS (
+                upper(trim(substr(course_code, 1, instr(course_code, ' ') - 1)))
+            ) STORED,
+            course_number INTEGER GENERATED ALWAYS AS (
+                CAST(substr(course_code, instr(course_code, ' ') + 1) AS INTEGER)
+            ) STORED,
+            course_suffix TEXT GENERATED ALWAYS AS (
+                ltrim(substr(course_code, instr(course_code, ' ') + 1), '0123456789')
+            ) STORED,
+            PRIMARY KEY (course_code, catalog_year)
+        ){" WITHOUT ROWID" if without_rowid else ""}
+    """
+
+
+# course_code lookups use the primary key; the year index serves catalog_year
+# filters and the API's (catalog_year, course_code) keyset pages; the subject
+# index serves prefix equality, course number ranges within a prefix and
+# SELECT DISTINCT subject_prefix
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_courses_year_code ON courses (catalog_year, course_code)",
+    "CREATE INDEX IF NOT EXISTS idx_courses_subject ON courses (subject_prefix, course_number)",
+]
+
+
+# a course code inside a requirement group, e.g. "MATH 023H" in "MATH 023 or MATH 023H or equivalent exam"
+REQUIRED_CODE = re.compile(r"\b[A-Z]{2,5} \d{2,3}[A-Z]{0,2}\b")
+
+# one row per course code named in a requirement group. Every group of a
+# course must be satisfied; any one code of a group satisfies it. Groups that
+# name no course ("Junior standing") have no rows.
+REQUIREMENTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS course_requirements (
+        course_code TEXT NOT NULL,
+        catalog_year TEXT NOT NULL,
+        group_id INTEGER NOT NULL,
+        kind TEXT NOT NULL, -- prereq or coreq
+        required_code TEXT NOT NULL,
+        PRIMARY KEY (course_code, catalog_year, kind, group_id, required_code)
+    )
+"""
+
+REQUIREMENTS_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_requirements_required_code ON course_requirements (required_code, catalog_year)"
+)
+
+
+def requirement_rows(course_code, catalog_year, prereqs, coreqs):
+    """course_requirements rows for a course's prereqs/coreqs JSON columns."""
+    rows = []
+    for kind, groups in (("prereq", prereqs), ("coreq", coreqs)):
+        if not groups:
+            continue
+        for group_id, group in enumerate(json.loads(groups)):
+            for required_code in dict.fromkeys(REQUIRED_CODE.findall(group)):
+                rows.append((course_code, catalog_year, group_id, kind, required_code))
+    return rows
+
+
+def refresh_requirements(conn, catalog_year=None):
+    """
+    Rebuilds course_requirements from the courses table, for one catalog year or
+    all of them. Runs inside the caller's transaction.
+    """
+    conn.execute(REQUIREMENTS_TABLE_SQL)
+    conn.execute(REQUIREMENTS_INDEX_SQL)
+
+    where, params = ("WHERE catalog_year = ?", (catalog_year,)) if catalog_year else ("", ())
+    conn.execute(f"DELETE FROM course_requirements {where}", params)
+    courses = conn.execute(f"SELECT course_code, catalog_year, prereqs, coreqs FROM courses {where}", params)
+    conn.executemany(
+        "INSERT INTO course_requirements (course_code, catalog_year, group_id, kind, required_code) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [row for course in courses.fetchall() for row in requirement_rows(*course)],
+    )
+
+
+# full-text index over course names and descriptions. The other columns are
+# unindexed so search results can be filtered and shown without a join. The
+# index is an external-content table: the text is read back from courses by
+# rowid instead of being stored a second time, so it is rebuilt whenever
+# courses rows change (refresh_search_index). A WITHOUT ROWID courses table
+# has no rowid to point at, and then the index keeps its own copy.
+def search_table_sql(external_content=True):
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS course_search USING fts5(
+            course_code UNINDEXED,
+            catalog_year UNINDEXED,
+            subject_prefix UNINDEXED,
+            course_name,
+            course_description,
+            {"content = 'courses', " if external_content else ""}tokenize = 'porter unicode61'
+        )
+    """
+
+
+def has_rowid(conn, table="courses"):
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    return "WITHOUT ROWID" not in sql.upper()
+
+
+def refresh_search_index(conn, catalog_year=None):
+    """
+    Rebuilds course_search from the courses table, for one catalog year or all
+    of them. Runs inside the caller's transaction. An external-content index is
+    always rebuilt whole, since the rowids of replaced courses rows change.
+    """
+    external_content = has_rowid(conn)
+    existing = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'course_search'").fetchone()
+    if existing is not None and ("content = 'courses'" in existing[0]) != external_content:
+        # built for the other layout of courses, or by an older version
+        conn.execute("DROP TABLE course_search")
+    conn.execute(search_table_sql(external_content))
+
+    if external_content:
+        conn.execute("INSERT INTO course_search (course_search) VALUES ('rebuild')")
+        return
+
+    where, params = ("WHERE catalog_year = ?", (catalog_year,)) if catalog_year else ("", ())
+    conn.execute(f"DELETE FROM course_search {where}", params)
+    conn.execute(
+        "INSERT INTO course_search (course_code, catalog_year, subject_prefix, course_name, course_description) "
+        f"SELECT course_code, catalog_year, subject_prefix, course_name, course_description FROM courses {where}",
+        params,
+    )
+
+
+def ensure_courses_table(conn):
+    """Creates the courses table in a new database; an existing table is left as it is."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'courses'").fetchone()
+    if not exists:
+        conn.execute(courses_table_sql())
+        for statement in INDEXES:
+            conn.execute(statement)
+
+
+def record_row(record):
+    """A courses row for a dict keyed by courses column (course_record(), NDJSON output)."""
+    return tuple(
+        json.dumps(record[column]) if column in JSON_COLUMNS and record[column] is not None else record[column]
+        for column in COLUMNS
+    )
+
+
+def ensure_fingerprint_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS course_fingerprints (
+            course_code TEXT NOT NULL,
+            catalog_year TEXT NOT NULL,
+            html_hash TEXT NOT NULL,
+            PRIMARY KEY (course_code, catalog_year)
+        )
+    """)
+
+
+def load_fingerprints(conn, catalog_year):
+    ensure_fingerprint_table(conn)
+    rows = conn.execute(
+        "SELECT course_code, html_hash FROM course_fingerprints WHERE catalog_year = ?",
+        (catalog_year,),
+    )
+    return dict(rows.fetchall())
+
+
+def load_rows(conn, catalog_year):
+    rows = conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM courses WHERE catalog_year = ?",
+        (catalog_year,),
+    )
+    return {row[0]: row for row in rows.fetchall()}
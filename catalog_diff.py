@@ -0,0 +1,123 @@
+"""
+Catalog year-over-year diffs, materialized when courses are written.
+
+course_hashes holds a content hash of every courses row over the fields a
+diff compares. course_diffs holds one row per added, dropped or changed
+course for every pair of catalog years (earlier year first), with the names
+of the fields that changed. A pair is diffed from the two years' hashes:
+codes in only one year are added or dropped, equal hashes are skipped without
+reading the rows, and only rows whose hash differs are loaded and compared
+field by field (JSON columns decoded, so formatting alone is not a change).
+
+refresh_diffs() is called next to refresh_requirements() by every writer of
+the courses table.
+"""
+import hashlib
+import json
+from catalog_db import COLUMNS, JSON_COLUMNS
+
+# the fields a diff compares, in courses column order
+DIFF_FIELDS = [column for column in COLUMNS if column not in ("course_code", "catalog_year")]
+
+HASHES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS course_hashes (
+        catalog_year TEXT NOT NULL,
+        course_code TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        PRIMARY KEY (catalog_year, course_code)
+    ) WITHOUT ROWID
+"""
+
+DIFFS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS course_diffs (
+        from_year TEXT NOT NULL,
+        to_year TEXT NOT NULL,
+        course_code TEXT NOT NULL,
+        change TEXT NOT NULL, -- added, dropped or changed
+        fields TEXT, -- JSON list of the changed DIFF_FIELDS, for changed courses
+        PRIMARY KEY (from_year, to_year, course_code)
+    ) WITHOUT ROWID
+"""
+
+
+def content_hash(values):
+    """Hash of a row's DIFF_FIELDS values, as stored."""
+    return hashlib.blake2b(json.dumps(values).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def changed_fields(before, after):
+    """DIFF_FIELDS whose decoded values differ between two rows of DIFF_FIELDS values."""
+    changed = []
+    for field, old, new in zip(DIFF_FIELDS, before, after):
+        if field in JSON_COLUMNS:
+            old = json.loads(old) if old is not None else None
+            new = json.loads(new) if new is not None else None
+        if old != new:
+            changed.append(field)
+    return changed
+
+
+def refresh_hashes(conn, catalog_year=None):
+    where, params = ("WHERE catalog_year = ?", (catalog_year,)) if catalog_year else ("", ())
+    conn.execute(f"DELETE FROM course_hashes {where}", params)
+    rows = conn.execute(f"SELECT catalog_year, course_code, {', '.join(DIFF_FIELDS)} FROM courses {where}", params)
+    conn.executemany(
+        "INSERT INTO course_hashes (catalog_year, course_code, content_hash) VALUES (?, ?, ?)",
+        [(row[0], row[1], content_hash(row[2:])) for row in rows.fetchall()],
+    )
+
+
+def year_rows(conn, catalog_year, codes):
+    rows = conn.execute(
+        f"SELECT course_code, {', '.join(DIFF_FIELDS)} FROM courses "
+        "WHERE catalog_year = ? AND course_code IN (SELECT value FROM json_each(?))",
+        (catalog_year, json.dumps(codes)),
+    )
+    return {row[0]: row[1:] for row in rows.fetchall()}
+
+
+def diff_years(conn, from_year, to_year):
+    """(course_code, change, changed fields or None) for every course that differs between two catalog years."""
+    hashes = "SELECT course_code, content_hash FROM course_hashes WHERE catalog_year = ?"
+    before = dict(conn.execute(hashes, (from_year,)).fetchall())
+    after = dict(conn.execute(hashes, (to_year,)).fetchall())
+
+    diffs = [(code, "added", None) for code in after.keys() - before.keys()]
+    diffs += [(code, "dropped", None) for code in before.keys() - after.keys()]
+
+    candidates = sorted(code for code in before.keys() & after.keys() if before[code] != after[code])
+    if candidates:
+        old_rows = year_rows(conn, from_year, candidates)
+        new_rows = year_rows(conn, to_year, candidates)
+        for code in candidates:
+            fields = changed_fields(old_rows[code], new_rows[code])
+            if fields:
+                diffs.append((code, "changed", fields))
+
+    return sorted(diffs)
+
+
+def refresh_diffs(conn, catalog_year=None):
+    """
+    Rehashes the courses of one catalog year (or all of them) and rebuilds the
+    diffs of every pair of years that includes it. Runs inside the caller's transaction.
+    """
+    conn.execute(HASHES_TABLE_SQL)
+    conn.execute(DIFFS_TABLE_SQL)
+    refresh_hashes(conn, catalog_year)
+
+    if catalog_year:
+        conn.execute("DELETE FROM course_diffs WHERE from_year = ? OR to_year = ?", (catalog_year, catalog_year))
+    else:
+        conn.execute("DELETE FROM course_diffs")
+
+    years = [year for year, in conn.execute("SELECT DISTINCT catalog_year FROM course_hashes ORDER BY catalog_year")]
+    for i, from_year in enumerate(years):
+        for to_year in years[i + 1:]:
+            if catalog_year not in (None, from_year, to_year):
+                continue
+            conn.executemany(
+                "INSERT INTO course_diffs (from_year, to_year, course_code, change, fields) VALUES (?, ?, ?, ?, ?)",
+                [(from_year, to_year, code, change, json.dumps(fields) if fields else None)
+                 for code, change, fields in diff_years(conn, from_year, to_year)],
+            )
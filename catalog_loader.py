@@ -0,0 +1,118 @@
+"""
+Bulk loader for the SQLite course catalog.
+
+    python catalog_loader.py [--db course_catalog.db] [--ndjson output/] [--without-rowid]
+
+Rebuilds the courses table with an explicit schema (composite primary key on
+course_code + catalog_year, secondary indexes), and the course_requirements,
+course_search (FTS5) and course_hashes/course_diffs tables derived from it, from the scraper's NDJSON output,
+or from the rows already in the database when no NDJSON is given. Everything
+is inserted with executemany inside a single transaction, indexes are built
+after the rows are in, and ANALYZE refreshes the query planner statistics.
+Other tables in the database (e.g. course_fingerprints) are left alone.
+"""
+from pathlib import Path
+import argparse
+import json
+import time
+from catalog_db import (COLUMNS, DB_PATH, INDEXES, connect, courses_table_sql, record_row, refresh_requirements,
+                        refresh_search_index)
+from catalog_diff import refresh_diffs
+
+# per-connection settings for the load only. The rollback journal stays on disk
+# and is synced as usual: when rebuilding in place the database is also the only
+# copy of the rows, so a load killed halfway has to roll back on the next open.
+LOAD_PRAGMAS = [
+    "PRAGMA cache_size = -65536", # 64 MB
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+def load_courses(db_path, rows, without_rowid=False):
+    """
+    Replaces the courses table with rows (tuples in COLUMNS order) in one
+    transaction and returns the number of rows loaded.
+    """
+    conn = connect(db_path)
+    conn.isolation_level = None # transactions are managed explicitly below
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+
+        conn.execute("BEGIN")
+        try:
+            conn.execute("DROP TABLE IF EXISTS courses")
+            conn.execute(courses_table_sql(without_rowid=without_rowid))
+            cursor = conn.executemany(
+                f"INSERT INTO courses ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+            count = cursor.rowcount
+            for statement in INDEXES:
+                conn.execute(statement)
+
+            conn.execute("DROP TABLE IF EXISTS course_requirements")
+            refresh_requirements(conn)
+            conn.execute("DROP TABLE IF EXISTS course_search")
+            refresh_search_index(conn)
+            conn.execute("DROP TABLE IF EXISTS course_hashes")
+            conn.execute("DROP TABLE IF EXISTS course_diffs")
+            refresh_diffs(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    return count
+
+
+def rows_from_ndjson(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield record_row(json.loads(line))
+
+
+def rows_from_db(db_path):
+    """Reads the current courses rows, so an existing database can be rebuilt in place."""
+    conn = connect(db_path)
+    try:
+        return conn.execute(f"SELECT {', '.join(COLUMNS)} FROM courses").fetchall()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database to (re)build")
+    parser.add_argument("--ndjson", type=Path, default=None,
+                        help="directory of {year}.ndjson files written by main.py --output ndjson")
+    parser.add_argument("--without-rowid", action="store_true",
+                        help="store courses as a WITHOUT ROWID table clustered on the primary key")
+    args = parser.parse_args()
+
+    if args.ndjson is not None:
+        paths = sorted(args.ndjson.glob("*.ndjson"))
+        print(f"Loading {len(paths)} NDJSON files into {args.db}")
+        rows = rows_from_ndjson(paths)
+    else:
+        print(f"Rebuilding the courses table of {args.db}")
+        rows = rows_from_db(args.db)
+
+    start = time.perf_counter()
+    count = load_courses(args.db, rows, without_rowid=args.without_rowid)
+    print(f"Loaded {count} rows in {time.perf_counter() - start:.3f} seconds")
+
+    # give back the pages of the dropped table
+    conn = connect(args.db)
+    conn.execute("VACUUM")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
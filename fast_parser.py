@@ -0,0 +1,155 @@
+"""
+lxml backend for Scraper.parse_html.
+
+The BeautifulSoup path builds a Python object tree per course and, for every
+<br>, walks previous_sibling/find_next and runs each field check in turn. Here
+libxml2 builds the tree, a single pass over the <br> elements reads the text
+node before each break, and the field handler is picked from a table keyed on
+the first four characters of that text. The output is identical to the
+BeautifulSoup path, including its quirks (last digit of "Units:", every line
+ending in "." overwriting the description, etc.).
+"""
+import lxml.html
+from lxml import etree
+
+CLASS_LEVELS_MARKER = "Open only to the following class level(s):"
+
+
+def empty_course():
+    return {
+        "course code": None,
+        "course name": None,
+        "credits": None,
+        "course description": None,
+        "prereqs": None,
+        "coreqs": None,
+        "class levels": None,
+        "repeats allowed for credit": None,
+    }
+
+
+def text_of(element):
+    """bs4's Tag.text: every descendant text node, comments excluded."""
+    return "".join(element.xpath(".//text()"))
+
+
+def previous_text(br):
+    """bs4's str(br.previous_sibling), reduced to what the handlers can match."""
+    sibling = br.getprevious()
+    if sibling is None:
+        return br.getparent().text or ""
+    if sibling.tail:
+        return sibling.tail
+    if sibling.tag is etree.Comment:
+        return sibling.text or ""
+    # an element or nothing at all: never starts with a field label or ends with "."
+    return ""
+
+
+def next_sibling_has(br, marker):
+    """bs4's `marker in str(br.next_sibling)`."""
+    if br.tail:
+        return marker in br.tail
+
+    sibling = br.getnext()
+    if sibling is None:
+        return False
+    if sibling.tag is etree.Comment:
+        return marker in (sibling.text or "")
+    return marker in text_of(sibling) and marker in etree.tostring(sibling, encoding=str)
+
+
+def split_requirements(text):
+    line = text.split(":", 1)[1].strip()
+    line = line.replace("(", "").replace(")", "").replace("\xa0", " ").replace("\n", "")
+
+    requirements = []
+    for part in line.split(","):
+        stripped = part.strip()
+        if stripped:
+            if " and " in stripped:
+                for p in part.split(" and "):
+                    requirements.append(p.strip())
+            else:
+                requirements.append(stripped)
+    return requirements
+
+
+def handle_units(prev, br, course_data):
+    course_data["credits"] = int(prev[-1])
+
+
+def handle_unit_range(prev, br, course_data):
+    bounds = [int(prev[-1].strip())]
+
+    following = br.xpath("following::text()[1]")
+    if following and following[0].startswith("Upper Unit Limit:"):
+        bounds.append(int(following[0].split(":")[-1].strip()))
+
+    course_data["credits"] = bounds
+
+
+def handle_prereqs(prev, br, course_data):
+    course_data["prereqs"] = split_requirements(prev)
+
+
+def handle_repeats(prev, br, course_data):
+    course_data["repeats allowed for credit"] = int(prev.split(":", 1)[1].strip())
+
+
+# first four characters of the line -> (full label, handler)
+HANDLERS = {
+    "Unit": ("Units:", handle_units),
+    "Lowe": ("Lower Unit Limit", handle_unit_range),
+    "Prer": ("Prerequisite Courses", handle_prereqs),
+    "Repe": ("Repeats Allowed", handle_repeats),
+}
+
+
+def class_levels(br):
+    levels = []
+    ul = br.xpath("following::ul[1]")
+    if ul:
+        for li in ul[0].iter("li"):
+            level = "".join(s.strip() for s in li.xpath(".//text()"))
+            if level:
+                levels.append(level)
+    return levels
+
+
+def parse_course(raw_html):
+    course_data = empty_course()
+    if not raw_html or not raw_html.strip():
+        return fill_na_defaults(course_data)
+
+    root = lxml.html.fragment_fromstring(raw_html, create_parent="div")
+
+    h3 = next(root.iter("h3"), None)
+    if h3 is not None:
+        title = text_of(h3)
+        if ":" in title:
+            code, name = title.split(":", 1)
+            course_data["course code"] = code.strip()
+            course_data["course name"] = name.strip()
+
+    for br in root.iter("br"):
+        prev = previous_text(br).strip()
+
+        entry = HANDLERS.get(prev[:4])
+        if entry is not None and prev.startswith(entry[0]):
+            entry[1](prev, br, course_data)
+
+        if prev.endswith("."):
+            course_data["course description"] = prev
+
+        if next_sibling_has(br, CLASS_LEVELS_MARKER):
+            course_data["class levels"] = class_levels(br)
+
+    return fill_na_defaults(course_data)
+
+
+def fill_na_defaults(course_data):
+    for key, value in course_data.items():
+        if value is None:
+            course_data[key] = "N/A"
+    return course_data
@@ -0,0 +1,249 @@
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+import time
+import httpx
+
+
+class OfflineCacheMiss(httpx.RequestError):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    content_hash: str
+    etag: str | None
+    last_modified: str | None
+    content_type: str | None
+    fetched_at: float
+    size: int
+    body: bytes | None = None
+
+    def is_fresh(self, ttl):
+        """ttl=None never expires, ttl=0 always revalidates."""
+        if ttl is None:
+            return True
+        return time.time() - self.fetched_at < ttl
+
+
+class ResponseCache:
+    """
+    On-disk response cache. Bodies are stored once per content hash under
+    blobs/, and index.db maps each URL to its current hash together with the
+    validators (ETag/Last-Modified) needed for conditional revalidation.
+    The least recently used entries are evicted once the blobs exceed max_bytes.
+    """
+    def __init__(self, cache_dir="cache", max_bytes=512 * 1024 * 1024, offline=False):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.offline = offline
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.cache_dir / "index.db", check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def blob_path(self, content_hash):
+        return self.blob_dir / content_hash[:2] / content_hash
+
+    def lookup(self, url):
+        """The entry of url with its body, or None. An entry whose blob has gone missing is dropped."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, content_hash, etag, last_modified, content_type, fetched_at, size "
+                "FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(*row)
+            try:
+                # read under the lock, so store() or evict() in another thread cannot release it first
+                entry.body = self.blob_path(entry.content_hash).read_bytes()
+            except FileNotFoundError:
+                self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return entry
+
+    def store(self, url, body, etag=None, last_modified=None, content_type=None):
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(content_hash)
+        now = time.time()
+        # under the lock, so another thread cannot release the blob before its entry is in
+        with self.lock:
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(body)
+                tmp.replace(path)
+
+            previous = self.conn.execute(
+                "SELECT content_hash FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, content_hash, etag, last_modified, content_type, now, now, len(body)),
+            )
+            if previous and previous[0] != content_hash:
+                self.release_blob(previous[0])
+            self.conn.commit()
+            self.evict()
+        return content_hash
+
+    def revalidated(self, url):
+        """Marks an entry fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE entries SET fetched_at = ?, last_access = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self.conn.commit()
+
+    def total_bytes(self):
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def evict(self):
+        # caller holds self.lock
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        for url, content_hash, size in self.conn.execute(
+            "SELECT url, content_hash, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            if self.release_blob(content_hash):
+                total -= size
+        self.conn.commit()
+
+    def release_blob(self, content_hash):
+        """Deletes a blob once no entry references it. Caller holds self.lock."""
+        still_used = self.conn.execute(
+            "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if still_used:
+            return False
+        self.blob_path(content_hash).unlink(missing_ok=True)
+        return True
+
+
+class CachePolicy:
+    """Request/response handling shared by the sync and async transports."""
+    def __init__(self, cache, ttl=None):
+        self.cache = cache
+        self.ttl = ttl
+
+    def key(self, request):
+        return str(request.url.copy_with(fragment=None))
+
+    def cached_response(self, request, entry, status):
+        headers = {"X-Cache": status}
+        if entry.content_type:
+            headers["Content-Type"] = entry.content_type
+        return httpx.Response(200, headers=headers, content=entry.body, request=request)
+
+    def before_request(self, request):
+        """Returns (entry, response); a response means the network is skipped."""
+        if request.method != "GET":
+            return None, None
+
+        key = self.key(request)
+        entry = self.cache.lookup(key)
+        if entry is not None and (self.cache.offline or entry.is_fresh(self.ttl)):
+            return entry, self.cached_response(request, entry, "HIT")
+
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"{key} is not cached (offline mode)", request=request)
+
+        if entry is not None:
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+        return entry, None
+
+    def after_response(self, request, entry, response):
+        key = self.key(request)
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated(key)
+            return self.cached_response(request, entry, "REVALIDATED")
+
+        if response.status_code == 200:
+            self.cache.store(
+                key,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_type=response.headers.get("Content-Type"),
+            )
+        return response
+
+
+class CachingTransport(httpx.BaseTransport):
+    def __init__(self, cache, ttl=None, transport=None):
+        self.policy = CachePolicy(cache, ttl)
+        self.transport = transport if transport is not None else httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        entry, cached = self.policy.before_request(request)
+        if cached is not None:
+            return cached
+
+        response = self.transport.handle_request(request)
+        if request.method != "GET":
+            return response
+        response.read()
+        return self.policy.after_response(request, entry, response)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cache, ttl=None, transport=None):
+        self.policy = CachePolicy(cache, ttl)
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        entry, cached = self.policy.before_request(request)
+        if cached is not None:
+            return cached
+
+        response = await self.transport.handle_async_request(request)
+        if request.method != "GET":
+            return response
+        await response.aread()
+        return self.policy.after_response(request, entry, response)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,240 @@
+from bs4 import BeautifulSoup
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse, parse_qs
+import hashlib
+import httpx
+from http_cache import CachingTransport
+from parse_pipeline import ParsePipeline
+from scraper import Scraper
+
+
+DETAIL_PATH = "ajax/preview_course.php"
+PREVIEW_PAGE = "preview_course_nopop.php"
+USER_AGENT = "ucm-course-scraper (+https://github.com/AmanKalkat/ucm-course-scraper)"
+
+
+def create_client(max_connections=8, timeout=30.0, cache=None, cache_ttl=None):
+    """
+    Keep-alive client shared by every request of a catalog run. With a
+    ResponseCache, responses younger than cache_ttl seconds are served from
+    disk and older ones are revalidated with a conditional GET.
+    """
+    transport = httpx.HTTPTransport(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+    )
+    if cache is not None:
+        transport = CachingTransport(cache, ttl=cache_ttl, transport=transport)
+
+    return httpx.Client(
+        headers={"User-Agent": USER_AGENT},
+        transport=transport,
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+def listing_code(course_name):
+    """'CSE 030 - Data Structures' -> 'CSE 030'"""
+    return course_name.split(" - ", 1)[0].strip()
+
+
+class HttpScraper(Scraper):
+    """
+    Browserless scraper. Acalog serves the same course dropdown that the
+    browser clicks open as a plain HTML fragment, so the listing pages and
+    course details are fetched directly and fed to parse_html.
+    """
+    def __init__(self, website_url, client=None, logger=None, cache=None, cache_ttl=None, parser="bs4",
+                 parse_workers=0, parse_executor=None, parse_ordered=True):
+        super().__init__(None, website_url, logger=logger, parser=parser)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+
+        # parse_workers > 0 (or a shared parse_executor) moves parse_html into worker processes
+        self.parse_workers = parse_workers
+        self.parse_executor = parse_executor
+        self.parse_ordered = parse_ordered # False takes parsed courses as they finish, not in listing order
+        self.pipeline = None
+        self.client = client if client is not None else self.create_client()
+
+        # incremental mode: course code -> sha256 of its detail HTML
+        self.known_fingerprints = None # from the previous run; None scrapes everything
+        self.fingerprints = {} # seen in this run
+        self.unchanged_courses = [] # skipped because the fingerprint matched
+        self.failed_courses = [] # listing codes whose detail could not be fetched or parsed
+        self.failed_pages = []
+        self.pages_scraped = [] # listing pages whose rows were all queued this run
+
+    def create_client(self):
+        return create_client(cache=self.cache, cache_ttl=self.cache_ttl)
+
+    def close(self):
+        self.client.close()
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        response.raise_for_status()
+        return response.text
+
+    def detail_url(self, href):
+        """Maps a course row link to its detail fragment URL, None for external links."""
+        parsed = urlparse(href)
+        if not parsed.path.endswith(PREVIEW_PAGE):
+            return None
+
+        query = parse_qs(parsed.query)
+        if "catoid" not in query or "coid" not in query:
+            return None
+
+        detail = f"{DETAIL_PATH}?catoid={query['catoid'][0]}&coid={query['coid'][0]}&show"
+        return urljoin(self.website_url, detail)
+
+    def course_links(self, page_soup):
+        """Returns (course name, detail url) for every course row of a listing page."""
+        links = []
+        last_table = page_soup.find_all("table", class_="table_default")[-1]
+        for td in last_table.find_all("td", class_="width"):
+            a = td.find("a")
+            if a is None:
+                continue
+
+            course_name = a.get_text()
+            url = None
+            if a.get("target") != "_blank":
+                url = self.detail_url(a.get("href", ""))
+            links.append((course_name, url))
+
+        return links
+
+    def handle_course_html(self, course_name, html, page=None):
+        code = listing_code(course_name)
+        fingerprint = hashlib.sha256(html.encode()).hexdigest()
+
+        if self.known_fingerprints is not None and self.known_fingerprints.get(code) == fingerprint:
+            if code not in self.scraped_courses:
+                self.scraped_courses.add(code)
+                self.unchanged_courses.append(code)
+            self.timer.count("unchanged")
+            self.log(f"  -> Unchanged: {code}")
+            self.fingerprints[code] = fingerprint
+            self.row_completed(page, course_name, fingerprint=fingerprint, unchanged=True)
+        elif self.pipeline is not None:
+            self.pipeline.submit((course_name, code, fingerprint, page), html)
+        else:
+            with self.timer.step("parse"):
+                course_data = self.parse_html(html)
+            self.course_parsed((course_name, code, fingerprint, page), course_data)
+
+    def course_parsed(self, key, course_data):
+        course_name, code, fingerprint, page = key
+        if isinstance(course_data, Exception):
+            # raised by parse_html in a worker process
+            self.course_failed(page, course_name, f"Unexpected error for {course_name}: "
+                                                  f"{type(course_data).__name__} - {course_data}")
+            return
+
+        added = self.add_course(course_data)
+        self.fingerprints[code] = fingerprint
+        self.row_completed(page, course_name, course_data if added else None, fingerprint=fingerprint)
+
+    def course_failed(self, page, course_name, message):
+        self.timer.count("row_errors")
+        self.failed_courses.append(listing_code(course_name))
+        self.row_failed(page)
+        self.log(message)
+
+    def restore_row(self, event):
+        super().restore_row(event)
+        code = listing_code(event["row"])
+        if "fingerprint" in event:
+            self.fingerprints[code] = event["fingerprint"]
+        if event.get("unchanged") and code not in self.scraped_courses:
+            self.scraped_courses.add(code)
+            self.unchanged_courses.append(code)
+
+    @contextmanager
+    def parse_stage(self):
+        if not self.parse_workers and self.parse_executor is None:
+            yield
+            return
+
+        with ParsePipeline(self.course_parsed, workers=self.parse_workers or None, parser=self.parser,
+                           executor=self.parse_executor, ordered=self.parse_ordered) as pipeline:
+            self.pipeline = pipeline
+            try:
+                yield
+            finally:
+                self.pipeline = None
+
+    def external_link(self, page, course_name):
+        self.log(f"  -> External link detected for {course_name}")
+        self.external_link_classes.append(course_name)
+        self.timer.count("external_links")
+        self.row_completed(page, course_name, external=True)
+
+    def scrape_course(self, course_name, url, page=None):
+        if self.row_done(page, course_name):
+            self.log(f"Already completed: {course_name}")
+            return
+
+        if url is None:
+            self.external_link(page, course_name)
+            return
+
+        try:
+            self.log(f"Fetching: {course_name}")
+            with self.timer.step("course_fetch"):
+                html = self.fetch(url)
+            self.handle_course_html(course_name, html, page)
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.TimeoutException):
+                self.timer.count("timeouts")
+            self.course_failed(page, course_name, f"HTTP error for {course_name}: {type(e).__name__} - {e}")
+        except Exception as e:
+            self.course_failed(page, course_name, f"Unexpected error for {course_name}: {type(e).__name__} - {e}")
+
+    def scrape(self):
+        with self.parse_stage():
+            self.scrape_pages()
+
+        # every queued course has been parsed and journaled by now
+        for page in self.pages_scraped:
+            self.page_completed(page)
+
+    def scrape_pages(self):
+        with self.timer.step("page_fetch"):
+            html = self.fetch(self.website_url)
+        with self.timer.step("listing_parse"):
+            self.soup = BeautifulSoup(html, "html.parser")
+        total_pages = self.num_pages()
+
+        for page in range(1, total_pages + 1):
+            if self.page_done(page):
+                self.log(f"\n=== Skipping completed page {page}/{total_pages} ===")
+                continue
+
+            url = self.page_url(page)
+            self.log(f"\n=== Scraping page {page}/{total_pages} ===")
+            self.log(f"URL: {url}")
+
+            try:
+                page_soup = self.soup
+                if page > 1:
+                    with self.timer.step("page_fetch"):
+                        html = self.fetch(url)
+                    with self.timer.step("listing_parse"):
+                        page_soup = BeautifulSoup(html, "html.parser")
+            except httpx.HTTPError as e:
+                self.failed_pages.append(page)
+                self.timer.count("page_errors")
+                self.log(f"HTTP error for page {page}: {type(e).__name__} - {e}")
+                continue
+
+            with self.timer.step("row_links"):
+                links = self.course_links(page_soup)
+            for course_name, detail_url in links:
+                self.scrape_course(course_name, detail_url, page)
+            self.pages_scraped.append(page)
@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field, asdict
+import json
+import os
+from catalog_db import (COLUMNS, connect, course_row, ensure_fingerprint_table, load_fingerprints, load_rows,
+                        refresh_requirements, refresh_search_index)
+from catalog_diff import refresh_diffs
+
+
+@dataclass
+class Changeset:
+    catalog_year: str
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def rows_written(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def report(self):
+        lines = [
+            f"[{self.catalog_year}] {len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        ]
+        for label, codes in (("+", self.added), ("~", self.changed), ("-", self.removed)):
+            for code in codes:
+                lines.append(f"  {label} {code}")
+        return "\n".join(lines)
+
+    def save(self, output_dir="logs"):
+        os.makedirs(output_dir, exist_ok=True)
+        filename = f"{output_dir}/{self.catalog_year}_changes.json"
+        with open(filename, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+        return filename
+
+
+def prepare(scraper, catalog_year, db_path):
+    """Loads the stored fingerprints so the scraper only parses courses whose HTML changed."""
+    conn = connect(db_path)
+    try:
+        scraper.known_fingerprints = load_fingerprints(conn, catalog_year)
+    finally:
+        conn.close()
+
+
+def apply_changes(scraper, catalog_year, db_path):
+    """
+    Diffs a finished incremental scrape against the courses table and writes
+    only the difference, in one transaction. Re-parsed courses whose row comes
+    out identical are not rewritten; courses that no longer appear in the
+    catalog are deleted.
+    """
+    conn = connect(db_path)
+    try:
+        existing = load_rows(conn, catalog_year)
+        changeset = Changeset(catalog_year, unchanged=len(scraper.unchanged_courses))
+
+        upserts = []
+        for course_data in scraper.all_courses:
+            row = course_row(course_data, catalog_year)
+            code = row[0]
+            if code not in existing:
+                changeset.added.append(code)
+                upserts.append(row)
+            elif existing[code] != row:
+                changeset.changed.append(code)
+                upserts.append(row)
+            else:
+                changeset.unchanged += 1
+
+        # a course is only gone if its whole listing was read and it did not fail to load
+        if not scraper.failed_pages:
+            missing = set(existing) - scraper.scraped_courses - set(scraper.failed_courses)
+            changeset.removed = sorted(missing)
+
+        with conn:
+            ensure_fingerprint_table(conn)
+            conn.executemany(
+                "DELETE FROM courses WHERE course_code = ? AND catalog_year = ?",
+                [(code, catalog_year) for code in changeset.removed + changeset.changed],
+            )
+            conn.executemany(
+                f"INSERT INTO courses ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                upserts,
+            )
+            if changeset.rows_written:
+                refresh_requirements(conn, catalog_year)
+                refresh_search_index(conn, catalog_year)
+                refresh_diffs(conn, catalog_year)
+            conn.execute("DELETE FROM course_fingerprints WHERE catalog_year = ?", (catalog_year,))
+            conn.executemany(
+                "INSERT INTO course_fingerprints (course_code, catalog_year, html_hash) VALUES (?, ?, ?)",
+                [(code, catalog_year, html_hash) for code, html_hash in scraper.fingerprints.items()],
+            )
+    finally:
+        conn.close()
+
+    return changeset
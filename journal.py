@@ -0,0 +1,88 @@
+from pathlib import Path
+import json
+import os
+
+
+class ProgressJournal:
+    """
+    Append-only JSON-lines record of a catalog scrape, one line per event:
+
+        {"event": "row", "page": 3, "row": "CSE 030 - Data Structures", "course": {...}}
+        {"event": "page", "page": 3}
+
+    A row event is written (and flushed) as soon as a course row is finished:
+    scraped (with its course dict), a duplicate, or an external link. Rows that
+    failed are never written, so they are retried on resume. A page event
+    means every row of that page finished.
+
+    With resume=True the existing journal is read back and appended to;
+    otherwise it is truncated. A half-written last line from a crash is dropped.
+    """
+    def __init__(self, path, resume=False, fsync=False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+
+        self.events = []
+        self.completed_pages = set()
+        self.completed_rows = set() # (page, row)
+
+        if resume and self.path.exists():
+            self.load()
+            self.file = open(self.path, "a")
+        else:
+            self.file = open(self.path, "w")
+
+    def load(self):
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_bytes += len(line)
+                self.track(event)
+
+        # cut off a truncated trailing line so new events start on a fresh line
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_bytes)
+
+    def track(self, event):
+        self.events.append(event)
+        if event["event"] == "page":
+            self.completed_pages.add(event["page"])
+        elif event["event"] == "row":
+            self.completed_rows.add((event["page"], event["row"]))
+
+    def write(self, event):
+        self.file.write(json.dumps(event) + "\n")
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.track(event)
+
+    def record_row(self, page, row, course=None, **extra):
+        event = {"event": "row", "page": page, "row": row}
+        if course is not None:
+            event["course"] = course
+        event.update(extra)
+        self.write(event)
+
+    def record_page(self, page):
+        if page not in self.completed_pages:
+            self.write({"event": "page", "page": page})
+
+    def page_done(self, page):
+        return page in self.completed_pages
+
+    def row_done(self, page, row):
+        return (page, row) in self.completed_rows
+
+    def row_events(self):
+        return [event for event in self.events if event["event"] == "row"]
+
+    def close(self):
+        self.file.close()
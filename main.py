@@ -1,7 +1,18 @@
-from scraper import Scraper
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from scraper import Scraper, PARSERS
+from http_scraper import HttpScraper
+from async_scraper import AsyncHttpScraper, HostRateLimiter
+from http_cache import ResponseCache
+from catalog_db import DB_PATH
+import incremental
+import metrics
+from parse_pipeline import init_worker
+from journal import ProgressJournal
+from sinks import NdjsonSink, ParquetSink, SqliteSink
+from browser_pool import DriverPool, PooledRun
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+import argparse
 import time
 import logging
 import os
@@ -13,6 +24,15 @@ CATALOGS: dict[str, str] = {
     "2025_2026": "https://catalog.ucmerced.edu/content.php?catoid=24&catoid=24&navoid=2732&filter%5Bitem_type%5D=3&filter%5Bonly_active%5D=1&filter%5B3%5D=1&filter%5Bcpage%5D=1#acalog_template_course_filter",
 }
 
+# Seconds a cached page stays fresh before it is revalidated with a conditional GET.
+# Past catalogs are frozen (never expire); the current catalog is revalidated every run.
+CACHE_TTL: dict[str, float | None] = {
+    "2022_2023": None,
+    "2023_2024": None,
+    "2024_2025": None,
+    "2025_2026": 0,
+}
+
 def setup_logger(year: str) -> logging.Logger:
     os.makedirs("logs", exist_ok=True)
 
@@ -31,45 +51,160 @@ def setup_logger(year: str) -> logging.Logger:
     return logger
 
 
-def scrape_catalog(year: str, url: str) -> tuple[str, Scraper]:
-    print(f"\n[{year}] Starting scraper...")
-    logger = setup_logger(year)
+def print_summary(year: str, scraper: Scraper):
+    print(f"\n[{year}] Scraping completed!")
+    print(f"[{year}] Total courses scraped: {scraper.course_count}")
+    print(f"[{year}] External links found: {len(scraper.external_link_classes)}")
+    if scraper.timer.samples:
+        print(f"\n[{year}] Time per step:\n{scraper.timer.report()}")
 
-    # ChromeDriver options
-    chrome_options = Options()
-    #chrome_options.add_argument("--headless")
+    if scraper.external_link_classes:
+        print(f"\n[{year}] External link classes (for manual review):")
+        for link in scraper.external_link_classes:
+            print(f"  - {link}")
 
-    driver = webdriver.Chrome(options=chrome_options)
 
-    try:
-        scraper = Scraper(driver, url, logger=logger)
-        scraper.scrape()
+@dataclass
+class RunOptions:
+    engine: str = "selenium"
+    parser: str = "bs4"
+    concurrency: int = 32 # async engine
+    incremental: bool = False
+    resume: bool = False
+    outputs: list[str] = field(default_factory=lambda: ["excel"])
+    # shared by every catalog so limits and caches hold across worker threads
+    rate_limiter: HostRateLimiter = field(default_factory=HostRateLimiter)
+    response_cache: ResponseCache | None = None
+    parse_executor: ProcessPoolExecutor | None = None
+    parse_ordered: bool = True # False takes parsed courses as their batch finishes
+    browsers: int = 4 # selenium engine
+    metrics_dir: str = metrics.METRICS_DIR
+
+
+class IncompleteCatalog(Exception):
+    """Some listing pages or courses of a catalog could not be scraped."""
+
+
+def open_journal(year: str, options: RunOptions) -> ProgressJournal:
+    return ProgressJournal(f"journal/{year}.jsonl", resume=options.resume)
+
+
+OUTPUTS = ["excel", "ndjson", "parquet", "sqlite"]
+
 
-        print(f"\n[{year}] Scraping completed!")
-        print(f"[{year}] Total courses scraped: {len(scraper.all_courses)}")
-        print(f"[{year}] External links found: {len(scraper.external_link_classes)}")
+def attach_sinks(scraper: Scraper, year: str, options: RunOptions, stack: ExitStack):
+    """
+    Opens the streaming outputs for a catalog; they are written course by course
+    and closed by the stack. Courses are only kept in memory when the Excel
+    export or an incremental diff needs them at the end.
+    """
+    if "ndjson" in options.outputs:
+        scraper.sinks.append(stack.enter_context(NdjsonSink(year)))
+    if "parquet" in options.outputs:
+        scraper.sinks.append(stack.enter_context(ParquetSink(year)))
+    if "sqlite" in options.outputs and not options.incremental:
+        scraper.sinks.append(stack.enter_context(SqliteSink(year, DB_PATH)))
+    scraper.keep_courses = "excel" in options.outputs or options.incremental
 
-        if scraper.external_link_classes:
-            print(f"\n[{year}] External link classes (for manual review):")
-            for link in scraper.external_link_classes:
-                print(f"  - {link}")
 
+def create_http_scraper(year: str, url: str, options: RunOptions, logger: logging.Logger) -> HttpScraper:
+    cache_ttl = CACHE_TTL.get(year, 0)
+    kwargs = dict(logger=logger, cache=options.response_cache, cache_ttl=cache_ttl, parser=options.parser,
+                  parse_executor=options.parse_executor, parse_ordered=options.parse_ordered)
+
+    if options.engine == "async":
+        return AsyncHttpScraper(url, concurrency=options.concurrency, rate_limiter=options.rate_limiter, **kwargs)
+    return HttpScraper(url, **kwargs)
+
+
+def scrape_catalog_http(year: str, url: str, options: RunOptions) -> tuple[str, Scraper]:
+    print(f"\n[{year}] Starting {options.engine} scraper...")
+    logger = setup_logger(year)
+
+    scraper = create_http_scraper(year, url, options, logger)
+    journal = open_journal(year, options)
+    try:
+        with ExitStack() as sinks:
+            attach_sinks(scraper, year, options, sinks)
+            if options.incremental:
+                incremental.prepare(scraper, year, DB_PATH)
+            scraper.resume_from(journal)
+
+            scraper.scrape()
+            incomplete = scraper.failed_pages or scraper.failed_courses
+            if incomplete:
+                # a partial catalog must not replace the previous outputs
+                for sink in scraper.sinks:
+                    sink.abort()
+        print_summary(year, scraper)
+
+        if options.incremental:
+            # courses that failed are left as they are in the database
+            changeset = incremental.apply_changes(scraper, year, DB_PATH)
+            print(changeset.report())
+            print(f"[{year}] Changeset saved to {changeset.save()}")
+        if incomplete:
+            raise IncompleteCatalog(f"{len(scraper.failed_pages)} listing pages and {len(scraper.failed_courses)} "
+                                    "courses failed, previous outputs kept")
         return year, scraper
 
     finally:
-        driver.quit()
-        print(f"[{year}] Driver closed.")
+        journal.close()
+        scraper.close()
+        print(f"[{year}] HTTP session closed.")
 
 
-def main():
-    num_workers: int = 4
-    print(f"\nScraping {len(CATALOGS)} UCM course catalogs.")
+def scrape_catalogs_selenium(options: RunOptions) -> dict[str, Scraper]:
+    """
+    Scrapes every catalog with one pool of warm headless browsers. The pages of
+    all catalogs are shared out between the browsers, see browser_pool.py.
+    """
+    scrapers = {}
+    with ExitStack() as stack:
+        for year, url in CATALOGS.items():
+            print(f"\n[{year}] Starting scraper...")
+            scraper = Scraper(None, url, logger=setup_logger(year), parser=options.parser)
+            journal = open_journal(year, options)
+            stack.callback(journal.close)
+            attach_sinks(scraper, year, options, stack)
+            scraper.resume_from(journal)
+            scrapers[year] = scraper
+
+        # entered last so the browsers are closed before the sinks and journals
+        pool = stack.enter_context(DriverPool(options.browsers))
+        run = PooledRun(pool, scrapers)
+        run.run()
+        print(f"\n{len(pool)} browsers closed ({run.queue.steals} pages stolen, {pool.recycled} browsers recycled).")
+
+        # a catalog missing its listing or some pages must not replace the previous outputs
+        failed_years = {task.year for task in run.failed_tasks}
+        for year in failed_years:
+            for sink in scrapers[year].sinks:
+                sink.abort()
+
+    for task in run.failed_tasks:
+        print(f"\n X [{task.year}] Gave up on {'page ' + str(task.page) if task.page else 'the listing'} "
+              f"after {task.attempt} attempts")
+
+    results = {}
+    for year, scraper in scrapers.items():
+        scraper.log(f"\nTime per step:\n{scraper.timer.report()}")
+        if year in failed_years:
+            print(f"\n X [{year}] Incomplete, previous outputs kept")
+            continue
+        print_summary(year, scraper)
+        results[year] = scraper
+    return results
+
+
+def scrape_catalogs_http(options: RunOptions) -> dict[str, Scraper]:
+    num_workers: int = len(CATALOGS)
     print(f'Using {num_workers} worker threads.')
 
     with ThreadPoolExecutor(max_workers=num_workers) as executor:
         futures = {}
         for year, url in CATALOGS.items():
-            future = executor.submit(scrape_catalog, year, url)
+            future = executor.submit(scrape_catalog_http, year, url, options)
             futures[future] = year
 
         results = {}
@@ -84,25 +219,121 @@ def main():
             except Exception as e:
                 print(f"\n X [{year}] Error: {e}")
 
-    print("\nSaving results to Excel files...")
+    return results
 
-    for year, scraper in results.items():
-        try:
-            scraper.save_to_excel(year)
-            print(f" O [{year}] Excel file saved successfully")
-        except Exception as e:
-            print(f" X [{year}] Error saving Excel: {e}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape the UC Merced course catalogs.")
+    parser.add_argument(
+        "--engine",
+        choices=["selenium", "http", "async"],
+        default="selenium",
+        help="selenium drives Chrome; http fetches the pages directly without a browser; "
+             "async fetches course details concurrently",
+    )
+    parser.add_argument("--browsers", type=int, default=4,
+                        help="headless Chrome sessions shared by all catalogs (selenium engine)")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="max in-flight requests per catalog (async engine)")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="max requests per second per host (async engine)")
+    parser.add_argument("--cache", action="store_true",
+                        help="cache responses in cache/ and revalidate them instead of re-downloading "
+                             "(http/async engines)")
+    parser.add_argument("--offline", action="store_true",
+                        help="replay pages from the response cache without touching the network")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"only re-parse courses whose HTML changed and apply the difference to {DB_PATH} "
+                             "(http/async engines)")
+    parser.add_argument("--parser", choices=PARSERS, default="bs4",
+                        help="parse_html backend; lxml gives the same output several times faster")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="parse course HTML in this many worker processes shared by all catalogs "
+                             "(http/async engines; 0 parses inline)")
+    parser.add_argument("--parse-order", choices=["listing", "completion"], default="listing",
+                        help="with --parse-workers, take parsed courses in listing order, or as soon as their "
+                             "batch is parsed (a duplicated course code may then keep a different row)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from journal/{year}.jsonl, skipping pages and courses already completed")
+    parser.add_argument("--metrics-dir", default=metrics.METRICS_DIR,
+                        help="where the per-catalog step timings and event counts are written "
+                             "(scraper_runs.jsonl and scraper.prom)")
+    parser.add_argument("--output", action="append", choices=OUTPUTS, dest="outputs",
+                        help="where to write the courses, may be repeated (default: excel). ndjson and parquet "
+                             f"stream to output/{{year}}.*, sqlite replaces the catalog year in {DB_PATH}")
+    args = parser.parse_args()
+
+    if args.offline and args.engine == "selenium":
+        parser.error("--offline replays the response cache and needs --engine http or async")
+    if args.incremental and args.engine == "selenium":
+        parser.error("--incremental needs --engine http or async")
+    if args.parse_workers and args.engine == "selenium":
+        parser.error("--parse-workers needs --engine http or async")
+    return args
+
+
+def main(options: RunOptions | None = None):
+    options = options or RunOptions()
+    start_time = time.perf_counter()
+    print(f"\nScraping {len(CATALOGS)} UCM course catalogs.")
+
+    if options.engine == "selenium":
+        print(f"Using {options.browsers} browsers.")
+        results = scrape_catalogs_selenium(options)
+    else:
+        results = scrape_catalogs_http(options)
+
+    if options.incremental:
+        # only changed courses were parsed; they have already been applied to the database
+        print(f"\nChanges applied to {DB_PATH}, skipping Excel export.")
+    elif "excel" in options.outputs:
+        print("\nSaving results to Excel files...")
+
+        for year, scraper in results.items():
+            try:
+                scraper.save_to_excel(year)
+                print(f" O [{year}] Excel file saved successfully")
+            except Exception as e:
+                print(f" X [{year}] Error saving Excel: {e}")
 
     print("\nFINAL SUMMARY")
     for year, scraper in results.items():
-        print(f"{year}: {len(scraper.all_courses)} courses scraped")
+        print(f"{year}: {scraper.course_count} courses scraped")
+
+    jsonl_path, prom_path = metrics.export(results, time.perf_counter() - start_time, options.engine,
+                                           options.metrics_dir)
+    print(f"\nMetrics appended to {jsonl_path} and written to {prom_path}")
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    options = RunOptions(
+        engine=args.engine,
+        parser=args.parser,
+        concurrency=args.concurrency,
+        browsers=args.browsers,
+        metrics_dir=args.metrics_dir,
+        incremental=args.incremental,
+        resume=args.resume,
+        outputs=args.outputs or ["excel"],
+        rate_limiter=HostRateLimiter(rate=args.rate),
+        parse_ordered=args.parse_order == "listing",
+    )
+    if args.cache or args.offline:
+        options.response_cache = ResponseCache("cache", offline=args.offline)
+    if args.parse_workers:
+        options.parse_executor = ProcessPoolExecutor(
+            max_workers=args.parse_workers, initializer=init_worker, initargs=(args.parser,)
+        )
+
     time_file = open("time_elapsed.txt", "w")
 
     start_time = time.time()
-    main()
+    try:
+        main(options)
+    finally:
+        if options.parse_executor is not None:
+            options.parse_executor.shutdown(cancel_futures=True)
     end_time = time.time()
 
     time_elapsed = end_time - start_time
@@ -0,0 +1,102 @@
+"""
+Export of the per-catalog step timings and event counts of a scrape run.
+
+Every run appends one JSON line per catalog to metrics/scraper_runs.jsonl, so
+runs can be compared over time, and rewrites metrics/scraper.prom in the
+Prometheus text exposition format (for node_exporter's textfile collector or
+any scraper of .prom files):
+
+    ucm_scraper_step_seconds_bucket{catalog_year="2025_2026",step="parse",le="0.001"} 1830
+    ucm_scraper_step_seconds_sum{catalog_year="2025_2026",step="parse"} 1.21
+    ucm_scraper_step_seconds_count{catalog_year="2025_2026",step="parse"} 2235
+    ucm_scraper_events_total{catalog_year="2025_2026",event="duplicates_skipped"} 4
+    ucm_scraper_courses{catalog_year="2025_2026"} 2235
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+from waits import LATENCY_BUCKETS, histogram
+
+METRICS_DIR = "metrics"
+PREFIX = "ucm_scraper"
+
+
+def catalog_metrics(year, scraper, run_id=None, engine=None, run_seconds=None):
+    """The metrics of one catalog as a JSON-serializable dict."""
+    timer = scraper.timer
+    return {
+        "run": run_id,
+        "engine": engine,
+        "run_seconds": run_seconds,
+        "catalog_year": year,
+        "courses": scraper.course_count,
+        "external_links": len(scraper.external_link_classes),
+        "steps": timer.summary(),
+        "histograms": timer.histograms(),
+        "events": dict(sorted(timer.counts.items())),
+    }
+
+
+def labels(**values):
+    return "{" + ",".join(f'{name}="{value}"' for name, value in values.items()) + "}"
+
+
+def prometheus_text(scrapers, run_seconds=None):
+    """The metrics of every catalog (year -> Scraper) in the Prometheus text format."""
+    catalogs = sorted(scrapers.items())
+    lines = [
+        f"# HELP {PREFIX}_step_seconds Wall-clock time of each scrape step.",
+        f"# TYPE {PREFIX}_step_seconds histogram",
+    ]
+    for year, scraper in catalogs:
+        for step, samples in sorted(scraper.timer.samples.items()):
+            for bound, count in histogram(samples, LATENCY_BUCKETS).items():
+                lines.append(f"{PREFIX}_step_seconds_bucket{labels(catalog_year=year, step=step, le=bound)} {count}")
+            lines.append(f"{PREFIX}_step_seconds_sum{labels(catalog_year=year, step=step)} {sum(samples):.6f}")
+            lines.append(f"{PREFIX}_step_seconds_count{labels(catalog_year=year, step=step)} {len(samples)}")
+
+    lines += [
+        f"# HELP {PREFIX}_events_total Scrape events: courses scraped, duplicates skipped, external links, "
+        "timeouts, errors.",
+        f"# TYPE {PREFIX}_events_total counter",
+    ]
+    for year, scraper in catalogs:
+        for event, count in sorted(scraper.timer.counts.items()):
+            lines.append(f"{PREFIX}_events_total{labels(catalog_year=year, event=event)} {count}")
+
+    lines += [
+        f"# HELP {PREFIX}_courses Courses of the catalog after the run.",
+        f"# TYPE {PREFIX}_courses gauge",
+    ]
+    for year, scraper in catalogs:
+        lines.append(f"{PREFIX}_courses{labels(catalog_year=year)} {scraper.course_count}")
+
+    if run_seconds is not None:
+        lines += [
+            f"# HELP {PREFIX}_run_seconds Wall-clock time of the whole run.",
+            f"# TYPE {PREFIX}_run_seconds gauge",
+            f"{PREFIX}_run_seconds {run_seconds:.3f}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def export(scrapers, run_seconds=None, engine=None, metrics_dir=METRICS_DIR):
+    """
+    Appends the metrics of every catalog (year -> Scraper) to scraper_runs.jsonl
+    and rewrites scraper.prom; returns the two paths.
+    """
+    metrics_dir = Path(metrics_dir)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    run_id = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    jsonl_path = metrics_dir / "scraper_runs.jsonl"
+    with open(jsonl_path, "a", encoding="utf-8") as f:
+        for year, scraper in sorted(scrapers.items()):
+            f.write(json.dumps(catalog_metrics(year, scraper, run_id, engine, run_seconds)) + "\n")
+
+    prom_path = metrics_dir / "scraper.prom"
+    # written next to the target and renamed, so a collector never reads half a file
+    tmp_path = prom_path.with_suffix(".prom.tmp")
+    tmp_path.write_text(prometheus_text(scrapers, run_seconds), encoding="utf-8")
+    tmp_path.replace(prom_path)
+    return jsonl_path, prom_path
@@ -0,0 +1,133 @@
+from collections import deque
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from scraper import Scraper
+
+# one Scraper per worker process, created by init_worker
+worker_scraper = None
+
+
+def init_worker(parser):
+    global worker_scraper
+    worker_scraper = Scraper(None, "", parser=parser)
+
+
+def parse_batch(fragments, parser="bs4"):
+    """
+    Runs parse_html over a batch of fragments in a worker process. A fragment
+    that fails to parse yields its exception instead of failing the batch.
+    """
+    scraper = worker_scraper if worker_scraper is not None else Scraper(None, "", parser=parser)
+    results = []
+    for raw_html in fragments:
+        try:
+            results.append(scraper.parse_html(raw_html))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class ParsePipeline:
+    """
+    Producer/consumer parse stage. Fetchers submit (key, raw_html); fragments
+    are grouped into batches and parsed by a process pool, and every result is
+    handed to on_result(key, course_data_or_exception) on the submitting thread.
+
+    At most max_pending batches are in flight: submit blocks until a batch
+    completes, so a fast fetcher cannot queue unbounded HTML in memory. With
+    ordered=True results come back in submission order; otherwise as soon as
+    each batch completes. Leaving the pipeline with an exception cancels the
+    queued batches and shuts the pool down without waiting for them.
+    """
+    def __init__(self, on_result, workers=None, parser="bs4", batch_size=32, max_pending=None,
+                 ordered=True, executor=None):
+        self.on_result = on_result
+        self.parser = parser
+        self.batch_size = batch_size
+        self.ordered = ordered
+
+        self.owns_executor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(parser,))
+        self.executor = executor
+        self.max_pending = max_pending if max_pending is not None else 2 * (workers or os.cpu_count() or 1)
+
+        self.batch_keys = []
+        self.batch_fragments = []
+        self.in_flight = deque() # (keys, future)
+
+    @property
+    def capacity(self):
+        """Fragments the pipeline holds before submit blocks."""
+        return self.max_pending * self.batch_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def submit(self, key, raw_html):
+        self.batch_keys.append(key)
+        self.batch_fragments.append(raw_html)
+        if len(self.batch_fragments) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch_fragments:
+            return
+
+        while len(self.in_flight) >= self.max_pending:
+            self.deliver(block=True)
+
+        future = self.executor.submit(parse_batch, self.batch_fragments, self.parser)
+        self.in_flight.append((self.batch_keys, future))
+        self.batch_keys = []
+        self.batch_fragments = []
+        self.deliver(block=False)
+
+    def deliver(self, block):
+        """Hands completed batches to on_result; with block=True waits for at least one."""
+        if not self.in_flight:
+            return
+
+        if self.ordered:
+            if block:
+                self.in_flight[0][1].result()
+            while self.in_flight and self.in_flight[0][1].done():
+                self.emit(*self.in_flight.popleft())
+        else:
+            futures = [future for _, future in self.in_flight]
+            done, _ = wait(futures, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for entry in [entry for entry in self.in_flight if entry[1] in done]:
+                self.in_flight.remove(entry)
+                self.emit(*entry)
+
+    def emit(self, keys, future):
+        for key, result in zip(keys, future.result()):
+            self.on_result(key, result)
+
+    def close(self):
+        try:
+            self.flush()
+            while self.in_flight:
+                self.deliver(block=True)
+        except BaseException:
+            self.abort()
+            raise
+
+        if self.owns_executor:
+            self.executor.shutdown()
+
+    def abort(self):
+        for _, future in self.in_flight:
+            future.cancel()
+        self.in_flight.clear()
+        self.batch_keys = []
+        self.batch_fragments = []
+
+        if self.owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -4,23 +4,44 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
-import time
+from collections import Counter
+import threading
 import pandas as pd
+import fast_parser
+from waits import AdaptiveWait, StepTimer
+
+PARSERS = ("bs4", "lxml")
+
+# the course link of a listing row
+ROW_LINK_SELECTOR = "td.width a"
 
 
 class Scraper:
-    def __init__(self, driver, website_url, logger=None):
+    def __init__(self, driver, website_url, logger=None, parser="bs4"):
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser '{parser}', expected one of {PARSERS}")
+
         self.driver = driver
         self.soup = None
         self.website_url = website_url
         self.logger = logger
+        self.parser = parser # backend used by parse_html
 
-        self.all_courses = [] # list of course_data dicts
+        self.all_courses = [] # list of course_data dicts, unless keep_courses is False
+        self.keep_courses = True
+        self.course_count = 0
+        self.sinks = [] # CourseSinks fed every accepted course, see sinks.py
         self.external_link_classes = [] # for manual review
         self.scraped_courses = set() # set to track already-scraped course codes
 
+        self.journal = None # ProgressJournal, see resume_from()
+        self.page_failures = Counter() # page -> rows that failed and must be retried
+        self.lock = threading.Lock() # pages of one catalog can be scraped from several threads
+
+        self.timer = StepTimer() # wall-clock time per scrape step, see waits.py
+        self.waits = AdaptiveWait(driver, self.timer)
+
     def log(self, message):
         if self.logger:
             self.logger.info(message)
@@ -54,105 +75,177 @@ class Scraper:
         total_pages = int(page_td.text[-2:])
         self.log(f"Total number of pages in pagination: {total_pages}.")
         return total_pages
+
+    def page_url(self, page):
+        # Replace the page number in the URL (filter%5Bcpage%5D is filter[cpage] URL-encoded)
+        return self.website_url.replace("filter%5Bcpage%5D=1", f"filter%5Bcpage%5D={page}")
+
+    def add_course(self, course_data):
+        # Check if this course has already been scraped
+        course_code = course_data.get('course code', 'Unknown')
+        with self.lock:
+            with self.timer.step("dedup"):
+                duplicate = course_code in self.scraped_courses
+            if duplicate:
+                self.timer.count("duplicates_skipped")
+                self.log(f"  -> Skipping duplicate: {course_code}")
+                return False
+
+            # Add to scraped set and courses list
+            self.scraped_courses.add(course_code)
+            with self.timer.step("save"):
+                self.store_course(course_data)
+            self.timer.count("courses_scraped")
+        self.log(f"  -> Scraped: {course_code}")
+        return True
+
+    def store_course(self, course_data):
+        self.course_count += 1
+        if self.keep_courses:
+            self.all_courses.append(course_data)
+        for sink in self.sinks:
+            sink.write(course_data)
+
+    def resume_from(self, journal):
+        """Restores the courses already recorded in the journal and keeps appending to it."""
+        self.journal = journal
+        for event in journal.row_events():
+            self.restore_row(event)
+        if journal.events:
+            self.log(f"Resumed {self.course_count} courses and {len(journal.completed_pages)} "
+                     f"completed pages from {journal.path}")
+
+    def restore_row(self, event):
+        if event.get("external"):
+            self.external_link_classes.append(event["row"])
+        course_data = event.get("course")
+        if course_data is not None:
+            self.scraped_courses.add(course_data["course code"])
+            self.store_course(course_data)
+
+    def row_done(self, page, course_name):
+        return self.journal is not None and self.journal.row_done(page, course_name)
+
+    def page_done(self, page):
+        return self.journal is not None and self.journal.page_done(page)
+
+    def row_completed(self, page, course_name, course_data=None, **extra):
+        if self.journal is not None:
+            with self.lock:
+                self.journal.record_row(page, course_name, course_data, **extra)
+
+    def row_failed(self, page):
+        with self.lock:
+            self.page_failures[page] += 1
+
+    def page_completed(self, page):
+        if self.journal is not None and not self.page_failures[page]:
+            with self.lock:
+                self.journal.record_page(page)
     
 
-    """
-    Example of EC :
-        element = WebDriverWait(driver, 10).until(
-        EC.visibility_of_element_located(locator)
-    )
-    """
-    def scrape(self):
-        self.driver.get(self.website_url)
-        self.soup = BeautifulSoup(self.driver.page_source, "html.parser")
+    def load_listing(self, driver=None):
+        """Opens the first listing page and returns the number of pages."""
+        driver = driver or self.driver
+        with self.timer.step("page_load"):
+            driver.get(self.website_url)
+        # the pagination cell is in the last listing table
+        self.waits.until("listing", EC.presence_of_element_located((By.CSS_SELECTOR, "table.table_default")), driver)
+        self.soup = BeautifulSoup(driver.page_source, "html.parser")
+        return self.num_pages()
 
-        time.sleep(5)
-        total_pages = self.num_pages()
+    def scrape(self):
+        total_pages = self.load_listing()
 
         for page in range(1, total_pages + 1):
-            # Replace the page number in the URL (filter%5Bcpage%5D is filter[cpage] URL-encoded)
-            url = self.website_url.replace("filter%5Bcpage%5D=1", f"filter%5Bcpage%5D={page}")
-            self.log(f"\n=== Scraping page {page}/{total_pages} ===")
-            self.log(f"URL: {url}")
-            self.driver.get(url)
-            
-            time.sleep(2)
-
-            last_table = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "table:last-of-type"))
-            )
-
+            if self.page_done(page):
+                self.log(f"\n=== Skipping completed page {page}/{total_pages} ===")
+                continue
+            self.scrape_page(page, total_pages)
+
+        self.log(f"\nTime per step:\n{self.timer.report()}")
+
+    def scrape_page(self, page, total_pages, driver=None):
+        """
+        Scrapes every course row of one listing page with driver (self.driver by
+        default). Pages of the same catalog may be scraped by several drivers at
+        once, see browser_pool.py.
+        """
+        driver = driver or self.driver
+        url = self.page_url(page)
+        self.log(f"\n=== Scraping page {page}/{total_pages} ===")
+        self.log(f"URL: {url}")
+        with self.timer.step("page_load"):
+            driver.get(url)
+
+        last_table = self.waits.until(
+            "listing", EC.presence_of_element_located((By.CSS_SELECTOR, "table:last-of-type")), driver
+        )
 
-            rows = last_table.find_elements(By.TAG_NAME, "tr")
-            for row_index in range(len(rows)):
+        # every course link of the page in one lookup; header and pagination rows have none
+        with self.timer.step("row_links"):
+            links = last_table.find_elements(By.CSS_SELECTOR, ROW_LINK_SELECTOR)
 
-                rows = last_table.find_elements(By.TAG_NAME, "tr")
-                row = rows[row_index]
+        for row_index, link_to_click in enumerate(links):
+            try:
+                course_name = link_to_click.text
 
-                try:
-                    td = row.find_element(By.CLASS_NAME, "width")
-                    link_to_click = td.find_element(By.TAG_NAME, "a")
-                    course_name = link_to_click.text
+                if self.row_done(page, course_name):
+                    self.log(f"Already completed: {course_name}")
+                    continue
 
-                    self.log(f"Clicking on: {course_name}")
+                self.log(f"Clicking on: {course_name}")
+                with self.timer.step("row_click"):
                     link_to_click.click()
 
-                    WebDriverWait(self.driver, 10).until(
-                        EC.any_of(
-                            EC.presence_of_element_located((By.CLASS_NAME, "coursepadding")),
-                            EC.number_of_windows_to_be(2)
-                        )
-                    )
-
-                    if len(self.driver.window_handles) > 1:
-                        self.log(f"  -> External link detected for {course_name}")
-                        self.external_link_classes.append(course_name)
-                        self.driver.switch_to.window(self.driver.window_handles[1])
-                        self.driver.close()
-                        self.driver.switch_to.window(self.driver.window_handles[0])
-                    else:
-                        # Dropdown appeared, extract the course data
-                        dropdown_td = WebDriverWait(self.driver, 5).until(
-                            EC.presence_of_element_located((By.CLASS_NAME, "coursepadding"))
-                        )
-                        dropdown_html = dropdown_td.get_attribute("outerHTML")
+                self.waits.until("dropdown_open", EC.any_of(
+                    EC.presence_of_element_located((By.CLASS_NAME, "coursepadding")),
+                    EC.number_of_windows_to_be(2)
+                ), driver)
+
+                if len(driver.window_handles) > 1:
+                    self.log(f"  -> External link detected for {course_name}")
+                    self.external_link_classes.append(course_name)
+                    self.timer.count("external_links")
+                    with self.timer.step("external_link"):
+                        driver.switch_to.window(driver.window_handles[1])
+                        driver.close()
+                        driver.switch_to.window(driver.window_handles[0])
+                    self.row_completed(page, course_name, external=True)
+                else:
+                    # Dropdown appeared, extract the course data
+                    dropdown_td = driver.find_element(By.CLASS_NAME, "coursepadding")
+                    dropdown_html = dropdown_td.get_attribute("outerHTML")
+                    with self.timer.step("parse"):
                         course_data = self.parse_html(dropdown_html)
+                    added = self.add_course(course_data)
+                    self.row_completed(page, course_name, course_data if added else None)
 
-                        # Check if this course has already been scraped
-                        course_code = course_data.get('course code', 'Unknown')
-                        if course_code in self.scraped_courses:
-                            self.log(f"  -> Skipping duplicate: {course_code}")
-                        else:
-                            # Add to scraped set and courses list
-                            self.scraped_courses.add(course_code)
-                            self.all_courses.append(course_data)
-                            self.log(f"  -> Scraped: {course_code}")
-
-                        time.sleep(0.5)
-
-                        rows = last_table.find_elements(By.TAG_NAME, "tr")
-                        row = rows[row_index]
-                        td = row.find_element(By.CLASS_NAME, "width")
-                        link_to_click = td.find_element(By.TAG_NAME, "a")
-
-                        # Click again to close the dropdown
+                    # Click again to close the dropdown
+                    with self.timer.step("row_click"):
                         link_to_click.click()
 
-                        # Wait for dropdown to close
-                        WebDriverWait(self.driver, 10).until(
-                            EC.invisibility_of_element_located((By.CLASS_NAME, "coursepadding"))
-                        )
-                        self.log(f"  -> Dropdown closed for {course_name}")
-
-                except TimeoutException as e:
-                    self.log(f"Timeout waiting for dropdown/window for row {row_index}: {e}")
-                except StaleElementReferenceException as e:
-                    self.log(f"Stale element for row {row_index}: {e}")
-                except NoSuchElementException as e:
-                    self.log(f"Element not found in row {row_index}: {e}")
-                except Exception as e:
-                    self.log(f"Unexpected error for row {row_index}: {type(e).__name__} - {e}")
-
+                    self.waits.until("dropdown_close", EC.invisibility_of_element_located((By.CLASS_NAME, "coursepadding")), driver)
+                    self.log(f"  -> Dropdown closed for {course_name}")
+
+            except TimeoutException as e:
+                self.row_failed(page)
+                self.timer.count("timeouts")
+                self.log(f"Timeout waiting for dropdown/window for row {row_index}: {e}")
+            except StaleElementReferenceException as e:
+                self.row_failed(page)
+                self.timer.count("stale_elements")
+                self.log(f"Stale element for row {row_index}: {e}")
+            except NoSuchElementException as e:
+                self.row_failed(page)
+                self.timer.count("missing_elements")
+                self.log(f"Element not found in row {row_index}: {e}")
+            except Exception as e:
+                self.row_failed(page)
+                self.timer.count("row_errors")
+                self.log(f"Unexpected error for row {row_index}: {type(e).__name__} - {e}")
+
+        self.page_completed(page)
 
 
     def parse_course_titles(self, course_soup, course_data):
@@ -235,7 +328,9 @@ class Scraper:
                 course_data[key] = "N/A"
 
     def parse_html(self, raw_html):
-        
+        if self.parser == "lxml":
+            return fast_parser.parse_course(raw_html)
+
         course_soup = BeautifulSoup(raw_html, "html.parser")
         if not course_soup:
             raise Exception("Cannot parse page because self.soup is not initalized")
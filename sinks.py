@@ -0,0 +1,176 @@
+"""
+Streaming writers for scraped courses. A sink receives each course as soon as
+Scraper.add_course accepts it, so nothing has to be held in memory until the
+end of the run, and list fields keep their native types instead of going
+through the stringified Excel round-trip.
+"""
+from pathlib import Path
+import json
+from catalog_db import (COLUMNS, connect, course_record, course_row, ensure_courses_table, refresh_requirements,
+                        refresh_search_index)
+from catalog_diff import refresh_diffs
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+OUTPUT_DIR = "output"
+
+
+class CourseSink:
+    def __init__(self, catalog_year):
+        self.catalog_year = catalog_year
+        self.count = 0
+        self.aborted = False
+
+    def write(self, course_data):
+        self.count += 1
+
+    def abort(self):
+        """Makes close() discard what was written and keep the previous output."""
+        self.aborted = True
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        self.close()
+
+
+def finish(tmp_path, path, aborted):
+    """
+    Files are written next to their target and renamed over it on close, so an
+    aborted run leaves the previous file in place.
+    """
+    if aborted:
+        tmp_path.unlink(missing_ok=True)
+    else:
+        tmp_path.replace(path)
+
+
+class NdjsonSink(CourseSink):
+    """One JSON object per line, keyed by courses column."""
+    def __init__(self, catalog_year, output_dir=OUTPUT_DIR):
+        super().__init__(catalog_year)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(output_dir) / f"{catalog_year}.ndjson"
+        self.tmp_path = self.path.with_suffix(".ndjson.tmp")
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+
+    def write(self, course_data):
+        super().write(course_data)
+        self.file.write(json.dumps(course_record(course_data, self.catalog_year), ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        finish(self.tmp_path, self.path, self.aborted)
+
+
+def parquet_schema():
+    return pa.schema([
+        ("course_code", pa.string()),
+        ("course_name", pa.string()),
+        # a single value is stored as a one-element list, a range as [min, max]
+        ("credits", pa.list_(pa.int64())),
+        ("course_description", pa.string()),
+        ("prereqs", pa.list_(pa.string())),
+        ("coreqs", pa.list_(pa.string())),
+        ("class_levels", pa.list_(pa.string())),
+        ("repeats_allowed_for_credit", pa.int64()),
+        ("catalog_year", pa.string()),
+    ])
+
+
+class ParquetSink(CourseSink):
+    """Buffers batch_size courses and writes each batch as one Parquet row group."""
+    def __init__(self, catalog_year, output_dir=OUTPUT_DIR, batch_size=1000):
+        if pa is None:
+            raise RuntimeError("ParquetSink requires pyarrow (pip install pyarrow)")
+
+        super().__init__(catalog_year)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(output_dir) / f"{catalog_year}.parquet"
+        self.tmp_path = self.path.with_suffix(".parquet.tmp")
+        self.schema = parquet_schema()
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self.batch_size = batch_size
+        self.batch = []
+
+    def write(self, course_data):
+        super().write(course_data)
+        record = course_record(course_data, self.catalog_year)
+        if isinstance(record["credits"], int):
+            record["credits"] = [record["credits"]]
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.writer.write_table(pa.Table.from_pylist(self.batch, schema=self.schema))
+            self.batch = []
+
+    def close(self):
+        if not self.aborted:
+            self.flush()
+        self.writer.close()
+        finish(self.tmp_path, self.path, self.aborted)
+
+
+class SqliteSink(CourseSink):
+    """
+    Writes into the courses table, replacing the catalog year's rows.
+    Rows are inserted batch_size at a time into a temporary staging table of
+    this connection, so catalogs scraped in parallel can share the database
+    file without holding its write lock. On close the year's rows are swapped
+    for the staged ones in one transaction and the year's course_requirements,
+    search index and diffs are rebuilt. An aborted sink (closed by an
+    exception, see CourseSink.__exit__) or one that got no courses leaves the
+    year's old rows as they were.
+    """
+    def __init__(self, catalog_year, db_path, batch_size=500):
+        super().__init__(catalog_year)
+        self.conn = connect(db_path)
+        ensure_courses_table(self.conn)
+        self.conn.execute(f"CREATE TEMP TABLE staged_courses AS SELECT {', '.join(COLUMNS)} FROM courses WHERE 0")
+        self.batch_size = batch_size
+        self.batch = []
+
+    def write(self, course_data):
+        super().write(course_data)
+        self.batch.append(course_row(course_data, self.catalog_year))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO staged_courses ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                self.batch,
+            )
+        self.batch = []
+
+    def close(self):
+        try:
+            if self.aborted or not self.count:
+                return
+            self.flush()
+            with self.conn:
+                self.conn.execute("DELETE FROM courses WHERE catalog_year = ?", (self.catalog_year,))
+                self.conn.execute(
+                    f"INSERT INTO courses ({', '.join(COLUMNS)}) SELECT {', '.join(COLUMNS)} FROM staged_courses"
+                )
+                refresh_requirements(self.conn, self.catalog_year)
+                refresh_search_index(self.conn, self.catalog_year)
+                refresh_diffs(self.conn, self.catalog_year)
+        finally:
+            # the staging table goes with the connection
+            self.conn.close()
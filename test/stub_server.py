@@ -0,0 +1,99 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+import hashlib
+import threading
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+CATALOG_PATH = "/content.php?catoid=24&catoid=24&navoid=2732&filter%5Bitem_type%5D=3&filter%5Bonly_active%5D=1&filter%5B3%5D=1&filter%5Bcpage%5D=1#acalog_template_course_filter"
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """Serves recorded Acalog listing pages and course fragments from FIXTURES_DIR."""
+    protocol_version = "HTTP/1.1"
+    # buffer header and body into one write so keep-alive responses are not held back by Nagle
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    def resolve(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+
+        if parsed.path == "/content.php":
+            page = query.get("filter[cpage]", ["1"])[0]
+            return self.server.fixtures_dir / f"listing_{page}.html"
+
+        if parsed.path == "/ajax/preview_course.php":
+            coid = query.get("coid", [""])[0]
+            return self.server.fixtures_dir / "courses" / f"{coid}.html"
+
+        return None
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+
+        with self.server.lock:
+            failing = self.server.fail_next > 0
+            if failing:
+                self.server.fail_next -= 1
+        if failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        fixture = self.resolve()
+        if fixture is None or not fixture.is_file():
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = fixture.read_bytes()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CatalogStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        super().__init__(("127.0.0.1", 0), CatalogHandler)
+        self.fixtures_dir = Path(fixtures_dir)
+        self.requests = []
+        self.fail_next = 0  # answer this many upcoming requests with 503
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def catalog_url(self):
+        return self.base_url + CATALOG_PATH
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
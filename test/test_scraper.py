@@ -0,0 +1,719 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+import re
+import shutil
+import subprocess
+import time
+import threading
+import sqlite3
+from collections import Counter
+import httpx
+import pytest
+import incremental
+import catalog_loader
+import metrics
+from scraper import Scraper
+from http_scraper import HttpScraper
+from async_scraper import AsyncHttpScraper, TokenBucket
+from http_cache import ResponseCache
+from parse_pipeline import ParsePipeline
+from journal import ProgressJournal
+from sinks import NdjsonSink, ParquetSink, SqliteSink
+from test.stub_server import CatalogStubServer, FIXTURES_DIR
+from benchmarks.corpus import load_corpus, write_catalog
+from catalog_db import ensure_courses_table
+from waits import AdaptiveWait, StepTimer
+from browser_pool import DriverPool, PooledRun
+from selenium.common.exceptions import WebDriverException
+
+
+@pytest.fixture
+def server():
+    with CatalogStubServer() as server:
+        yield server
+
+
+def test_http_scrape(server):
+    scraper = HttpScraper(server.catalog_url)
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+
+    codes = [course["course code"] for course in scraper.all_courses]
+    assert codes == ["CSE 030", "CSE 031", "CSE 095", "CSE 150", "MATH 024", "BIO 127LA"]
+    assert scraper.external_link_classes == ["CSE 019 - Introduction to Computing (see Engineering catalog)"]
+
+
+def test_http_matches_parse_html(server):
+    scraper = HttpScraper(server.catalog_url)
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+
+    cse_150 = next(c for c in scraper.all_courses if c["course code"] == "CSE 150")
+    assert cse_150["credits"] == 4
+    assert cse_150["prereqs"] == ["CSE 031 or EE 060", "CSE 100", "MATH 024"]
+    assert cse_150["class levels"] == ["Junior", "Senior"]
+
+    cse_095 = next(c for c in scraper.all_courses if c["course code"] == "CSE 095")
+    assert cse_095["credits"] == [1, 5]
+
+
+def test_http_missing_course(server, tmp_path):
+    (tmp_path / "courses").mkdir()
+    for name in ["listing_1.html", "listing_2.html"]:
+        (tmp_path / name).write_text((server.fixtures_dir / name).read_text())
+    server.fixtures_dir = tmp_path
+
+    scraper = HttpScraper(server.catalog_url)
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+
+    assert scraper.all_courses == []
+    assert len(scraper.external_link_classes) == 1
+
+
+def test_async_scrape_matches_http(server):
+    http_scraper = HttpScraper(server.catalog_url)
+    try:
+        http_scraper.scrape()
+    finally:
+        http_scraper.close()
+
+    async_scraper = AsyncHttpScraper(server.catalog_url, concurrency=4)
+    async_scraper.scrape()
+
+    assert async_scraper.all_courses == http_scraper.all_courses
+    assert async_scraper.external_link_classes == http_scraper.external_link_classes
+
+
+def test_async_retries_server_errors(server):
+    server.fail_next = 2
+    scraper = AsyncHttpScraper(server.catalog_url, retries=3, backoff=0.01)
+    scraper.scrape()
+
+    assert len(scraper.all_courses) == 6
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    delays = [bucket.reserve() for _ in range(5)]
+
+    assert delays[0] == 0
+    assert delays[-1] == pytest.approx(0.04, abs=0.005)
+
+
+def scrape_http(url, **kwargs):
+    scraper = HttpScraper(url, **kwargs)
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+    return scraper
+
+
+def test_cache_frozen_catalog_skips_network(server, tmp_path):
+    cache = ResponseCache(tmp_path)
+    first = scrape_http(server.catalog_url, cache=cache, cache_ttl=None)
+    requests_made = len(server.requests)
+
+    second = scrape_http(server.catalog_url, cache=cache, cache_ttl=None)
+
+    assert len(server.requests) == requests_made
+    assert second.all_courses == first.all_courses
+
+
+def test_cache_revalidates_with_etag(server, tmp_path):
+    cache = ResponseCache(tmp_path)
+    first = scrape_http(server.catalog_url, cache=cache, cache_ttl=0)
+    blobs = sorted(p.name for p in (tmp_path / "blobs").rglob("*") if p.is_file())
+
+    server.requests.clear()
+    second = AsyncHttpScraper(server.catalog_url, cache=cache, cache_ttl=0)
+    second.scrape()
+
+    assert len(server.requests) == 9
+    assert second.all_courses == first.all_courses
+    assert sorted(p.name for p in (tmp_path / "blobs").rglob("*") if p.is_file()) == blobs
+
+
+def test_cache_offline_replay(server, tmp_path):
+    online = scrape_http(server.catalog_url, cache=ResponseCache(tmp_path))
+    url = server.catalog_url
+    server.shutdown()
+
+    offline = scrape_http(url, cache=ResponseCache(tmp_path, offline=True))
+
+    assert offline.all_courses == online.all_courses
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10)
+    cache.store("http://a", b"aaaa")
+    cache.store("http://b", b"bbbb")
+    cache.lookup("http://a")
+    cache.store("http://c", b"cccc")
+
+    assert cache.lookup("http://a") is not None
+    assert cache.lookup("http://b") is None
+    assert cache.lookup("http://c") is not None
+    assert cache.total_bytes() == 8
+
+
+def test_cache_store_while_blob_released(tmp_path):
+    # catalogs share the cache: another thread may drop the last entry of a blob while it is stored again
+    cache = ResponseCache(tmp_path)
+    content_hash = cache.store("http://a", b"same body")
+
+    with cache.lock:
+        thread = threading.Thread(target=cache.store, args=("http://b", b"same body"))
+        thread.start()
+        time.sleep(0.1)
+        cache.conn.execute("DELETE FROM entries WHERE url = 'http://a'")
+        assert cache.release_blob(content_hash)
+    thread.join()
+
+    assert cache.lookup("http://b").body == b"same body"
+
+
+def test_cache_missing_blob_is_a_miss(server, tmp_path):
+    cache = ResponseCache(tmp_path / "cache")
+    url = str(httpx.URL(server.catalog_url).copy_with(fragment=None))
+    content_hash = cache.store(url, b"stale")
+    cache.blob_path(content_hash).unlink()
+
+    assert cache.lookup(url) is None
+    scraper = HttpScraper(server.catalog_url, cache=cache, cache_ttl=None)
+    try:
+        assert "table_default" in scraper.fetch(server.catalog_url)
+    finally:
+        scraper.close()
+    assert b"table_default" in cache.lookup(url).body
+
+
+def create_catalog_db(path):
+    conn = sqlite3.connect(path)
+    ensure_courses_table(conn)
+    conn.commit()
+    conn.close()
+
+
+def incremental_scrape(url, db_path):
+    scraper = HttpScraper(url)
+    incremental.prepare(scraper, "2025_2026", db_path)
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+    return scraper, incremental.apply_changes(scraper, "2025_2026", db_path)
+
+
+def test_incremental_scrape(server, tmp_path):
+    fixtures = tmp_path / "fixtures"
+    shutil.copytree(server.fixtures_dir, fixtures)
+    server.fixtures_dir = fixtures
+    db_path = tmp_path / "catalog.db"
+    create_catalog_db(db_path)
+
+    _, first = incremental_scrape(server.catalog_url, db_path)
+    assert len(first.added) == 6
+
+    scraper, second = incremental_scrape(server.catalog_url, db_path)
+    assert scraper.all_courses == []
+    assert second.rows_written == 0
+    assert second.unchanged == 6
+
+    course = fixtures / "courses" / "54005.html"
+    course.write_text(course.read_text().replace("Units: 4", "Units: 3"))
+    listing = fixtures / "listing_2.html"
+    listing.write_text(listing.read_text().replace("coid=54006", "coid=99999"))
+
+    scraper, third = incremental_scrape(server.catalog_url, db_path)
+    assert [c["course code"] for c in scraper.all_courses] == ["MATH 024"]
+    assert third.changed == ["MATH 024"]
+    assert third.removed == []  # BIO 127LA failed to load, it is not treated as removed
+
+    listing.write_text(re.sub(r"<tr>(?:(?!</tr>).)*coid=99999.*?</tr>", "", listing.read_text(), flags=re.S))
+    _, fourth = incremental_scrape(server.catalog_url, db_path)
+    assert fourth.removed == ["BIO 127LA"]
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT course_code, credits FROM courses ORDER BY course_code").fetchall()
+    conn.close()
+    assert ("MATH 024", "3") in rows
+    assert len(rows) == 5
+
+
+def test_lxml_parser_parity():
+    fragments = load_corpus(limit=400)
+    bs4_scraper = Scraper(None, "", parser="bs4")
+    lxml_scraper = Scraper(None, "", parser="lxml")
+
+    for fragment in fragments:
+        assert lxml_scraper.parse_html(fragment) == bs4_scraper.parse_html(fragment)
+
+
+def test_unknown_parser():
+    with pytest.raises(ValueError):
+        Scraper(None, "", parser="html5lib")
+
+
+def fixture_fragments():
+    return [path.read_text() for path in sorted((FIXTURES_DIR / "courses").glob("*.html"))]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_parse_pipeline(ordered):
+    fragments = fixture_fragments() * 5 + ["<div><h3>X 001: Broken</h3>Units: four<br></div>"]
+    results = {}
+    with ParsePipeline(results.__setitem__, workers=2, batch_size=4, max_pending=2, ordered=ordered) as pipeline:
+        for i, fragment in enumerate(fragments):
+            pipeline.submit(i, fragment)
+            assert len(pipeline.in_flight) <= 2
+
+    if ordered:
+        assert list(results) == list(range(len(fragments)))
+    scraper = Scraper(None, "")
+    assert [results[i] for i in range(len(fragments) - 1)] == [scraper.parse_html(f) for f in fragments[:-1]]
+    assert isinstance(results[len(fragments) - 1], ValueError)
+
+
+def test_parse_pipeline_aborts_on_error():
+    with pytest.raises(RuntimeError):
+        with ParsePipeline(lambda key, result: None, workers=1, batch_size=1) as pipeline:
+            for fragment in fixture_fragments():
+                pipeline.submit(fragment, fragment)
+            raise RuntimeError("fetcher failed")
+
+    assert not pipeline.in_flight
+
+
+def test_http_scrape_with_parse_workers(server):
+    inline = scrape_http(server.catalog_url)
+    pooled = scrape_http(server.catalog_url, parse_workers=2)
+
+    assert pooled.all_courses == inline.all_courses
+
+
+@pytest.mark.parametrize("parse_ordered", [True, False])
+def test_async_scrape_with_parse_workers(server, parse_ordered):
+    inline = scrape_http(server.catalog_url)
+    scraper = AsyncHttpScraper(server.catalog_url, concurrency=4, parse_workers=2, parse_ordered=parse_ordered)
+    scraper.fetch_window = lambda: 2
+    fetched, collected, ahead = [], [], []
+    fetch_async, collect = scraper.fetch_async, scraper.collect
+
+    async def counted_fetch(client, semaphore, url, step="course_fetch"):
+        fetched.append(step)
+        return await fetch_async(client, semaphore, url, step)
+
+    async def counted_collect(course_name, page, task):
+        ahead.append(fetched.count("course_fetch") - len(collected))
+        collected.append(course_name)
+        await collect(course_name, page, task)
+
+    scraper.fetch_async, scraper.collect = counted_fetch, counted_collect
+    scraper.scrape()
+
+    # course fetches never ran more than the window ahead of the course being consumed
+    assert max(ahead) == 2
+    if parse_ordered:
+        assert scraper.all_courses == inline.all_courses
+    else:
+        assert sorted(scraper.all_courses, key=str) == sorted(inline.all_courses, key=str)
+
+
+def test_resume_from_journal(server, tmp_path):
+    fixtures = tmp_path / "fixtures"
+    shutil.copytree(server.fixtures_dir, fixtures)
+    server.fixtures_dir = fixtures
+    missing = fixtures / "courses" / "54004.html"
+    saved = missing.read_text()
+    missing.unlink()
+
+    journal_path = tmp_path / "journal" / "2025_2026.jsonl"
+    journal = ProgressJournal(journal_path)
+    first = HttpScraper(server.catalog_url)
+    first.resume_from(journal)
+    try:
+        first.scrape()
+    finally:
+        first.close()
+        journal.close()
+    assert "CSE 150" not in first.scraped_courses
+    assert journal.page_done(1) and not journal.page_done(2)
+
+    # simulate a crash in the middle of writing an event
+    with open(journal_path, "a") as f:
+        f.write('{"event": "row", "page": 2, "ro')
+    missing.write_text(saved)
+    server.requests.clear()
+
+    journal = ProgressJournal(journal_path, resume=True)
+    resumed = AsyncHttpScraper(server.catalog_url)
+    resumed.resume_from(journal)
+    try:
+        resumed.scrape()
+    finally:
+        journal.close()
+
+    fetched = [path for path in server.requests if "preview_course" in path]
+    assert fetched == ["/ajax/preview_course.php?catoid=24&coid=54004&show"]
+    assert sorted(c["course code"] for c in resumed.all_courses) == sorted(
+        ["CSE 030", "CSE 031", "CSE 095", "CSE 150", "MATH 024", "BIO 127LA"]
+    )
+    assert len(resumed.external_link_classes) == 1
+    assert ProgressJournal(journal_path, resume=True).page_done(2)
+
+
+def scrape_to_sinks(url, sinks):
+    scraper = HttpScraper(url)
+    scraper.keep_courses = False
+    scraper.sinks = sinks
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+        for sink in sinks:
+            sink.close()
+    return scraper
+
+
+def test_ndjson_sink(server, tmp_path):
+    scraper = scrape_to_sinks(server.catalog_url, [NdjsonSink("2025_2026", tmp_path)])
+    assert scraper.all_courses == [] and scraper.course_count == 6
+
+    records = [json.loads(line) for line in (tmp_path / "2025_2026.ndjson").read_text().splitlines()]
+    assert [r["course_code"] for r in records] == ["CSE 030", "CSE 031", "CSE 095", "CSE 150", "MATH 024", "BIO 127LA"]
+    cse_095 = records[2]
+    assert cse_095["credits"] == [1, 5]
+    assert cse_095["catalog_year"] == "2025_2026"
+    assert records[3]["prereqs"] == ["CSE 031 or EE 060", "CSE 100", "MATH 024"]
+    assert records[0]["coreqs"] is None
+
+
+def test_aborted_ndjson_sink_keeps_previous_file(server, tmp_path):
+    (tmp_path / "2025_2026.ndjson").write_text("previous\n")
+    sink = NdjsonSink("2025_2026", tmp_path)
+    sink.abort()
+    scrape_to_sinks(server.catalog_url, [sink])
+
+    assert (tmp_path / "2025_2026.ndjson").read_text() == "previous\n"
+    assert not (tmp_path / "2025_2026.ndjson.tmp").exists()
+
+
+def test_sqlite_sink_replaces_catalog_year(server, tmp_path):
+    db_path = tmp_path / "courses.db"
+    create_catalog_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO courses (course_code, catalog_year) VALUES (?, ?)",
+                     [("OLD 001", "2025_2026"), ("OLD 001", "2024_2025")])
+    conn.commit()
+
+    scrape_to_sinks(server.catalog_url, [SqliteSink("2025_2026", db_path, batch_size=4)])
+
+    rows = conn.execute(
+        "SELECT course_code, credits, prereqs FROM courses WHERE catalog_year = '2025_2026' ORDER BY course_code"
+    ).fetchall()
+    assert [row[0] for row in rows] == ["BIO 127LA", "CSE 030", "CSE 031", "CSE 095", "CSE 150", "MATH 024"]
+    assert json.loads(rows[3][1]) == [1, 5]
+    assert conn.execute("SELECT COUNT(*) FROM courses WHERE catalog_year = '2024_2025'").fetchone()[0] == 1
+
+    requirements = conn.execute(
+        "SELECT group_id, kind, required_code FROM course_requirements WHERE course_code = 'CSE 150'"
+    ).fetchall()
+    assert requirements == [(0, "prereq", "CSE 031"), (0, "prereq", "EE 060"), (1, "prereq", "CSE 100"),
+                            (2, "prereq", "MATH 024")]
+    assert conn.execute("SELECT COUNT(*) FROM course_search WHERE catalog_year = '2025_2026'").fetchone()[0] == 6
+    conn.close()
+
+
+def test_sqlite_sink_keeps_catalog_year_on_failure(server, tmp_path):
+    db_path = tmp_path / "courses.db"
+    create_catalog_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO courses (course_code, catalog_year) VALUES ('OLD 001', '2025_2026')")
+    conn.commit()
+
+    scraper = HttpScraper(server.catalog_url)
+    scraper.keep_courses = False
+    with pytest.raises(RuntimeError):
+        with SqliteSink("2025_2026", db_path, batch_size=4) as sink:
+            scraper.sinks = [sink]
+            scraper.scrape()
+            raise RuntimeError("scrape stopped partway")
+    scraper.close()
+    assert sink.count == 6
+    SqliteSink("2025_2026", db_path).close() # no courses
+
+    assert conn.execute("SELECT course_code FROM courses WHERE catalog_year = '2025_2026'").fetchall() == [
+        ("OLD 001",)]
+    conn.close()
+
+
+def test_parquet_sink(server, tmp_path):
+    import pyarrow.parquet as pq
+    scrape_to_sinks(server.catalog_url, [ParquetSink("2025_2026", tmp_path, batch_size=4)])
+
+    parquet_file = pq.ParquetFile(tmp_path / "2025_2026.parquet")
+    assert parquet_file.metadata.num_row_groups == 2
+    records = parquet_file.read().to_pylist()
+    assert [r["credits"] for r in records[:3]] == [[4], [4], [1, 5]]
+    assert records[3]["class_levels"] == ["Junior", "Senior"]
+
+
+@pytest.mark.parametrize("without_rowid", [False, True])
+def test_catalog_loader(server, tmp_path, without_rowid):
+    scrape_to_sinks(server.catalog_url, [NdjsonSink("2025_2026", tmp_path)])
+    db_path = tmp_path / "courses.db"
+    rows = list(catalog_loader.rows_from_ndjson([tmp_path / "2025_2026.ndjson"]))
+
+    assert catalog_loader.load_courses(db_path, rows, without_rowid=without_rowid) == 6
+    # loading again replaces the table instead of appending
+    assert catalog_loader.load_courses(db_path, rows, without_rowid=without_rowid) == 6
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 6
+    assert conn.execute("SELECT credits FROM courses WHERE course_code = 'CSE 095'").fetchone()[0] == "[1, 5]"
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO courses (course_code, catalog_year) VALUES ('CSE 030', '2025_2026')")
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM courses WHERE subject_prefix = 'CSE'").fetchall()
+    assert "idx_courses_subject" in plan[0][-1]
+    assert conn.execute(
+        "SELECT subject_prefix, course_number, course_suffix FROM courses WHERE course_code = 'BIO 127LA'"
+    ).fetchone() == ("BIO", 127, "LA")
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    assert conn.execute(
+        "SELECT course_code FROM course_search WHERE course_search MATCH 'structures'"
+    ).fetchall() == [("CSE 030",)]
+    # the index reads its text from courses, unless they have no rowid to point at
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert ("course_search_content" in tables) == without_rowid
+    conn.close()
+
+
+def test_catalog_loader_killed_midway(server, tmp_path):
+    scrape_to_sinks(server.catalog_url, [NdjsonSink("2025_2026", tmp_path)])
+    db_path = tmp_path / "courses.db"
+    catalog_loader.load_courses(db_path, catalog_loader.rows_from_ndjson([tmp_path / "2025_2026.ndjson"]))
+
+    # more rows than the loader's page cache holds, so pages reach the file before the process dies
+    script = f"""
+import os, sys
+sys.path.insert(0, {str(Path(__file__).parent.parent)!r})
+import catalog_loader
+
+def rows():
+    for i in range(40000):
+        yield (f"ZZZ {{i}}", None, "4", "x" * 2000, None, None, None, 0, "2025_2026")
+    os._exit(1)
+
+catalog_loader.load_courses({str(db_path)!r}, rows())
+"""
+    assert subprocess.run([sys.executable, "-c", script]).returncode == 1
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 6
+    conn.close()
+
+
+def test_catalog_diff(server, tmp_path):
+    scrape_to_sinks(server.catalog_url, [NdjsonSink("2025_2026", tmp_path)])
+    rows = list(catalog_loader.rows_from_ndjson([tmp_path / "2025_2026.ndjson"]))
+    older = {row[0]: list(row[:-1]) + ["2024_2025"] for row in rows if row[0] != "CSE 150"}
+    older["OLD 001"] = ["OLD 001"] + [None] * 7 + ["2024_2025"]
+    older["CSE 095"][2] = "[1, 4]"
+    older["CSE 095"][3] = "An older description."
+    # the same prereqs stored with other JSON spacing: the hash differs, the course does not
+    older["CSE 031"][4] = json.dumps(json.loads(older["CSE 031"][4]), separators=(",", ":"))
+
+    db_path = tmp_path / "courses.db"
+    catalog_loader.load_courses(db_path, rows + [tuple(row) for row in older.values()])
+
+    conn = sqlite3.connect(db_path)
+    diffs = conn.execute("SELECT from_year, to_year, course_code, change, fields FROM course_diffs").fetchall()
+    assert diffs == [
+        ("2024_2025", "2025_2026", "CSE 095", "changed", '["credits", "course_description"]'),
+        ("2024_2025", "2025_2026", "CSE 150", "added", None),
+        ("2024_2025", "2025_2026", "OLD 001", "dropped", None),
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM course_hashes").fetchone()[0] == 12
+    conn.close()
+
+    # a catalog year rewritten by the SQLite sink is rediffed against the others
+    scrape_to_sinks(server.catalog_url, [SqliteSink("2024_2025", db_path)])
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM course_diffs").fetchone()[0] == 0
+    conn.close()
+
+
+def test_adaptive_wait():
+    from selenium.common.exceptions import TimeoutException
+
+    timer = StepTimer()
+    waits = AdaptiveWait(driver=None, timer=timer, default_timeout=2.0, min_timeout=0.2, min_samples=5)
+    assert waits.timeout("dropdown_open") == 2.0
+
+    # returns on the first poll that sees the condition, not after a fixed sleep
+    ready_at = time.monotonic() + 0.1
+    start = time.monotonic()
+    assert waits.until("dropdown_open", lambda driver: time.monotonic() >= ready_at and "open")
+    assert time.monotonic() - start < 0.3
+
+    for _ in range(5):
+        waits.until("dropdown_open", lambda driver: True)
+    # timeout_factor times the slowest of these waits (~0.1 s), instead of the default
+    assert 0.2 <= waits.timeout("dropdown_open") <= 0.6
+    assert waits.timeout("dropdown_close") == 2.0
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutException):
+        waits.until("dropdown_open", lambda driver: False)
+    assert time.monotonic() - start < 1.0
+
+    summary = timer.summary()
+    assert summary["dropdown_open"]["count"] == 7
+    assert len(waits.latencies["dropdown_open"]) == 6  # timeouts are timed but not learned from
+    assert "dropdown_open" in timer.report()
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+
+    @property
+    def window_handles(self):
+        if not self.alive:
+            raise WebDriverException("browser went away")
+        return ["main"]
+
+    def quit(self):
+        self.alive = False
+
+
+class FakeCatalog:
+    """Stands in for a Scraper: every page takes a little time on whichever driver runs it."""
+    def __init__(self, pages, crash_on=None):
+        self.pages = pages
+        self.crash_on = crash_on
+        self.page_failures = Counter()
+        self.scraped = Counter() # page -> times scraped successfully
+        self.workers = Counter() # pool thread -> pages it scraped
+        self.lock = threading.Lock()
+
+    def load_listing(self, driver):
+        return self.pages
+
+    def page_done(self, page):
+        return False
+
+    def scrape_page(self, page, total_pages, driver):
+        time.sleep(0.01)
+        if page == self.crash_on:
+            self.crash_on = None
+            driver.alive = False
+        if not driver.alive:
+            self.page_failures[page] += 1
+            return
+        with self.lock:
+            self.scraped[page] += 1
+            self.workers[threading.current_thread().name] += 1
+
+    def log(self, message):
+        pass
+
+
+def test_browser_pool_work_stealing():
+    # one long catalog and three short ones: the short catalogs' browsers help with the long one
+    catalogs = {"long": FakeCatalog(40, crash_on=7), "a": FakeCatalog(2), "b": FakeCatalog(2), "c": FakeCatalog(2)}
+    with DriverPool(4, factory=FakeDriver) as pool:
+        run = PooledRun(pool, catalogs)
+        run.run()
+
+    for catalog in catalogs.values():
+        assert catalog.scraped == Counter(range(1, catalog.pages + 1))
+    assert run.queue.steals > 0
+    # every browser worked on the long catalog, not only the one it was queued on
+    assert set(catalogs["long"].workers) == {f"browser-{worker}" for worker in range(4)}
+    assert pool.recycled == 1  # the crashed browser was replaced and its page retried
+    assert not run.failed_tasks
+
+
+def test_browser_pool_restart_failure():
+    drivers = []
+
+    def factory():
+        # the first two browsers start, no replacement does
+        if len(drivers) == 2:
+            raise WebDriverException("chrome failed to start")
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    catalogs = {"a": FakeCatalog(10, crash_on=3), "b": FakeCatalog(10)}
+    with DriverPool(2, factory=factory) as pool:
+        run = PooledRun(pool, catalogs)
+        run.run()
+
+    # the worker that lost its browser gave up page 3 and stopped; the other one did the rest
+    assert [(task.year, task.page) for task in run.failed_tasks] == [("a", 3)]
+    assert pool.drivers.count(None) == 1
+    assert sum(catalog.scraped.total() for catalog in catalogs.values()) == 19
+    assert not any(run.queue.deques)
+
+
+def test_benchmark_catalog_corpus(tmp_path):
+    total_pages, total_courses = write_catalog(tmp_path, "2025_2026", page_size=50, external_every=50, limit=120)
+    assert (total_pages, total_courses) == (3, 120)
+
+    with CatalogStubServer(tmp_path) as server:
+        scraper = HttpScraper(server.catalog_url, parser="lxml")
+        try:
+            scraper.scrape()
+        finally:
+            scraper.close()
+
+    assert scraper.course_count == 120
+    assert len(scraper.external_link_classes) == 2
+    assert not scraper.failed_courses and not scraper.failed_pages
+
+    phases = scraper.timer.summary()
+    assert phases["page_fetch"]["count"] == 3
+    assert phases["course_fetch"]["count"] == phases["parse"]["count"] == phases["save"]["count"] == 120
+    assert scraper.timer.histograms()["parse"]["+Inf"] == 120
+
+
+def test_metrics_export(server, tmp_path):
+    scraper = HttpScraper(server.catalog_url)
+    try:
+        scraper.scrape()
+    finally:
+        scraper.close()
+
+    jsonl_path, prom_path = metrics.export({"2025_2026": scraper}, run_seconds=1.5, engine="http",
+                                           metrics_dir=tmp_path)
+    metrics.export({"2025_2026": scraper}, metrics_dir=tmp_path)
+
+    records = [json.loads(line) for line in jsonl_path.read_text().splitlines()]
+    assert len(records) == 2  # appended per run
+    record = records[0]
+    assert (record["catalog_year"], record["engine"], record["run_seconds"]) == ("2025_2026", "http", 1.5)
+    assert record["events"] == {"courses_scraped": 6, "duplicates_skipped": 1, "external_links": 1}
+    # the fixtures list one course twice: parsed and deduplicated twice, saved once
+    assert record["steps"]["parse"]["count"] == record["steps"]["dedup"]["count"] == 7
+    assert record["steps"]["save"]["count"] == 6
+
+    prom = prom_path.read_text()
+    assert "# TYPE ucm_scraper_step_seconds histogram" in prom
+    assert 'ucm_scraper_step_seconds_bucket{catalog_year="2025_2026",step="parse",le="+Inf"} 7' in prom
+    assert 'ucm_scraper_step_seconds_count{catalog_year="2025_2026",step="save"} 6' in prom
+    assert 'ucm_scraper_events_total{catalog_year="2025_2026",event="duplicates_skipped"} 1' in prom
+    assert 'ucm_scraper_courses{catalog_year="2025_2026"} 6' in prom
+    assert not list(tmp_path.glob("*.tmp"))
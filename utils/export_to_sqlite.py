@@ -1,10 +1,15 @@
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 import pandas as pd
 from sqlalchemy import create_engine
 import json
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from catalog_db import COLUMNS
+from catalog_loader import load_courses
+
 load_dotenv()
 
 def export_to_sqlite():
@@ -26,11 +31,13 @@ def export_to_sqlite():
             df[col] = df[col].apply(lambda x: json.dumps(x) if x is not None else None)
 
     sqlite_path = '../course_catalog.db'
-    sqlite_connection_string = f'sqlite:///{sqlite_path}'
-    sqlite_engine = create_engine(sqlite_connection_string)
+
+    # bulk load with the explicit schema (primary key, indexes) instead of df.to_sql
+    df = df[COLUMNS].astype(object).where(df[COLUMNS].notna(), None)
+    rows = list(df.itertuples(index=False, name=None))
 
     print(f"Exporting {len(df)} rows to SQLite file")
-    df.to_sql('courses', con=sqlite_engine, if_exists='replace', index=False)
+    load_courses(sqlite_path, rows)
 
     print(f"Successfully exported to {sqlite_path}")
     print(f"  - Total rows: {len(df)}")
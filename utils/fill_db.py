@@ -75,6 +75,18 @@ def load_excel_to_db(excel_path, catalog_year, engine, if_exists='append'):
     # Add catalog_year column
     df['catalog_year'] = catalog_year
 
+    write_courses(df, engine, if_exists)
+    print(f"Successfully loaded {len(df)} rows from {excel_path} to 'courses' table with catalog_year '{catalog_year}'")
+
+def load_ndjson_to_db(ndjson_path, engine, if_exists='append'):
+    # written by the scraper's ndjson output: lists and credits are already native, no re-parsing needed
+    df = pd.read_json(ndjson_path, lines=True, dtype=False)
+    df = df.astype(object).where(df.notna(), None)
+
+    write_courses(df, engine, if_exists)
+    print(f"Successfully loaded {len(df)} rows from {ndjson_path} to 'courses' table")
+
+def write_courses(df, engine, if_exists):
     data_types = {
         'catalog_year': types.String(10),
         'course_code': types.String(15),
@@ -95,8 +107,6 @@ def load_excel_to_db(excel_path, catalog_year, engine, if_exists='append'):
         dtype=data_types
     )
 
-    print(f"Successfully loaded {len(df)} rows from {excel_path} to 'courses' table with catalog_year '{catalog_year}'")
-
 def create_db_engine():
     db_user = os.getenv('DB_USER')
     db_password = os.getenv('DB_PASSWORD')
@@ -110,6 +120,20 @@ def create_db_engine():
 def main():
     engine = create_db_engine()
 
+    # prefer the streamed NDJSON output (main.py --output ndjson) over the Excel files
+    ndjson_files = sorted(Path('../output').glob('*.ndjson'))
+    if ndjson_files:
+        print(f"Found {len(ndjson_files)} NDJSON files to process")
+        for i, ndjson_file in enumerate(ndjson_files):
+            print(f"\nProcessing {ndjson_file.name}...")
+            try:
+                load_ndjson_to_db(ndjson_file, engine, if_exists='replace' if i == 0 else 'append')
+            except Exception as e:
+                print(f"Error with {ndjson_file.name}: {e}")
+
+        print("\nAll files added to DB.")
+        return
+
     spreadsheets_dir = Path('../spreadsheets')
     excel_files = list(spreadsheets_dir.glob('*.xlsx'))
 
@@ -0,0 +1,125 @@
+"""
+Explicit waits and per-step timing for the Selenium scrape loop.
+
+AdaptiveWait replaces the fixed sleeps: every wait polls its DOM condition
+every POLL_INTERVAL seconds (WebDriverWait polls every 0.5 s by default) and
+returns as soon as it holds. The timeout of each kind of wait follows the
+latencies seen so far in the catalog: the default timeout until min_samples
+waits have succeeded, then timeout_factor times their 99th percentile, kept
+between min_timeout and the default. A row whose dropdown never opens then
+costs about as long as a slow row, not a flat 10 seconds.
+
+StepTimer records the wall-clock time of every step (waits included, whether
+they succeed or time out) and counts events such as duplicates skipped or
+timeouts, so a run can report where its time went; metrics.py exports both.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import threading
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+
+POLL_INTERVAL = 0.05
+
+# upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def histogram(samples, bounds=LATENCY_BUCKETS):
+    """Cumulative count of samples at or below each bound, then "+Inf" for all of them."""
+    ordered = sorted(samples)
+    counts = {}
+    i = 0
+    for bound in bounds:
+        while i < len(ordered) and ordered[i] <= bound:
+            i += 1
+        counts[str(bound)] = i
+    counts["+Inf"] = len(ordered)
+    return counts
+
+
+class StepTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counts = Counter()
+        self.lock = threading.Lock() # the pages of a catalog may run on several threads
+
+    def record(self, step, seconds):
+        with self.lock:
+            self.samples[step].append(seconds)
+
+    def count(self, event, n=1):
+        with self.lock:
+            self.counts[event] += n
+
+    @contextmanager
+    def step(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(step, time.perf_counter() - start)
+
+    def summary(self):
+        """step -> count, total, p50, p95 and max seconds, slowest total first."""
+        steps = sorted(self.samples.items(), key=lambda item: sum(item[1]), reverse=True)
+        return {
+            step: {
+                "count": len(samples),
+                "total": sum(samples),
+                "p50": percentile(samples, 0.5),
+                "p95": percentile(samples, 0.95),
+                "max": max(samples),
+            }
+            for step, samples in steps
+        }
+
+    def histograms(self, bounds=LATENCY_BUCKETS):
+        return {step: histogram(samples, bounds) for step, samples in self.samples.items()}
+
+    def report(self):
+        lines = [f"{'step':<16} {'count':>7} {'total s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for step, stats in self.summary().items():
+            lines.append(f"{step:<16} {stats['count']:>7} {stats['total']:>9.1f} {stats['p50'] * 1000:>8.0f} "
+                         f"{stats['p95'] * 1000:>8.0f} {stats['max'] * 1000:>8.0f}")
+        return "\n".join(lines)
+
+
+class AdaptiveWait:
+    def __init__(self, driver, timer=None, default_timeout=10.0, min_timeout=1.0, timeout_factor=4.0,
+                 min_samples=20, poll_interval=POLL_INTERVAL):
+        self.driver = driver
+        self.timer = timer if timer is not None else StepTimer()
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.timeout_factor = timeout_factor
+        self.min_samples = min_samples
+        self.poll_interval = poll_interval
+        self.latencies = defaultdict(list) # wait name -> seconds of the waits that succeeded
+
+    def timeout(self, name):
+        latencies = self.latencies[name]
+        if len(latencies) < self.min_samples:
+            return self.default_timeout
+        learned = percentile(latencies, 0.99) * self.timeout_factor
+        return min(self.default_timeout, max(self.min_timeout, learned))
+
+    def until(self, name, condition, driver=None):
+        """
+        Polls condition on driver (self.driver by default) until it returns
+        something truthy and returns that; raises TimeoutException after
+        timeout(name) seconds.
+        """
+        driver = driver or self.driver
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(driver, self.timeout(name), poll_frequency=self.poll_interval).until(condition)
+        finally:
+            self.timer.record(name, time.perf_counter() - start)
+        self.latencies[name].append(time.perf_counter() - start)
+        return result